@@ -1,10 +1,23 @@
 import os
-import mysql.connector
-from flask import Flask, render_template, send_from_directory, request, jsonify, redirect, url_for, session, flash
-from config import secret_key
+import csv
+import hashlib
+import io
+import mimetypes
+from flask import Flask, abort, render_template, send_file, send_from_directory, request, jsonify, redirect, url_for, session, flash, g, Response
+from config import secret_key, explore_feed_config, suggest_config, cache_config, metrics_config, order_stream_config, order_feed_config, compression_config
+import compression
 import db
+import menu_io
+from explore_feed import ExploreFeed
+from search_index import MenuSearchIndex, SuggestionIndex
+from cache import TTLCache, MISSING
+from metrics import Metrics
+from order_stream import OrderStatusHub, OrderFeedWaiter, FINAL_STATUSES, format_event
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 import time
+import secrets
+from datetime import datetime
 
 # Create Flask app
 app = Flask(__name__, static_folder=".", template_folder="templates")
@@ -13,33 +26,316 @@ app.secret_key = secret_key
 # Create upload directories if they don't exist
 os.makedirs(os.path.join(app.static_folder, 'uploads', 'student_ids'), exist_ok=True)
 
-# Check and fix database tables if needed
-try:
-    db.fix_menu_items_table()
-except Exception as e:
-    print(f"Warning: Could not fix database tables: {e}")
+# Explore page items are served from a periodically refreshed in-memory snapshot
+explore_feed = ExploreFeed(db.get_all_menu_items, **explore_feed_config)
+
+# Inverted index behind /api/search, kept current by db change notifications
+search_index = MenuSearchIndex(db.get_all_menu_items, db.get_menu_item_details)
+db.add_change_listener(search_index.on_change)
+
+# Prefix index behind /api/suggest, rebuilt in the background
+suggestion_index = SuggestionIndex(db.get_all_menu_items, db.get_menu_item_popularity, **suggest_config)
+db.add_change_listener(suggestion_index.on_change)
+
+def on_menu_change(entity, entity_id):
+    """Reload the explore snapshot after menu or business changes"""
+    if entity in ('menu_items', 'businesses'):
+        explore_feed.mark_stale()
+
+db.add_change_listener(on_menu_change)
+
+# Serialized /api/menu-item/<id> payloads and their ETags, keyed by item id
+menu_item_cache = TTLCache(ttl=cache_config['menu_item_ttl'], max_bytes=cache_config['menu_item_max_bytes'],
+                           name='menu_item_details')
+
+def on_menu_item_change(entity, entity_id):
+    """Drop cached item details when the item or its business changes"""
+    if entity == 'menu_items':
+        menu_item_cache.invalidate(entity_id)
+    elif entity == 'businesses':
+        # Payloads embed the business name; business edits are rare, so start over
+        menu_item_cache.clear()
+
+db.add_change_listener(on_menu_item_change)
+
+# Serialized /api/user-data payloads and their ETags, keyed by user id
+user_data_cache = TTLCache(ttl=cache_config['entity_ttl'], max_entries=cache_config['entity_max_entries'],
+                           name='user_data')
+
+def on_user_change(entity, entity_id):
+    if entity == 'users':
+        user_data_cache.invalidate(entity_id)
+
+db.add_change_listener(on_user_change)
+
+# Conditional GETs: read APIs send a strong ETag and answer If-None-Match with 304 Not Modified.
+# Tags come from row versions or from hashes stored next to cached payloads, so the
+# unchanged check never builds or serializes the response body.
+def payload_etag(payload):
+    return hashlib.sha1(payload.encode()).hexdigest()[:32]
+
+def order_etag(order_id, version, business_name):
+    """Order writes bump the version; the joined business name can change without one"""
+    name_hash = hashlib.sha1(str(business_name).encode()).hexdigest()[:8]
+    return f"order-{order_id}-v{version}-{name_hash}"
+
+def etag_matches(tag):
+    return request.if_none_match.contains_weak(tag)
+
+def conditional_response(tag, payload=None, cache_control='private, no-cache'):
+    """304 if the client already has `tag`, otherwise the JSON payload; both carry the ETag"""
+    if etag_matches(tag):
+        response = Response(status=304)
+    else:
+        response = Response(payload, mimetype='application/json')
+    response.set_etag(tag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+# Fan-out of order status changes to open /api/order/<id>/events streams
+order_status_hub = OrderStatusHub(max_subscribers=order_stream_config['max_subscribers'])
+
+# Wakes long-polling dashboard change-feed requests (/api/business/orders?since=...&wait=...)
+order_feed_waiter = OrderFeedWaiter()
+
+def on_order_change(event):
+    """Push order writes to live trackers and waiting dashboards"""
+    order_status_hub.publish(event['order_id'], event['status'])
+    order_feed_waiter.notify(event['business_id'], event['version'])
+
+db.add_order_listener(on_order_change)
+
+def get_explore_seed():
+    """Per-session seed so a user's explore order stays stable while they scroll"""
+    if 'explore_seed' not in session:
+        session['explore_seed'] = secrets.token_hex(4)
+    return session['explore_seed']
+
+# Count database round trips per request; exposed as X-DB-Queries for tests and debugging,
+# and as Server-Timing (DB time and query count, total time) for the browser dev tools.
+# The session's last write time travels in the session cookie so that reads right after
+# a write go to the primary instead of a possibly lagging replica.
+@app.before_request
+def start_db_tracking():
+    g.request_started = time.perf_counter()
+    g.db_round_trips_ctx = db.count_round_trips()
+    g.db_round_trips = g.db_round_trips_ctx.__enter__()
+    g.db_last_write = session.get('db_last_write')
+    g.db_writes_ctx = db.read_your_writes(g.db_last_write)
+    g.db_writes = g.db_writes_ctx.__enter__()
+
+@app.after_request
+def report_db_tracking(response):
+    counter = g.get('db_round_trips')
+    if counter is not None:
+        round_trips = counter['queries'] + counter['commits']
+        response.headers['X-DB-Queries'] = str(round_trips)
+        total_ms = (time.perf_counter() - g.request_started) * 1000
+        timings = [f'db;dur={counter["db_time"] * 1000:.1f};desc="{round_trips} queries"']
+        # The slowest db.py functions of this request
+        slowest = sorted(counter['functions'].items(), key=lambda entry: -entry[1]['time'])[:5]
+        timings += [f'db-{function};dur={stats["time"] * 1000:.1f};desc="{stats["queries"]} queries"'
+                    for function, stats in slowest]
+        timings.append(f'total;dur={total_ms:.1f}')
+        response.headers['Server-Timing'] = ', '.join(timings)
+        if request.endpoint in ('place_order', 'place_cart_order') and round_trips > db.ORDER_PLACEMENT_QUERY_BUDGET:
+            print(f"Warning: order placement used {round_trips} database round trips "
+                  f"(budget {db.ORDER_PLACEMENT_QUERY_BUDGET})")
+    writes = g.get('db_writes')
+    if writes is not None and writes['last_write'] != g.get('db_last_write'):
+        # Only this request's commits update the cookie
+        session['db_last_write'] = writes['last_write']
+    return response
+
+@app.teardown_request
+def stop_db_tracking(exc):
+    for name in ('db_writes_ctx', 'db_round_trips_ctx'):
+        ctx = g.pop(name, None)
+        if ctx is not None:
+            ctx.__exit__(None, None, None)
+
+# Prometheus metrics for /metrics; per-worker samples are merged under multi-process servers
+metrics = Metrics(buckets=metrics_config['latency_buckets'],
+                  multiprocess_dir=metrics_config['multiprocess_dir'],
+                  flush_interval=metrics_config['flush_interval'])
+metrics.describe('http_requests_total', 'counter', 'HTTP requests by route, method and status code')
+metrics.describe('http_request_duration_seconds', 'histogram', 'HTTP request latency by route and method')
+metrics.describe('http_requests_in_flight', 'gauge', 'HTTP requests currently being handled')
+metrics.describe('db_pool_connections', 'gauge', 'Pooled database connections by state')
+metrics.describe('db_pool_checkouts_total', 'counter', 'Connections borrowed from the pool')
+metrics.describe('db_pool_timeouts_total', 'counter', 'Pool checkouts that timed out waiting for a connection')
+metrics.describe('db_queries_total', 'counter', 'SQL statements run, by db.py function')
+metrics.describe('db_query_seconds_total', 'counter', 'Time spent in SQL statements, by db.py function')
+metrics.describe('db_query_errors_total', 'counter', 'Failed SQL statements, by db.py function')
+metrics.describe('db_slow_queries_total', 'counter', 'SQL statements slower than the slow-query threshold')
+metrics.describe('cache_hits_total', 'counter', 'In-process cache hits')
+metrics.describe('cache_misses_total', 'counter', 'In-process cache misses')
+metrics.describe('cache_evictions_total', 'counter', 'Entries evicted to stay within a cache size bound')
+metrics.describe('cache_entries', 'gauge', 'Entries currently cached')
+metrics.add_ratio('cache_hit_ratio', 'cache_hits_total', 'cache_misses_total', 'Share of cache lookups served from memory')
+
+def collect_db_metrics():
+    """Pool, query and cache counters of this worker"""
+    samples = []
+    pool_stats = db.get_pool_stats()
+    for stats in [pool_stats] + pool_stats.get('replication', {}).get('replicas', []):
+        labels = {'pool': stats['name']}
+        samples.append(('gauge', 'db_pool_connections', dict(labels, state='in_use'), stats['in_use']))
+        samples.append(('gauge', 'db_pool_connections', dict(labels, state='idle'), stats['idle']))
+        samples.append(('counter', 'db_pool_checkouts_total', labels, stats['checkouts']))
+        samples.append(('counter', 'db_pool_timeouts_total', labels, stats['timeouts']))
+
+    for function, stats in db.get_query_stats().items():
+        labels = {'function': function}
+        samples.append(('counter', 'db_queries_total', labels, stats['queries']))
+        samples.append(('counter', 'db_query_seconds_total', labels, stats['time']))
+        samples.append(('counter', 'db_query_errors_total', labels, stats['errors']))
+        samples.append(('counter', 'db_slow_queries_total', labels, stats['slow']))
+
+    caches = db.get_cache_stats()
+    for cache in (menu_item_cache, user_data_cache):
+        caches[cache.name] = cache.stats()
+    for name, stats in caches.items():
+        labels = {'cache': name}
+        samples.append(('counter', 'cache_hits_total', labels, stats['hits']))
+        samples.append(('counter', 'cache_misses_total', labels, stats['misses']))
+        samples.append(('counter', 'cache_evictions_total', labels, stats['evictions']))
+        samples.append(('gauge', 'cache_entries', labels, stats['entries']))
+    return samples
+
+metrics.add_collector(collect_db_metrics)
+
+metrics.describe('order_trackers_open', 'gauge', 'Open order tracking event streams')
+metrics.describe('order_status_events_total', 'counter', 'Order status events sent to open trackers')
+metrics.describe('order_trackers_rejected_total', 'counter', 'Tracking streams refused because the hub was full')
+
+def collect_order_stream_metrics():
+    stats = order_status_hub.stats()
+    return [
+        ('gauge', 'order_trackers_open', None, stats['subscribers']),
+        ('counter', 'order_status_events_total', None, stats['delivered']),
+        ('counter', 'order_trackers_rejected_total', None, stats['rejected'])
+    ]
+
+metrics.add_collector(collect_order_stream_metrics)
+
+@app.before_request
+def start_request_metrics():
+    # The URL rule (e.g. /api/order/<order_id>) keeps one series per route, not per URL
+    g.metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.metrics_started = time.perf_counter()
+    metrics.add_gauge('http_requests_in_flight', {'route': g.metrics_route})
+
+@app.after_request
+def record_request_metrics(response):
+    route = g.get('metrics_route')
+    if route is not None:
+        metrics.inc('http_requests_total', {'route': route, 'method': request.method,
+                                            'status': str(response.status_code)})
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - g.metrics_started,
+                        {'route': route, 'method': request.method})
+        metrics.flush()
+    return response
+
+@app.teardown_request
+def end_request_metrics(exc):
+    route = g.pop('metrics_route', None)
+    if route is not None:
+        metrics.add_gauge('http_requests_in_flight', {'route': route}, -1)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape target"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# Negotiated gzip/brotli for generated responses. Pages and static files are sent as their
+# build-time variants instead (python compression.py build), so they cost no CPU per request.
+@app.after_request
+def compress_response(response):
+    if not compression_config['enabled'] or response.mimetype not in compression.COMPRESSIBLE_TYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    if request.method == 'HEAD' or 'Content-Encoding' in response.headers or response.direct_passthrough \
+            or 'no-transform' in response.headers.get('Cache-Control', ''):
+        return response
+    encoding = compression.negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+    if response.status_code == 304:
+        # Keep the validator the same as on the compressed 200
+        weaken_etag(response)
+        return response
+    if response.status_code != 200:
+        return response
+
+    level = compression_config['brotli_quality'] if encoding == 'br' else compression_config['gzip_level']
+    if response.is_streamed:
+        if not compression_config['compress_streams']:
+            return response
+        response.response = compression.compress_stream(response.response, encoding, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < compression_config['min_size']:
+            return response
+        compressed = compression.compress(data, encoding, level)
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    weaken_etag(response)
+    return response
+
+def weaken_etag(response):
+    """A strong ETag names exact bytes; the compressed body is only semantically equal"""
+    tag, weak = response.get_etag()
+    if tag is not None and not weak:
+        response.set_etag(tag, weak=True)
+
+def send_variant(directory, filename):
+    """The build-time .br/.gz variant of a file as a response, or None if there is none the client accepts"""
+    path = safe_join(os.path.join(app.root_path, directory), filename)
+    if path is None:
+        return None
+    variant, encoding = compression.find_variant(path, request.accept_encodings)
+    if variant is None:
+        return None
+    response = send_file(variant, mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+def serve_template(name):
+    """A page from templates/, precompressed when possible"""
+    response = send_variant(app.template_folder, name)
+    return response if response is not None else render_template(name)
+
+def send_static(directory, filename):
+    """A file from disk, precompressed when possible"""
+    response = send_variant(directory, filename)
+    return response if response is not None else send_from_directory(directory, filename)
 
 # Routes
 @app.route('/')
 def home():
-    return render_template('index.html')
+    return serve_template('index.html')
 
 @app.route('/subscription.html')
 def subscription_page():
     """Serve the subscription page"""
-    return render_template('subscriptioncode.html')
+    return serve_template('subscriptioncode.html')
 
 @app.route('/payment.html')
 def payment_page():
     """Serve the payment page"""
-    return render_template('payment.html')
+    return serve_template('payment.html')
 
 @app.route('/subscription-manage.html')
 def subscription_manage_page():
     """Serve the subscription management page"""
     if 'logged_in' not in session:
         return redirect('/login.html?error=login_required&redirect=subscription-manage.html')
-    return render_template('subscription-manage.html')
+    return serve_template('subscription-manage.html')
 
 @app.route('/api/process-payment', methods=['POST'])
 def process_payment():
@@ -144,13 +440,26 @@ def admin_redirect():
 
 @app.route('/<path:filename>.html')
 def serve_html(filename):
-    return render_template(f'{filename}.html')
+    return serve_template(f'{filename}.html')
+
+# The app directory doubles as the static folder; never hand out code, configuration,
+# databases, logs or anything under instance/ or a dot directory
+PRIVATE_FILE_SUFFIXES = ('.py', '.pyc', '.sql', '.sqlite3', '.sqlite3-wal', '.sqlite3-shm', '.db',
+                         '.log', '.jsonl', '.cfg', '.ini', '.env')
+
+def is_private_file(filename):
+    parts = filename.replace('\\', '/').split('/')
+    if parts[0] == 'instance' or any(part.startswith('.') for part in parts):
+        return True
+    return filename.lower().endswith(PRIVATE_FILE_SUFFIXES)
 
 @app.route('/<path:filename>')
 def serve_files(filename):
-    # Only serve non-HTML files with send_from_directory
+    if is_private_file(filename):
+        abort(404)
+    # Only serve non-HTML files directly
     if not filename.endswith('.html'):
-        return send_from_directory('.', filename)
+        return send_static('.', filename)
     return redirect(url_for('serve_html', filename=filename))
 
 # Authentication routes
@@ -339,10 +648,17 @@ def logout():
 def user_data():
     if 'logged_in' in session and session['logged_in']:
         user_id = session['user_id']
-        user = db.get_user_by_id(user_id)
-        
-        if user:
-            return jsonify(user)
+        cached = user_data_cache.get(user_id)
+        if cached is MISSING:
+            generation = user_data_cache.generation(user_id)
+            user = db.get_user_by_id(user_id)
+            if not user:
+                return jsonify({'error': 'Not logged in'}), 401
+            payload = app.json.dumps(user)
+            cached = (payload, payload_etag(payload))
+            user_data_cache.set(user_id, cached, generation)
+        payload, tag = cached
+        return conditional_response(tag, payload)
     
     return jsonify({'error': 'Not logged in'}), 401
 
@@ -500,43 +816,164 @@ def delete_menu_item(item_id):
     
     return jsonify({'error': 'Not logged in or not a business account'}), 401
 
+@app.route('/api/menu-items/import', methods=['POST'])
+def import_menu_items():
+    """Bulk-add menu items from an uploaded CSV or JSON file (or a raw request body).
+
+    By default the import is all-or-nothing; pass ?partial=1 to keep the valid rows
+    when some rows are rejected.
+    """
+    if 'logged_in' in session and session.get('account_type') == 'business':
+        business_id = session['business_id']
+
+        upload = request.files.get('file')
+        if upload:
+            fmt = menu_io.detect_format(upload.filename, upload.mimetype, request.args.get('format'))
+            stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        else:
+            fmt = menu_io.detect_format(None, request.content_type, request.args.get('format'))
+            stream = io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='')
+
+        if fmt not in ('csv', 'json'):
+            return jsonify({'error': 'Unsupported format, use csv or json'}), 400
+
+        partial = request.args.get('partial', '').lower() in ('1', 'true', 'yes')
+
+        try:
+            success, result = db.import_menu_items(business_id, menu_io.validated_rows(stream, fmt), partial=partial)
+        except (UnicodeDecodeError, csv.Error) as e:
+            return jsonify({'error': f'Could not read file: {e}'}), 400
+
+        if not success:
+            return jsonify({'error': result}), 500
+        if not result['committed']:
+            return jsonify(dict(result, success=False)), 400
+        return jsonify(dict(result, success=True))
+
+    return jsonify({'error': 'Not logged in or not a business account'}), 401
+
+@app.route('/api/menu-items/export', methods=['GET'])
+def export_menu_items():
+    """Stream this business's menu as CSV (default) or JSON"""
+    if 'logged_in' in session and session.get('account_type') == 'business':
+        business_id = session['business_id']
+        fmt = request.args.get('format', 'csv').lower()
+
+        items = db.iter_menu_items_by_business(business_id)
+        if fmt == 'json':
+            body, mimetype = menu_io.export_json(items), 'application/json'
+        elif fmt == 'csv':
+            body, mimetype = menu_io.export_csv(items), 'text/csv'
+        else:
+            return jsonify({'error': 'Unsupported format, use csv or json'}), 400
+
+        return Response(body, mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename=menu-{business_id}.{fmt}'
+        })
+
+    return jsonify({'error': 'Not logged in or not a business account'}), 401
+
 @app.route('/api/all-menu-items', methods=['GET'])
 def get_all_menu_items():
     """Get all available menu items from all businesses for the explore page"""
     try:
-        # Get menu items from all approved businesses
-        items = db.get_all_menu_items()
-        return jsonify(items)
+        # Get menu items from all approved businesses, shuffled for this session
+        seed = get_explore_seed()
+        tag = explore_feed.etag(seed)
+        if etag_matches(tag):
+            return conditional_response(tag)
+        items = explore_feed.ordered_items(seed)
+        return conditional_response(tag, app.json.dumps(items))
     except Exception as e:
         print(f"Error fetching all menu items: {e}")
         return jsonify({'error': 'Failed to load menu items'}), 500
 
+@app.route('/api/explore', methods=['GET'])
+def explore():
+    """Get one page of the explore feed in this session's random order"""
+    try:
+        page = int(request.args.get('page', 1))
+        page_size = request.args.get('page_size', type=int)
+    except ValueError:
+        return jsonify({'error': 'Invalid page'}), 400
+    
+    try:
+        # Always the session's seed: every new seed costs a full re-sort of the snapshot
+        seed = get_explore_seed()
+        result = explore_feed.page(seed, page, page_size)
+        result['seed'] = seed
+        return jsonify(result)
+    except Exception as e:
+        print(f"Error fetching explore feed: {e}")
+        return jsonify({'error': 'Failed to load menu items'}), 500
+
+@app.route('/api/search', methods=['GET'])
+def search_menu_items():
+    """Search available menu items by name, description, category and restaurant"""
+    query = request.args.get('q', '')
+    category = request.args.get('category') or None
+    try:
+        min_price = request.args.get('min_price', type=float)
+        max_price = request.args.get('max_price', type=float)
+        business_id = request.args.get('business_id', type=int)
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        return jsonify({'error': 'Invalid search parameters'}), 400
+    
+    try:
+        result = search_index.search(
+            query,
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            business_id=business_id,
+            limit=limit,
+            offset=offset
+        )
+        return jsonify(result)
+    except Exception as e:
+        print(f"Error searching menu items: {e}")
+        return jsonify({'error': 'Search failed'}), 500
+
+@app.route('/api/suggest', methods=['GET'])
+def suggest():
+    """Typeahead suggestions for item and restaurant names starting with q"""
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', 8, type=int)
+    
+    try:
+        return jsonify({'suggestions': suggestion_index.suggest(query, limit)})
+    except Exception as e:
+        print(f"Error fetching suggestions: {e}")
+        return jsonify({'error': 'Failed to load suggestions'}), 500
+
 @app.route('/api/menu-item/<int:item_id>', methods=['GET'])
 def get_menu_item(item_id):
     """Get details of a specific menu item"""
     try:
-        item = db.get_menu_item_by_id(item_id)
-        if item:
-            # Get business name for this item if business_id exists
-            if 'business_id' in item and item['business_id']:
-                business = db.get_business_by_id(item['business_id'])
-                if business:
-                    item['business_name'] = business['business_name']
-                else:
-                    item['business_name'] = 'Unknown Business'
-            else:
-                # If business_id is not available, set a default business name
+        cached = menu_item_cache.get(item_id)
+        if cached is MISSING:
+            generation = menu_item_cache.generation(item_id)
+            # One joined query for the item and its business name
+            item = db.get_menu_item_details(item_id)
+            if not item:
+                return jsonify({'error': 'Item not found'}), 404
+            item.pop('business_status', None)
+            if not item.get('business_name'):
                 item['business_name'] = 'Unknown Business'
-            return jsonify(item)
-        else:
-            return jsonify({'error': 'Item not found'}), 404
+            payload = app.json.dumps(item)
+            cached = (payload, payload_etag(payload))
+            menu_item_cache.set(item_id, cached, generation)
+        payload, tag = cached
+        return conditional_response(tag, payload, cache_control='public, no-cache')
     except Exception as e:
         print(f"Error fetching menu item: {e}")
         return jsonify({'error': 'Failed to load item details'}), 500
 
 @app.route('/api/place-order', methods=['POST'])
 def place_order():
-    """Create a new order"""
+    """Create a new order for a single menu item"""
     try:
         # Get form data
         menu_item_id = request.form.get('menu_item_id')
@@ -552,59 +989,13 @@ def place_order():
         if not all([menu_item_id, customer_name, customer_phone, customer_email, delivery_address]):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        # Get menu item details
-        menu_item = db.get_menu_item_by_id(menu_item_id)
-        if not menu_item:
-            return jsonify({'error': 'Menu item not found'}), 404
-        
-        # Calculate total amount
-        total_amount = float(menu_item['price']) * quantity
-        
         # Get user ID from session (or use guest ID if not logged in)
         user_id = session.get('user_id', 1)  # Default to ID 1 for guests
         
-        # Get business_id from menu_item if it exists
-        business_id = None
-        if 'business_id' in menu_item:
-            business_id = menu_item['business_id']
-        
-        # If business_id is not in the menu_item, we need to query it from the database
-        if business_id is None:
-            try:
-                connection = db.get_db_connection()
-                cursor = connection.cursor(dictionary=True)
-                
-                # Query to get the business_id for this menu item
-                query = """
-                SELECT business_id 
-                FROM menu_items 
-                WHERE id = %s
-                """
-                cursor.execute(query, (menu_item_id,))
-                result = cursor.fetchone()
-                
-                if result and 'business_id' in result:
-                    business_id = result['business_id']
-                else:
-                    # If still no business_id, default to 1
-                    business_id = 1
-                    print("Warning: Could not find business_id for menu_item_id. Using default business_id=1.")
-                
-                cursor.close()
-                connection.close()
-            except Exception as e:
-                print(f"Error fetching business_id: {e}")
-                # Default to business ID 1 if we couldn't get the business_id
-                business_id = 1
-                print("Warning: Error looking up business_id. Using default business_id=1.")
-        
-        # Create the order
-        success, result = db.create_order(
-            user_id, 
-            business_id,
-            menu_item_id,
-            quantity,
-            total_amount,
+        # Price, discount and business are all resolved inside one transaction on one connection
+        success, result = db.create_cart_order(
+            user_id,
+            [{'menu_item_id': menu_item_id, 'quantity': quantity}],
             customer_name,
             customer_phone,
             customer_email,
@@ -619,13 +1010,61 @@ def place_order():
                 'order_id': result,
                 'message': 'Order placed successfully!'
             })
+        elif result.code == db.OrderError.NOT_FOUND:
+            return jsonify({'error': 'Menu item not found'}), 404
         else:
-            return jsonify({'error': result}), 500
+            return jsonify({'error': result}), 500 if result.code == db.OrderError.DATABASE else 400
             
     except Exception as e:
         print(f"Error placing order: {e}")
         return jsonify({'error': 'Failed to place order'}), 500
 
+@app.route('/api/cart-order', methods=['POST'])
+def place_cart_order():
+    """Create one order for several menu items.
+
+    Expects JSON: {"items": [{"menu_item_id": 1, "quantity": 2}, ...], "customer_name": ...,
+    "customer_phone": ..., "customer_email": ..., "delivery_address": ...,
+    "payment_method": ..., "special_instructions": ...}
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'Expected a JSON body'}), 400
+    
+    items = data.get('items')
+    customer_name = data.get('customer_name')
+    customer_phone = data.get('customer_phone')
+    customer_email = data.get('customer_email')
+    delivery_address = data.get('delivery_address')
+    
+    # Validate required fields
+    if not isinstance(items, list) or not all([customer_name, customer_phone, customer_email, delivery_address]):
+        return jsonify({'error': 'Missing required fields'}), 400
+    
+    # Get user ID from session (or use guest ID if not logged in)
+    user_id = session.get('user_id', 1)  # Default to ID 1 for guests
+    
+    success, result = db.create_cart_order(
+        user_id,
+        items,
+        customer_name,
+        customer_phone,
+        customer_email,
+        delivery_address,
+        data.get('payment_method', 'Cash on Delivery'),
+        data.get('special_instructions')
+    )
+    
+    if success:
+        return jsonify({
+            'success': True,
+            'order_id': result,
+            'message': 'Order placed successfully!'
+        })
+    else:
+        # Validation problems are the client's fault; database failures are ours
+        return jsonify({'error': result}), 500 if result.code == db.OrderError.DATABASE else 400
+
 @app.route('/api/user/orders', methods=['GET'])
 def get_user_orders():
     """Get all orders for the logged-in user"""
@@ -638,11 +1077,121 @@ def get_user_orders():
 
 @app.route('/api/business/orders', methods=['GET'])
 def get_business_orders():
-    """Get all orders for the logged-in business"""
+    """Get orders for the logged-in business.
+
+    Without query parameters the full order list is returned (legacy behaviour).
+    With any of limit, cursor, status, from, to or summary a keyset-paginated page is returned:
+    {"orders": [...], "next_cursor": "..." | null, "version": n, "summary": {...} (only when summary=1)}
+    "version" (first page only) is where the change feed starts:
+    since=<version> returns only orders created or changed after it, with cancelled orders as
+    tombstones: {"version": n, "orders": [...], "tombstones": [...], "has_more": bool}.
+    wait=<seconds> holds the request until there is a change or the time is up.
+    """
     if 'logged_in' in session and session.get('account_type') == 'business':
         business_id = session['business_id']
-        orders = db.get_orders_by_business(business_id)
-        return jsonify(orders)
+        
+        if 'since' in request.args:
+            return get_business_order_changes(business_id)
+        
+        # Every order write bumps the business's newest order version, so the version and
+        # the query string identify the response; checking it is one index lookup.
+        # The rows carry only order and order item columns; a joined field (e.g. a business
+        # or menu item name) would have to go into the tag as well
+        version = db.get_business_order_version(business_id)
+        tag = None
+        if version is not None:
+            query_hash = hashlib.sha1(request.query_string).hexdigest()[:12]
+            tag = f"orders-{business_id}-v{version}-{query_hash}"
+            if etag_matches(tag):
+                return conditional_response(tag)
+        
+        paging_params = ('limit', 'cursor', 'status', 'from', 'to', 'summary')
+        if not any(param in request.args for param in paging_params):
+            orders = db.get_orders_by_business(business_id)
+            return business_orders_response(tag, orders)
+        
+        status = request.args.get('status') or None
+        cursor = request.args.get('cursor') or None
+        try:
+            limit = int(request.args.get('limit', db.ORDERS_PAGE_DEFAULT_LIMIT))
+            date_from = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+            date_to = datetime.fromisoformat(request.args['to']) if request.args.get('to') else None
+            if cursor:
+                db.decode_order_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # The version was read before the page, so no change can fall between the two
+        page = db.get_orders_page_by_business(
+            business_id,
+            limit=limit,
+            cursor=cursor,
+            status=status,
+            date_from=date_from,
+            date_to=date_to
+        )
+        if not cursor:
+            page['version'] = version
+        if request.args.get('summary') in ('1', 'true'):
+            page['summary'] = db.get_business_order_summary(business_id, status, date_from, date_to)
+        return business_orders_response(tag, page)
+    
+    return jsonify({'error': 'Not logged in or not a business account'}), 401
+
+def business_orders_response(tag, data):
+    if tag is None:
+        return jsonify(data)
+    return conditional_response(tag, app.json.dumps(data))
+
+def get_business_order_changes(business_id):
+    """Change feed behind /api/business/orders?since=<version>[&wait=<seconds>]"""
+    try:
+        since = int(request.args['since'])
+        wait = min(max(float(request.args.get('wait', 0)), 0), order_feed_config['max_wait'])
+        limit = int(request.args.get('limit', db.ORDER_CHANGES_MAX_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'since, wait and limit must be numbers'}), 400
+    
+    changes = db.get_order_changes(business_id, since, limit)
+    deadline = time.monotonic() + wait
+    while changes is not None and changes['version'] == since:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        # Woken early by writes in this process; the periodic recheck catches other workers' writes
+        order_feed_waiter.wait(business_id, since, min(remaining, order_feed_config['recheck_interval']))
+        changes = db.get_order_changes(business_id, since, limit)
+    
+    if changes is None:
+        return jsonify({'error': 'Database error'}), 500
+    return jsonify(changes)
+
+@app.route('/api/business/order-summary', methods=['GET'])
+def business_order_summary():
+    """Order count and revenue of the logged-in business.
+
+    Kept out of the change feed: totals are a scan over the business's whole order history,
+    so the dashboard adds new orders to them itself and refreshes them here on a slow timer.
+    """
+    if 'logged_in' in session and session.get('account_type') == 'business':
+        return jsonify(db.get_business_order_summary(session['business_id']))
+    
+    return jsonify({'error': 'Not logged in or not a business account'}), 401
+
+@app.route('/api/business/order-events', methods=['GET'])
+def get_business_order_events():
+    """Journal events of the logged-in business's orders after a version (?after=<version>&limit=<n>)"""
+    if 'logged_in' in session and session.get('account_type') == 'business':
+        try:
+            after_version = int(request.args.get('after', 0))
+            limit = int(request.args.get('limit', 1000))
+        except ValueError:
+            return jsonify({'error': 'after and limit must be numbers'}), 400
+        
+        events = db.get_order_events(after_version, limit, business_id=session['business_id'])
+        if events is None:
+            return jsonify({'error': 'Database error'}), 500
+        return jsonify(events)
     
     return jsonify({'error': 'Not logged in or not a business account'}), 401
 
@@ -677,7 +1226,7 @@ def update_order_status():
 @app.route('/business-dashboard.html')
 def business_dashboard():
     if 'logged_in' in session and session.get('account_type') == 'business':
-        return render_template('business-dashboard.html')
+        return serve_template('business-dashboard.html')
     else:
         return redirect('/login.html?error=not_logged_in&type=business')
 
@@ -687,12 +1236,71 @@ def get_order(order_id):
     # Check if user is logged in or if viewing a shared order link
     # This could be enhanced with proper security checks
     
+    # A polling client that already has the current version costs one primary key lookup
+    if request.if_none_match:
+        current = db.get_order_version(order_id)
+        if current is not None and etag_matches(order_etag(order_id, *current)):
+            return conditional_response(order_etag(order_id, *current))
+    
     order = db.get_order_by_id(order_id)
     
     if not order:
         return jsonify({'error': 'Order not found'}), 404
     
-    return jsonify(order)
+    tag = order_etag(order_id, order['version'], order['business_name'])
+    return conditional_response(tag, app.json.dumps(order))
+
+@app.route('/api/order/<int:order_id>/events', methods=['GET'])
+def order_events(order_id):
+    """Server-Sent Events stream of an order's status: the current status, then every change"""
+    # Subscribe before reading the status so a change committed in between is still delivered
+    subscription = order_status_hub.subscribe(order_id)
+    if subscription is None:
+        # The tracking pages fall back to polling /api/order/<id>
+        response = jsonify({'error': 'Too many open trackers'})
+        response.headers['Retry-After'] = '60'
+        return response, 503
+
+    status = db.get_order_status(order_id)
+    if status is None:
+        subscription.close()
+        return jsonify({'error': 'Order not found'}), 404
+
+    def stream():
+        try:
+            current = status
+            data = app.json.dumps({'order_id': order_id, 'status': current})
+            yield format_event(order_status_hub.next_event_id(), 'status', data,
+                               retry=order_stream_config['retry_ms'])
+            if current in FINAL_STATUSES:
+                return
+            deadline = time.monotonic() + order_stream_config['max_stream_seconds']
+            while time.monotonic() < deadline:
+                event = subscription.get(order_stream_config['heartbeat_interval'])
+                if event is None:
+                    # The hub only sees this process's writes; an idle stream rechecks the
+                    # database so changes made by other workers still arrive
+                    latest = db.get_order_status(order_id)
+                    if latest is None or latest == current:
+                        yield ': keep-alive\n\n'
+                        continue
+                    event = {'id': order_status_hub.next_event_id(), 'status': latest}
+                elif event['status'] == current:
+                    continue
+                current = event['status']
+                data = app.json.dumps({'order_id': order_id, 'status': current})
+                yield format_event(event['id'], 'status', data)
+                if current in FINAL_STATUSES:
+                    return
+        finally:
+            subscription.close()
+
+    response = Response(stream(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # A client that disconnects before the first chunk never starts the generator, so its
+    # finally never runs; the server closes the response either way (closing twice is harmless)
+    response.call_on_close(subscription.close)
+    return response
 
 @app.route('/api/admin/verify-student/<int:user_id>', methods=['POST'])
 def verify_student(user_id):
@@ -724,6 +1332,40 @@ def verify_student(user_id):
     else:
         return jsonify({'error': 'Unauthorized access'}), 401
 
+@app.route('/api/admin/verify-students', methods=['POST'])
+def verify_students():
+    """Admin route to verify or reject many student IDs in one call.
+
+    Accepts JSON {"user_ids": [1, 2, 3], "verified": true} or form fields
+    user_ids (comma separated) and verified.
+    """
+    if 'logged_in' in session and session.get('account_type') == 'business' and session.get('business_id') == 1:
+        # Only the main admin business account (ID 1) can verify students
+        try:
+            if request.is_json:
+                data = request.get_json()
+                user_ids = data.get('user_ids', [])
+                verified = data.get('verified', True) in (True, 'true')
+            else:
+                user_ids = [user_id for user_id in request.form.get('user_ids', '').split(',') if user_id.strip()]
+                verified = request.form.get('verified', 'true').lower() == 'true'
+            user_ids = [int(user_id) for user_id in user_ids]
+        except (ValueError, TypeError, AttributeError):
+            return jsonify({'error': 'user_ids must be a list of user IDs'}), 400
+        
+        if not user_ids:
+            return jsonify({'error': 'No user IDs given'}), 400
+        
+        success, result = db.verify_students(user_ids, verified)
+        
+        if success:
+            return jsonify({'success': True, **result})
+        else:
+            print(f"Batch verification failed: {result}")
+            return jsonify({'error': result}), 500
+    else:
+        return jsonify({'error': 'Unauthorized access'}), 401
+
 @app.route('/api/admin/student-verification-requests', methods=['GET'])
 def get_student_verification_requests():
     """Get all pending student verification requests"""
@@ -756,19 +1398,9 @@ def submit_student_id():
                 student_id_card = f"uploads/student_ids/{filename}"
                 
                 # Update user record to indicate they're a student with pending verification
-                connection = db.get_db_connection()
-                cursor = connection.cursor()
-                
-                query = """
-                UPDATE users 
-                SET is_student = TRUE, student_id_card = %s, is_verified = FALSE
-                WHERE id = %s
-                """
-                cursor.execute(query, (student_id_card, user_id))
-                connection.commit()
-                
-                cursor.close()
-                connection.close()
+                success, result = db.submit_student_id_card(user_id, student_id_card)
+                if not success:
+                    return redirect('/user-panel.html?error=submission_failed')
                 
                 return redirect('/user-panel.html?message=student_id_submitted')
             
@@ -781,7 +1413,7 @@ def student_verification_page():
     """Alias for admin-students.html for better naming in dashboard"""
     # Check if the user is logged in as a business admin
     if 'logged_in' in session and session.get('account_type') == 'business' and session.get('business_id') == 1:
-        return send_from_directory('templates', 'admin-students.html')
+        return serve_template('admin-students.html')
     else:
         return redirect('/admin-login.html?error=not_logged_in')
 
@@ -790,29 +1422,29 @@ def admin_students_page():
     """Serve the admin page for student verification"""
     # Check if the user is logged in as a business admin
     if 'logged_in' in session and session.get('account_type') == 'business' and session.get('business_id') == 1:
-        return send_from_directory('templates', 'admin-students.html')
+        return serve_template('admin-students.html')
     else:
         return redirect('/admin-login.html?error=not_logged_in')
 
 @app.route('/order-details.html')
 def order_details_page():
     """Serve the order details page"""
-    return send_from_directory('templates', 'order-details.html')
+    return serve_template('order-details.html')
 
 @app.route('/track-order-details.html')
 def track_order_details_page():
     """Serve the detailed order tracking page with OpenStreetMap integration"""
-    return render_template('track-order-details.html')
+    return serve_template('track-order-details.html')
 
 @app.route('/test-student-upload')
 def test_student_upload():
     """A simple route for testing the student ID upload form"""
-    return send_from_directory('.', 'test-student-upload.html')
+    return send_static('.', 'test-student-upload.html')
 
 @app.route('/admin-login.html')
 def admin_login_page():
     """Serve the admin login page"""
-    return send_from_directory('.', 'admin-login.html')
+    return send_static('.', 'admin-login.html')
 
 @app.route('/api/restart-app', methods=['POST'])
 def restart_app():
@@ -823,7 +1455,7 @@ def restart_app():
 @app.route('/templates/track-order-details.html')
 def templates_track_order_details_page():
     """Handle legacy URLs that might still include /templates/ prefix"""
-    return render_template('track-order-details.html')
+    return serve_template('track-order-details.html')
 
 # Run the app
 if __name__ == '__main__':
@@ -0,0 +1,121 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by get() on a miss, so a cached None (e.g. "user has no subscription") is still a hit
+MISSING = object()
+
+
+def approximate_size(value):
+    """Rough memory footprint of a cached value in bytes (dict rows are sized field by field)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(key) + sys.getsizeof(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approximate_size(item) for item in value)
+    return size
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after `ttl` seconds.
+
+    Bounded both by entry count and, when `max_bytes` is set, by the approximate size
+    of the cached values; the least recently used entries are evicted first.
+    """
+
+    def __init__(self, ttl=30, max_entries=10000, max_bytes=None, name='cache'):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.name = name
+        self._entries = OrderedDict()  # key -> (expires_at, size, value), least recently used first
+        self._bytes = 0
+        # Bumped by invalidate() so a load that began before a write can't cache what it read.
+        # Only invalidated keys are tracked; when that map gets too big it is dropped and the
+        # epoch moves on, which just turns away the loads in flight at that moment.
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0
+        }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return MISSING
+            expires_at, _, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def generation(self, key):
+        """Token to pass to set() for a value about to be loaded from the database"""
+        with self._lock:
+            return self._epoch, self._generations.get(key, 0)
+
+    def set(self, key, value, generation=None):
+        """Cache value; with a generation from generation(), only if key wasn't invalidated since"""
+        size = approximate_size(value) if self.max_bytes else 0
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(key, 0)):
+                # A write landed while the value was being loaded; it may be stale
+                return
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes and size > self.max_bytes:
+                # Never worth evicting the whole cache for one oversized value
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if len(self._generations) >= self.max_entries:
+                self._generations.clear()
+                self._epoch += 1
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if key in self._entries:
+                self._remove(key)
+                self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generations.clear()
+            self._epoch += 1
+
+    def stats(self):
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats['hits'] + stats['misses']
+            stats.update({
+                'name': self.name,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hit_ratio': round(stats['hits'] / lookups, 4) if lookups else None
+            })
+            return stats
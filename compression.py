@@ -0,0 +1,181 @@
+import argparse
+import gzip
+import os
+import re
+import zlib
+
+from config import compression_config
+
+try:
+    import brotli
+except ImportError:
+    # Brotli is optional (pip install brotli); without it responses and variants are gzip only
+    brotli = None
+
+# Response compression and build-time precompressed variants.
+#
+#     python compression.py build      write .gz/.br next to templates and static assets
+#     python compression.py clean      remove them again
+#
+# app.py compresses dynamic responses per request and sends a file's variant instead of
+# the file itself when the client accepts it. A variant older than its source is ignored,
+# so an edited file is never served stale; rerun build as part of each deploy.
+
+COMPRESSIBLE_TYPES = ('text/html', 'text/css', 'text/plain', 'text/csv', 'text/event-stream',
+                      'application/javascript', 'text/javascript', 'application/json', 'image/svg+xml')
+PRECOMPRESS_EXTENSIONS = ('.html', '.css', '.js', '.json', '.svg', '.txt')
+VARIANT_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+# Templates with Jinja markup must be rendered, so they get no variants
+TEMPLATE_MARKUP = re.compile(rb'\{\{|\{%|\{#')
+
+
+def available_encodings():
+    """Content codings this process can produce, preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encodings, offered=None):
+    """Best of the offered codings the client accepts (werkzeug Accept), or None for identity"""
+    offered = available_encodings() if offered is None else offered
+    return accept_encodings.best_match(offered)
+
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    # mtime=0 keeps the output byte-identical across builds
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class StreamCompressor:
+    """Incremental encoder that flushes after every chunk, so each event reaches the client at once"""
+
+    def __init__(self, encoding, level):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._encoder = brotli.Compressor(quality=level)
+        else:
+            self._encoder = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk):
+        if self.encoding == 'br':
+            return self._encoder.process(chunk) + self._encoder.flush()
+        return self._encoder.compress(chunk) + self._encoder.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._encoder.finish()
+        return self._encoder.flush()
+
+
+def compress_stream(chunks, encoding, level):
+    """Compress a streamed response body chunk by chunk; closing it closes the original stream"""
+    compressor = StreamCompressor(encoding, level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def find_variant(path, accept_encodings):
+    """(variant path, encoding) of the best up-to-date variant of path the client accepts, or (None, None)"""
+    try:
+        source_mtime = os.stat(path).st_mtime
+    except OSError:
+        return None, None
+    fresh = []
+    for encoding, suffix in VARIANT_SUFFIXES.items():
+        try:
+            if os.stat(path + suffix).st_mtime >= source_mtime:
+                fresh.append(encoding)
+        except OSError:
+            continue
+    encoding = accept_encodings.best_match(fresh) if fresh else None
+    if encoding is None:
+        return None, None
+    return path + VARIANT_SUFFIXES[encoding], encoding
+
+
+def precompress_file(path, gzip_level, brotli_quality, force=False):
+    """Write the .gz (and .br) variants of one file; returns how many were written"""
+    with open(path, 'rb') as source:
+        data = source.read()
+    source_mtime = os.stat(path).st_mtime
+    levels = {'gzip': gzip_level, 'br': brotli_quality}
+    written = 0
+    for encoding in available_encodings():
+        variant = path + VARIANT_SUFFIXES[encoding]
+        if not force and os.path.exists(variant) and os.stat(variant).st_mtime >= source_mtime:
+            continue
+        compressed = compress(data, encoding, levels[encoding])
+        if len(compressed) >= len(data):
+            # Not worth it: make sure an old variant isn't served instead
+            if os.path.exists(variant):
+                os.remove(variant)
+            continue
+        with open(variant + '.tmp', 'wb') as out:
+            out.write(compressed)
+        os.replace(variant + '.tmp', variant)
+        written += 1
+    return written
+
+
+def precompress_files(root, template_dir='templates', force=False):
+    """Build variants for every compressible file under the configured directories"""
+    files = written = 0
+    for directory in compression_config['precompress_dirs']:
+        for dirpath, _, filenames in os.walk(os.path.join(root, directory)):
+            for filename in filenames:
+                if not filename.endswith(PRECOMPRESS_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, filename)
+                if directory == template_dir:
+                    with open(path, 'rb') as source:
+                        if TEMPLATE_MARKUP.search(source.read()):
+                            continue
+                files += 1
+                written += precompress_file(path, compression_config['static_gzip_level'],
+                                            compression_config['static_brotli_quality'], force)
+    return files, written
+
+
+def remove_variants(root):
+    removed = 0
+    for directory in compression_config['precompress_dirs']:
+        for dirpath, _, filenames in os.walk(os.path.join(root, directory)):
+            for filename in filenames:
+                if filename.endswith(tuple(VARIANT_SUFFIXES.values())) and \
+                        filename[:filename.rindex('.')].endswith(PRECOMPRESS_EXTENSIONS):
+                    os.remove(os.path.join(dirpath, filename))
+                    removed += 1
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or remove precompressed template and static variants")
+    parser.add_argument('command', choices=('build', 'clean'))
+    parser.add_argument('--force', action='store_true', help="rebuild variants that are already up to date")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    if args.command == 'build':
+        files, written = precompress_files(root, force=args.force)
+        encodings = '/'.join(available_encodings())
+        print(f"Precompressed {files} files ({encodings}): {written} variants written")
+        if brotli is None:
+            print("brotli is not installed; only gzip variants were built (pip install brotli)")
+    else:
+        print(f"Removed {remove_variants(root)} variants")
+
+
+if __name__ == '__main__':
+    main()
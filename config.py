@@ -1,6 +1,17 @@
 # Database configuration settings
+import os
 import secrets
 
+# Storage backend: 'mysql', or 'sqlite' for an embedded single-file database that needs no
+# server (load tests, benchmarks). SWIFT_SERVE_DB_BACKEND overrides it without editing this file.
+db_backend = os.environ.get('SWIFT_SERVE_DB_BACKEND', 'mysql')
+
+sqlite_config = {
+    # Kept in instance/, which app.py never serves as a file
+    'path': os.environ.get('SWIFT_SERVE_SQLITE_PATH', os.path.join('instance', 'swift_serves.sqlite3')),
+    'busy_timeout': 30  # seconds a writer waits for the database lock
+}
+
 # MySQL Configuration
 db_config = {
     'host': 'localhost',
@@ -9,5 +20,105 @@ db_config = {
     'database': 'swift_serves'
 }
 
+# Schema migrations are applied once per deploy with python migrate.py
+migration_config = {
+    'run_on_start': False  # let run.py apply pending migrations on every start (local development only)
+}
+
+# Connection pool settings used by db.py
+db_pool_config = {
+    'pool_size': 5,        # connections kept open between requests
+    'max_overflow': 10,    # extra connections allowed under burst load
+    'timeout': 30,         # seconds to wait for a free connection
+    'idle_timeout': 300,   # close connections idle longer than this (seconds)
+    'max_lifetime': 3600,  # recycle connections older than this (seconds)
+    'pre_ping': True       # health-check connections when they are checked out
+}
+
+# Query instrumentation in db.py
+query_log_config = {
+    'slow_query_threshold': 0.2,          # seconds; slower statements go to the slow-query log
+    'slow_query_log': 'slow_queries.log'  # file for slow statements (None disables the log)
+}
+
+# /metrics (Prometheus text format)
+metrics_config = {
+    # Shared directory for multi-process servers (gunicorn/uwsgi workers); None for a single process
+    'multiprocess_dir': os.environ.get('SWIFT_SERVE_METRICS_DIR'),
+    'flush_interval': 5,  # seconds between a worker's snapshots to multiprocess_dir
+    'latency_buckets': [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+}
+
+# Read replicas - each entry overrides db_config keys, e.g. {'host': 'replica-1.internal'}.
+# Read-only db.py functions are routed to them; leave empty to use the primary for everything.
+# A second local MySQL can stand in for a replica: [{'port': 3307}] with 'max_lag': None.
+db_replicas = []
+
+db_replica_routing = {
+    'read_your_writes_window': 5,  # seconds a session keeps reading from the primary after it writes
+    'max_lag': 5,                  # skip replicas further behind than this (None disables lag checks)
+    'lag_check_interval': 5,       # seconds between replication lag checks per replica
+    'retry_after': 30              # seconds to skip a replica after it fails
+}
+
+# Explore page feed (in-memory snapshot of available menu items)
+explore_feed_config = {
+    'refresh_interval': 60,  # seconds between snapshot reloads from MySQL
+    'page_size': 24,         # default items per /api/explore page
+    'max_page_size': 100
+}
+
+# Typeahead suggestions for the explore search box
+suggest_config = {
+    'refresh_interval': 300,  # seconds between background rebuilds (popularity changes slowly)
+    'rebuild_delay': 2        # seconds menu edits are collected before they trigger one rebuild
+}
+
+# Live order tracking over Server-Sent Events (/api/order/<id>/events)
+order_stream_config = {
+    'max_subscribers': 10000,    # open trackers per process; beyond this clients fall back to polling
+    'heartbeat_interval': 15,    # seconds between status rechecks (and keep-alive comments) on an idle stream
+    'max_stream_seconds': 1800,  # streams are closed after this long; the browser reconnects
+    'retry_ms': 3000             # reconnect delay suggested to the browser
+}
+
+# Business dashboard order change feed (/api/business/orders?since=<version>&wait=<seconds>)
+order_feed_config = {
+    'max_wait': 25,          # longest a long-poll request is held open, in seconds
+    'recheck_interval': 2    # seconds between database checks while waiting (sees other workers' writes)
+}
+
+# Order event journal retention (python order_journal.py compact, e.g. from a daily cron job)
+order_journal_config = {
+    'retention_days': 90,      # events older than this are deleted
+    'compact_after_days': 7,   # older events superseded by a newer event of the same order are deleted
+    'batch_size': 5000         # rows per delete transaction
+}
+
+# Response compression: gzip, plus brotli when the brotli package is installed
+compression_config = {
+    'enabled': True,
+    'min_size': 1024,             # bytes; smaller responses aren't worth compressing
+    'gzip_level': 6,              # 1 (fastest) - 9 (smallest), for responses compressed per request
+    'brotli_quality': 4,          # 0 - 11, for responses compressed per request
+    'compress_streams': True,     # compress streamed responses too, flushing after every chunk
+    'static_gzip_level': 9,       # variants written by python compression.py build
+    'static_brotli_quality': 11,
+    'precompress_dirs': ['templates', 'static']
+}
+
+# Student discount on orders of verified students, in percent (also used by datagen.py)
+student_discount_percentage = 50.00
+
+# In-process caches
+cache_config = {
+    'subscription_ttl': 30,  # seconds a user's active subscription is served from memory
+    'entity_ttl': 60,  # seconds a user or business row is served from memory
+    'entity_max_entries': 10000,  # per entity type
+    'entity_max_bytes': 16 * 1024 * 1024,  # approximate memory bound per entity type
+    'menu_item_ttl': 300,  # seconds a serialized /api/menu-item/<id> payload is reused
+    'menu_item_max_bytes': 8 * 1024 * 1024
+}
+
 # Flask Configuration
 secret_key = secrets.token_hex(16) 
\ No newline at end of file
@@ -42,10 +42,37 @@ CREATE TABLE IF NOT EXISTS orders (
     special_instructions TEXT,
     discount_applied BOOLEAN DEFAULT FALSE,
     discount_percentage DECIMAL(5, 2) DEFAULT 0.00,
+    version BIGINT NOT NULL DEFAULT 0,
+    INDEX idx_orders_business_date (business_id, order_date, id),
+    INDEX idx_orders_business_status_date (business_id, status, order_date, id),
+    INDEX idx_orders_business_version (business_id, version),
     FOREIGN KEY (user_id) REFERENCES users(id),
     FOREIGN KEY (business_id) REFERENCES businesses(id)
 );
 
+-- Source of orders.version: every order insert and status change takes the next value
+CREATE TABLE IF NOT EXISTS order_sequence (
+    id TINYINT PRIMARY KEY,
+    value BIGINT NOT NULL
+);
+
+INSERT IGNORE INTO order_sequence (id, value) VALUES (1, 0);
+
+-- Append-only order event journal, keyed by the order version of each write
+CREATE TABLE IF NOT EXISTS order_events (
+    version BIGINT NOT NULL,
+    order_id INT NOT NULL,
+    business_id INT NOT NULL,
+    user_id INT NOT NULL,
+    event_type VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    total_amount DECIMAL(10, 2),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (version, order_id),
+    INDEX idx_order_events_order (order_id, version),
+    INDEX idx_order_events_business (business_id, version)
+);
+
 -- Order items table
 CREATE TABLE IF NOT EXISTS order_items (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -0,0 +1,151 @@
+-- SQLite schema for Swift Serve (db_backend = 'sqlite', see db_backends.py)
+-- Mirrors database_setup.sql with every migration in migrations/ applied.
+-- Column types keep their MySQL names so sqlite3 converts DECIMAL and TIMESTAMP
+-- values back to Decimal and datetime. updated_at is not maintained automatically.
+
+-- Users table
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(100) NOT NULL,
+    email VARCHAR(100) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL,
+    phone VARCHAR(20),
+    is_student BOOLEAN DEFAULT FALSE,
+    student_id_card VARCHAR(255) DEFAULT NULL,
+    is_verified BOOLEAN DEFAULT FALSE,
+    discount_eligible BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Businesses table for business accounts
+CREATE TABLE IF NOT EXISTS businesses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    business_name VARCHAR(100) NOT NULL,
+    owner_name VARCHAR(100) NOT NULL,
+    email VARCHAR(100) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL,
+    phone VARCHAR(20),
+    address TEXT NOT NULL,
+    business_type VARCHAR(100) NOT NULL,
+    status VARCHAR(20) DEFAULT 'approved',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Menu items table for business menu items
+CREATE TABLE IF NOT EXISTS menu_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    business_id INT NOT NULL REFERENCES businesses(id) ON DELETE CASCADE,
+    item_name VARCHAR(100) NOT NULL,
+    description TEXT,
+    price DECIMAL(10, 2) NOT NULL,
+    image_url VARCHAR(255),
+    is_available BOOLEAN DEFAULT TRUE,
+    category VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_menu_items_business ON menu_items (business_id);
+CREATE INDEX IF NOT EXISTS idx_menu_items_available_business ON menu_items (is_available, business_id);
+
+-- Orders table
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES users(id),
+    business_id INT NOT NULL REFERENCES businesses(id),
+    order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    status VARCHAR(20) DEFAULT 'pending',
+    total_amount DECIMAL(10, 2),
+    delivery_address TEXT,
+    customer_name VARCHAR(100) NOT NULL,
+    customer_phone VARCHAR(20) NOT NULL,
+    customer_email VARCHAR(100) NOT NULL,
+    payment_method VARCHAR(50) DEFAULT 'Cash on Delivery',
+    special_instructions TEXT,
+    discount_applied BOOLEAN DEFAULT FALSE,
+    discount_percentage DECIMAL(5, 2) DEFAULT 0.00,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_orders_business_date ON orders (business_id, order_date, id);
+CREATE INDEX IF NOT EXISTS idx_orders_business_status_date ON orders (business_id, status, order_date, id);
+CREATE INDEX IF NOT EXISTS idx_orders_user_date ON orders (user_id, order_date);
+CREATE INDEX IF NOT EXISTS idx_orders_business_version ON orders (business_id, version);
+
+-- Source of orders.version: every order insert and status change takes the next value
+CREATE TABLE IF NOT EXISTS order_sequence (
+    id TINYINT PRIMARY KEY,
+    value BIGINT NOT NULL
+);
+
+INSERT OR IGNORE INTO order_sequence (id, value) VALUES (1, 0);
+
+-- Append-only order event journal, keyed by the order version of each write
+CREATE TABLE IF NOT EXISTS order_events (
+    version BIGINT NOT NULL,
+    order_id INT NOT NULL,
+    business_id INT NOT NULL,
+    user_id INT NOT NULL,
+    event_type VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    total_amount DECIMAL(10, 2),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (version, order_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_order_events_order ON order_events (order_id, version);
+CREATE INDEX IF NOT EXISTS idx_order_events_business ON order_events (business_id, version);
+
+-- Order items table
+CREATE TABLE IF NOT EXISTS order_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id INT NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+    menu_item_id INT NOT NULL REFERENCES menu_items(id),
+    item_name VARCHAR(100) NOT NULL,
+    quantity INT NOT NULL DEFAULT 1,
+    price DECIMAL(10, 2) NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id);
+
+-- Addresses table
+CREATE TABLE IF NOT EXISTS addresses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES users(id),
+    address_line VARCHAR(255) NOT NULL,
+    city VARCHAR(100) NOT NULL,
+    state VARCHAR(100),
+    postal_code VARCHAR(20),
+    is_default BOOLEAN DEFAULT FALSE
+);
+
+-- Contact form submissions
+CREATE TABLE IF NOT EXISTS contact_submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(100) NOT NULL,
+    email VARCHAR(100) NOT NULL,
+    phone VARCHAR(20),
+    subject VARCHAR(200),
+    message TEXT NOT NULL,
+    submission_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Subscriptions; at most one active subscription per user (db.create_subscription upserts on it)
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    plan_name VARCHAR(100) NOT NULL,
+    plan_price DECIMAL(10, 2) NOT NULL,
+    start_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    end_date TIMESTAMP NULL,
+    status VARCHAR(20) DEFAULT 'active'
+);
+
+CREATE INDEX IF NOT EXISTS idx_subscriptions_user_status ON subscriptions (user_id, status);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_subscriptions_active_user ON subscriptions (user_id) WHERE status = 'active';
+
+-- Test user for development - password is '123456'
+INSERT INTO users (name, email, password, phone)
+VALUES ('Test User', 'test@example.com', '8d969eef6ecad3c29a3a629280e686cf0c3f5d5a86aff3ca12020c923adc6c92', '+91 9876543210');
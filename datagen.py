@@ -0,0 +1,496 @@
+import argparse
+import hashlib
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from config import db_backend, db_config, sqlite_config, student_discount_percentage
+from db_backends import create_backend
+
+# High-volume synthetic data for scale testing.
+#
+# Generates users, businesses, menu items, orders, order items and subscriptions with a
+# realistic skew: a few hot restaurants and regulars take most of the orders (Zipf-like
+# popularity), and orders cluster around lunch and dinner. Rows get explicit ids after the
+# current MAX(id) of each table, so the generator never has to read back what it inserted
+# and can be run repeatedly against the same database.
+#
+#     python datagen.py --orders 10000000 --users 500000 --businesses 5000
+#     python datagen.py --backend sqlite --sqlite-path scale.sqlite3 --orders 200000
+#
+# On MySQL rows are streamed to temporary tab-separated files and bulk loaded with
+# LOAD DATA LOCAL INFILE (the server needs local_infile=ON); --method executemany uses
+# batched multi-row INSERTs instead. SQLite always uses executemany. Every generated
+# account has the password in DATAGEN_PASSWORD.
+
+DATAGEN_PASSWORD = 'password123'
+EMAIL_DOMAIN = 'datagen.example.com'
+
+# Relative order volume per hour of the day: a lunch bump and a dinner peak
+HOUR_WEIGHTS = [1, 1, 0, 0, 0, 0, 1, 2, 4, 5, 5, 7, 14, 15, 10, 5, 4, 6, 11, 18, 20, 16, 8, 3]
+WEEKEND_BOOST = 1.3
+
+ACTIVE_STATUSES = ['pending', 'accepted', 'preparing', 'out_for_delivery']
+CANCELLED_FRACTION = 0.06
+# Minutes from placement to the journaled status change, by status
+STATUS_CHANGE_MINUTES = {'accepted': 3, 'preparing': 8, 'out_for_delivery': 25, 'delivered': 45, 'cancelled': 10}
+# Same student discount the app applies at checkout
+STUDENT_DISCOUNT_PERCENTAGE = Decimal(str(student_discount_percentage)).quantize(Decimal('0.01'))
+
+BUSINESS_TYPES = ['Restaurant', 'Cafe', 'Bakery', 'Cloud Kitchen', 'Food Truck', 'Canteen']
+CATEGORIES = ['Starters', 'Mains', 'Biryani', 'Pizza', 'Burgers', 'Desserts', 'Drinks', 'Sides']
+DISH_ADJECTIVES = ['Spicy', 'Classic', 'Smoky', 'Crispy', 'Butter', 'Tandoori', 'Masala', 'Garlic', 'Cheesy', 'Paneer']
+DISH_NOUNS = ['Chicken', 'Noodles', 'Wrap', 'Pizza', 'Burger', 'Biryani', 'Dosa', 'Momos', 'Fries', 'Shake', 'Thali', 'Rolls']
+NAME_PARTS = ['Spice', 'Garden', 'Royal', 'Urban', 'Tandoor', 'Curry', 'Golden', 'Street', 'Green', 'Coastal']
+FIRST_NAMES = ['Aarav', 'Diya', 'Ishaan', 'Kavya', 'Rohan', 'Ananya', 'Vikram', 'Meera', 'Arjun', 'Sara', 'Kabir', 'Nisha']
+LAST_NAMES = ['Sharma', 'Patel', 'Iyer', 'Khan', 'Reddy', 'Das', 'Gupta', 'Nair', 'Singh', 'Mehta']
+PLANS = [('Basic', Decimal('99.00')), ('Student Saver', Decimal('49.00')), ('Premium', Decimal('199.00'))]
+
+TABLE_COLUMNS = {
+    'users': ['id', 'name', 'email', 'password', 'phone', 'is_student', 'is_verified', 'discount_eligible', 'created_at'],
+    'businesses': ['id', 'business_name', 'owner_name', 'email', 'password', 'phone', 'address', 'business_type',
+                   'status', 'created_at'],
+    'menu_items': ['id', 'business_id', 'item_name', 'description', 'price', 'image_url', 'is_available', 'category',
+                   'created_at'],
+    'orders': ['id', 'user_id', 'business_id', 'order_date', 'status', 'total_amount', 'delivery_address',
+               'customer_name', 'customer_phone', 'customer_email', 'payment_method', 'discount_applied',
+               'discount_percentage', 'version'],
+    'order_items': ['order_id', 'menu_item_id', 'item_name', 'quantity', 'price'],
+    'order_events': ['version', 'order_id', 'business_id', 'user_id', 'event_type', 'status', 'total_amount',
+                     'created_at'],
+    'subscriptions': ['user_id', 'plan_name', 'plan_price', 'start_date', 'end_date', 'status']
+}
+
+
+def user_email(user_id):
+    return f"user{user_id}@{EMAIL_DOMAIN}"
+
+
+def business_email(business_id):
+    return f"business{business_id}@{EMAIL_DOMAIN}"
+
+
+def zipf_cum_weights(count, exponent):
+    """Cumulative weights for rng.choices: rank r is picked with probability ~ 1 / r**exponent"""
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+# Loaders
+
+class ExecutemanyLoader:
+    """Batched multi-row INSERTs, one commit per batch unless the caller commits"""
+
+    name = 'executemany'
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def load(self, table, rows, commit=True):
+        if not rows:
+            return
+        columns = TABLE_COLUMNS[table]
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        cursor = self.connection.cursor()
+        try:
+            cursor.executemany(query, rows)
+            if commit:
+                self.connection.commit()
+        finally:
+            cursor.close()
+
+
+class LoadDataLoader:
+    """MySQL LOAD DATA LOCAL INFILE from temporary tab-separated files"""
+
+    name = 'load-data'
+
+    def __init__(self, connection, temp_dir=None):
+        self.connection = connection
+        self.temp_dir = temp_dir
+
+    @staticmethod
+    def _field(value):
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return '1' if value else '0'
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+    def load(self, table, rows, commit=True):
+        if not rows:
+            return
+        handle, path = tempfile.mkstemp(prefix=f'datagen-{table}-', suffix='.tsv', dir=self.temp_dir)
+        try:
+            with os.fdopen(handle, 'w', encoding='utf-8') as data_file:
+                for row in rows:
+                    data_file.write('\t'.join(self._field(value) for value in row))
+                    data_file.write('\n')
+            cursor = self.connection.cursor()
+            try:
+                cursor.execute(f"""
+                LOAD DATA LOCAL INFILE %s INTO TABLE {table}
+                CHARACTER SET utf8mb4
+                FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n'
+                ({', '.join(TABLE_COLUMNS[table])})
+                """, (path,))
+                if commit:
+                    self.connection.commit()
+            finally:
+                cursor.close()
+        finally:
+            os.remove(path)
+
+
+# Generator
+
+class DataGenerator:
+    """Streams skewed synthetic rows into a loader in batches"""
+
+    def __init__(self, backend, connection, loader, seed=42, days=90, batch_size=20000, verbose=True):
+        self.backend = backend
+        self.connection = connection
+        self.loader = loader
+        self.rng = random.Random(seed)
+        self.days = days
+        self.batch_size = batch_size
+        self.verbose = verbose
+        self.now = datetime.now().replace(microsecond=0)
+        self.password_hash = hashlib.sha256(DATAGEN_PASSWORD.encode()).hexdigest()
+
+    def _log(self, message):
+        if self.verbose:
+            print(message, file=sys.stderr)
+
+    def _next_id(self, table):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+            return cursor.fetchone()[0] + 1
+        finally:
+            cursor.close()
+
+    def _load_batches(self, table, rows):
+        """Load an iterable of rows batch by batch; returns the row count"""
+        started = time.perf_counter()
+        total = 0
+        iterator = iter(rows)
+        while True:
+            batch = list(itertools.islice(iterator, self.batch_size))
+            if not batch:
+                break
+            self.loader.load(table, batch)
+            total += len(batch)
+        self._report(table, total, started)
+        return total
+
+    def _report(self, table, total, started):
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0
+        self._log(f"  {table}: {total} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+
+    def _random_past(self, max_days):
+        return self.now - timedelta(seconds=self.rng.randint(0, max_days * 86400))
+
+    def _phone(self):
+        return f"+91 {self.rng.randint(6000000000, 9999999999)}"
+
+    def _person(self):
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    # Entities
+
+    def users(self, count):
+        first_id = self._next_id('users')
+        rng = self.rng
+
+        def rows():
+            for user_id in range(first_id, first_id + count):
+                is_student = rng.random() < 0.12
+                is_verified = is_student and rng.random() < 0.6
+                yield (user_id, self._person(), user_email(user_id), self.password_hash, self._phone(),
+                       is_student, is_verified, is_verified, self._random_past(self.days * 2))
+
+        self._load_batches('users', rows())
+        return first_id, count
+
+    def businesses(self, count):
+        first_id = self._next_id('businesses')
+        rng = self.rng
+
+        def rows():
+            for business_id in range(first_id, first_id + count):
+                name = f"{rng.choice(NAME_PARTS)} {rng.choice(NAME_PARTS)} {rng.choice(BUSINESS_TYPES)} {business_id}"
+                yield (business_id, name, self._person(), business_email(business_id), self.password_hash,
+                       self._phone(), f"{rng.randint(1, 400)} Market Road, Sector {rng.randint(1, 60)}",
+                       rng.choice(BUSINESS_TYPES), 'approved', self._random_past(self.days * 3))
+
+        self._load_batches('businesses', rows())
+        return first_id, count
+
+    def menu_items(self, first_business_id, business_count, items_per_business):
+        """Menus of varying length; returns {business_id: [(item_id, name, price, available), ...]}"""
+        first_id = self._next_id('menu_items')
+        rng = self.rng
+        menus = {}
+
+        def rows():
+            item_id = first_id
+            for business_id in range(first_business_id, first_business_id + business_count):
+                size = max(1, int(rng.uniform(0.5, 1.5) * items_per_business))
+                menu = []
+                for _ in range(size):
+                    name = f"{rng.choice(DISH_ADJECTIVES)} {rng.choice(DISH_NOUNS)}"
+                    price = Decimal(rng.randint(49, 599)) + Decimal(rng.choice([0, 50])) / 100
+                    available = rng.random() < 0.95
+                    menu.append((item_id, name, price, available))
+                    yield (item_id, business_id, name, f"House {name.lower()}", price, None, available,
+                           rng.choice(CATEGORIES), self._random_past(self.days * 3))
+                    item_id += 1
+                menus[business_id] = menu
+
+        self._load_batches('menu_items', rows())
+        return first_id, sum(len(menu) for menu in menus.values()), menus
+
+    def _order_times(self, size, day_cum, hour_cum):
+        """Sorted order timestamps drawn from the day and hour-of-day profiles"""
+        days = self.rng.choices(range(self.days), cum_weights=day_cum, k=size)
+        hours = self.rng.choices(range(24), cum_weights=hour_cum, k=size)
+        midnight = self.now.replace(hour=0, minute=0, second=0)
+        times = []
+        for day, hour in zip(days, hours):
+            moment = midnight - timedelta(days=self.days - 1 - day, hours=-hour, seconds=-self.rng.randint(0, 3599))
+            times.append(min(moment, self.now))
+        return sorted(times)
+
+    def orders(self, count, first_user_id, user_count, menus, student_users=None):
+        """Orders plus their items, skewed towards hot restaurants, regulars and meal times"""
+        first_id = self._next_id('orders')
+        rng = self.rng
+        business_ids = list(menus)
+        # Shuffle ranks so the hot restaurants aren't simply the lowest ids
+        rng.shuffle(business_ids)
+        business_cum = zipf_cum_weights(len(business_ids), 1.1)
+        user_cum = zipf_cum_weights(user_count, 0.8)
+        user_offsets = list(range(user_count))
+        rng.shuffle(user_offsets)
+        hour_cum = list(itertools.accumulate(HOUR_WEIGHTS))
+        day_cum = list(itertools.accumulate(
+            WEEKEND_BOOST if (self.now - timedelta(days=self.days - 1 - day)).weekday() >= 5 else 1.0
+            for day in range(self.days)
+        ))
+        recent = self.now - timedelta(hours=2)
+
+        started = time.perf_counter()
+        order_total = item_total = event_total = 0
+        order_id = first_id
+        remaining = count
+        while remaining > 0:
+            size = min(self.batch_size, remaining)
+            businesses = rng.choices(business_ids, cum_weights=business_cum, k=size)
+            users = rng.choices(user_offsets, cum_weights=user_cum, k=size)
+            order_dates = self._order_times(size, day_cum, hour_cum)
+            order_rows = []
+            item_rows = []
+            for business_id, user_offset, order_date in zip(businesses, users, order_dates):
+                user_id = first_user_id + user_offset
+                menu = menus[business_id]
+                total = Decimal('0.00')
+                for item_id, name, price, _ in rng.sample(menu, min(len(menu), rng.choice([1, 1, 2, 2, 3, 4]))):
+                    quantity = rng.choice([1, 1, 1, 2, 3])
+                    total += price * quantity
+                    item_rows.append((order_id, item_id, name, quantity, price))
+
+                discount = student_users is not None and user_id in student_users
+                if discount:
+                    total = (total * (100 - STUDENT_DISCOUNT_PERCENTAGE) / 100).quantize(Decimal('0.01'))
+                if order_date >= recent:
+                    status = rng.choice(ACTIVE_STATUSES)
+                elif rng.random() < CANCELLED_FRACTION:
+                    status = 'cancelled'
+                else:
+                    status = 'delivered'
+                order_rows.append([order_id, user_id, business_id, order_date, status, total,
+                                   f"{rng.randint(1, 999)} Lake View Apartments", self._person(), self._phone(),
+                                   user_email(user_id), rng.choice(['Cash on Delivery', 'UPI', 'Card']),
+                                   discount, STUDENT_DISCOUNT_PERCENTAGE if discount else Decimal('0.00')])
+                order_id += 1
+
+            event_rows = self._journal(order_rows)
+            self.loader.load('orders', order_rows, commit=False)
+            self.loader.load('order_items', item_rows, commit=False)
+            self.loader.load('order_events', event_rows, commit=False)
+            # Ends the transaction and releases the order sequence row
+            self.connection.commit()
+            order_total += len(order_rows)
+            item_total += len(item_rows)
+            event_total += len(event_rows)
+            remaining -= size
+            if self.verbose and order_total % (self.batch_size * 10) == 0:
+                self._log(f"  ... {order_total} orders")
+
+        self._report('orders', order_total, started)
+        self._log(f"  order_items: {item_total} rows")
+        self._log(f"  order_events: {event_total} rows")
+        return first_id, order_total
+
+    def _journal(self, order_rows):
+        """Version a batch of orders and build their order_events rows, like the app's own writes.
+
+        Each order gets a 'created' event and, if it has moved on from pending, a 'status'
+        event; the order row carries the version of its last event. The versions are reserved
+        from order_sequence with the backend's locking UPDATE, held until the batch commits.
+        """
+        event_count = sum(1 if order[4] == 'pending' else 2 for order in order_rows)
+        cursor = self.connection.cursor()
+        try:
+            version = self.backend.reserve_order_versions(cursor, event_count)
+        finally:
+            cursor.close()
+
+        event_rows = []
+        for order in order_rows:
+            order_id, user_id, business_id, order_date, status, total = order[:6]
+            event_rows.append((version, order_id, business_id, user_id, 'created', 'pending', total, order_date))
+            if status != 'pending':
+                version += 1
+                changed_at = min(order_date + timedelta(minutes=STATUS_CHANGE_MINUTES[status]), self.now)
+                event_rows.append((version, order_id, business_id, user_id, 'status', status, total, changed_at))
+            order.append(version)
+            version += 1
+        return event_rows
+
+    def subscriptions(self, count, first_user_id, user_count):
+        """At most one active subscription per user, matching uq_subscriptions_active_user"""
+        rng = self.rng
+        subscribers = rng.sample(range(first_user_id, first_user_id + user_count), min(count, user_count))
+
+        def rows():
+            for user_id in subscribers:
+                plan_name, plan_price = rng.choice(PLANS)
+                start = self._random_past(self.days)
+                if rng.random() < 0.7:
+                    yield (user_id, plan_name, plan_price, start, start + timedelta(days=30), 'active')
+                else:
+                    yield (user_id, plan_name, plan_price, start, start + timedelta(days=rng.randint(1, 30)),
+                           'cancelled')
+
+        self._load_batches('subscriptions', rows())
+        return len(subscribers)
+
+
+def connect(backend_name=None, sqlite_path=None, local_infile=False):
+    """Open a direct connection on the configured (or given) backend"""
+    name = backend_name or db_backend
+    config = dict(sqlite_config, path=sqlite_path) if sqlite_path else sqlite_config
+    backend = create_backend(name, db_config, config)
+    overrides = {'allow_local_infile': True} if local_infile and name == 'mysql' else None
+    return backend, backend.connect(overrides)
+
+
+def _prepare_session(connection, backend_name):
+    """Relax integrity checks for the bulk load; ids are generated consistently"""
+    cursor = connection.cursor()
+    try:
+        if backend_name == 'mysql':
+            cursor.execute("SET SESSION unique_checks = 0")
+            cursor.execute("SET SESSION foreign_key_checks = 0")
+        else:
+            cursor.execute("PRAGMA foreign_keys = OFF")
+            cursor.execute("PRAGMA synchronous = OFF")
+    finally:
+        cursor.close()
+
+
+def generate(users=1000, businesses=50, items_per_business=30, orders=10000, subscriptions=None,
+             backend_name=None, sqlite_path=None, method=None, seed=42, days=90, batch_size=20000,
+             verbose=True):
+    """Generate a dataset and return the id ranges that were created"""
+    backend_name = backend_name or db_backend
+    method = method or ('load-data' if backend_name == 'mysql' else 'executemany')
+    if method == 'load-data' and backend_name != 'mysql':
+        raise ValueError("LOAD DATA LOCAL INFILE is only available on the MySQL backend")
+
+    backend, connection = connect(backend_name, sqlite_path, local_infile=method == 'load-data')
+    try:
+        _prepare_session(connection, backend_name)
+        loader = LoadDataLoader(connection) if method == 'load-data' else ExecutemanyLoader(connection)
+        generator = DataGenerator(backend, connection, loader, seed=seed, days=days, batch_size=batch_size, verbose=verbose)
+
+        started = time.perf_counter()
+        generator._log(f"Generating on {backend_name} with {loader.name}")
+        first_user, user_count = generator.users(users)
+        first_business, business_count = generator.businesses(businesses)
+        first_item, item_count, menus = generator.menu_items(first_business, business_count, items_per_business)
+
+        # Verified students get the student discount on their orders
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT id FROM users WHERE id >= %s AND discount_eligible = TRUE", (first_user,))
+            student_users = {row[0] for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+        first_order, order_count = generator.orders(orders, first_user, user_count, menus, student_users)
+        subscription_count = generator.subscriptions(
+            users // 10 if subscriptions is None else subscriptions, first_user, user_count
+        )
+        elapsed = time.perf_counter() - started
+        generator._log(f"Done in {elapsed:.1f}s")
+    finally:
+        connection.close()
+
+    return {
+        'users': range(first_user, first_user + user_count),
+        'businesses': range(first_business, first_business + business_count),
+        'menu_items': range(first_item, first_item + item_count),
+        'orders': range(first_order, first_order + order_count),
+        'subscriptions': subscription_count,
+        'password': DATAGEN_PASSWORD,
+        'seconds': elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate skewed synthetic data for scale testing")
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--businesses', type=int, default=200)
+    parser.add_argument('--items-per-business', type=int, default=30, help="average menu size")
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--subscriptions', type=int, help="default: a tenth of the users")
+    parser.add_argument('--days', type=int, default=90, help="order history length in days")
+    parser.add_argument('--backend', choices=['mysql', 'sqlite'], help="default: db_backend from config.py")
+    parser.add_argument('--sqlite-path', help="SQLite database file (default: sqlite_config in config.py)")
+    parser.add_argument('--method', choices=['load-data', 'executemany'],
+                        help="MySQL load path (default load-data; SQLite always uses executemany)")
+    parser.add_argument('--batch-size', type=int, default=20000, help="rows per load batch")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    try:
+        result = generate(args.users, args.businesses, args.items_per_business, args.orders, args.subscriptions,
+                          backend_name=args.backend, sqlite_path=args.sqlite_path, method=args.method,
+                          seed=args.seed, days=args.days, batch_size=args.batch_size)
+    except Exception as e:
+        error_str = str(e).encode('ascii', 'ignore').decode('ascii')
+        print(f"Error generating data: {error_str}")
+        if args.method != 'executemany':
+            print("If the server rejects LOAD DATA LOCAL INFILE, enable local_infile or use --method executemany")
+        sys.exit(1)
+
+    for table in ('users', 'businesses', 'menu_items', 'orders'):
+        ids = result[table]
+        if ids:
+            print(f"{table}: ids {ids.start}-{ids.stop - 1}")
+    print(f"Generated accounts use the password '{result['password']}' "
+          f"(e.g. {user_email(result['users'].start)}, {business_email(result['businesses'].start)})")
+
+
+if __name__ == "__main__":
+    main()
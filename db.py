@@ -1,17 +1,366 @@
-import mysql.connector
-from mysql.connector import Error
 import hashlib
-from config import db_config
+import base64
+import json
+import contextvars
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+from config import db_config, db_pool_config, cache_config, db_replicas, db_replica_routing, db_backend, sqlite_config, query_log_config, student_discount_percentage
+from db_pool import ConnectionPool, ReplicaSet
+from db_backends import create_backend
+from cache import TTLCache, MISSING
+
+# Storage engine (MySQL, or embedded SQLite for hermetic benchmarks - see db_backends.py)
+_backend = create_backend(db_backend, db_config, sqlite_config)
+BACKEND = _backend.name
+Error = _backend.Error
+
+# Shared connection pool - connections are opened lazily on first use
+_pool = ConnectionPool(_backend.connect, name='primary', **db_pool_config)
+
+def _replica_lag(raw_connection):
+    """Seconds a replica is behind its source, or None if it is not replicating"""
+    cursor = raw_connection.cursor(dictionary=True)
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except Error:
+            # MySQL before 8.0.22
+            cursor.execute("SHOW SLAVE STATUS")
+        status = cursor.fetchone()
+        cursor.fetchall()
+    finally:
+        cursor.close()
+    if not status:
+        return None
+    return status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+
+# Optional read replicas for read-only queries (see db_replicas in config.py)
+_replicas = ReplicaSet(
+    [ConnectionPool(lambda replica=replica: _backend.connect(replica),
+                    name=f"replica-{position}", **db_pool_config)
+     for position, replica in enumerate(db_replicas if BACKEND == 'mysql' else [], start=1)],
+    lag_check=_replica_lag,
+    max_lag=db_replica_routing['max_lag'],
+    check_interval=db_replica_routing['lag_check_interval'],
+    retry_after=db_replica_routing['retry_after']
+)
 
 # Function to get a database connection
 def get_db_connection():
+    """Borrow a pooled connection; calling close() on it returns it to the pool"""
     try:
-        connection = mysql.connector.connect(**db_config)
-        return connection
+        return _pool.acquire()
     except Error as e:
-        print(f"Error connecting to MySQL database: {e}")
+        print(f"Error connecting to {BACKEND} database: {e}")
         return None
 
+# Last write of the current session (None outside a read_your_writes block)
+_session_writes = contextvars.ContextVar('db_session_writes', default=None)
+
+@contextmanager
+def read_your_writes(last_write=None):
+    """Track the current session's writes so its reads skip replicas for a while.
+
+    last_write is the time.time() of the session's previous write (app.py keeps it in
+    the Flask session). Yields a dict whose 'last_write' key is updated on every commit.
+    """
+    state = {'last_write': last_write}
+    token = _session_writes.set(state)
+    try:
+        yield state
+    finally:
+        _session_writes.reset(token)
+
+def _record_write():
+    state = _session_writes.get()
+    if state is not None:
+        state['last_write'] = time.time()
+
+def _acquire_for_read():
+    """A replica connection when replicas are configured and the session may use one"""
+    if not _replicas.pools:
+        return _pool.acquire()
+    state = _session_writes.get()
+    if state and state['last_write'] and time.time() - state['last_write'] < db_replica_routing['read_your_writes_window']:
+        return _pool.acquire()
+    return _replicas.acquire() or _pool.acquire()
+
+@contextmanager
+def db_connection(read_only=False):
+    """Borrow a pooled connection for the duration of a with-block.
+
+    Uncommitted work is rolled back if the block raises, and the connection
+    always goes back to the pool. read_only blocks may be served by a replica.
+    """
+    connection = _acquire_for_read() if read_only else _pool.acquire()
+    try:
+        yield connection
+    except Exception:
+        try:
+            connection.rollback()
+        except Error:
+            pass
+        raise
+    finally:
+        connection.close()
+
+# Query instrumentation: every statement run through db_cursor is timed and attributed
+# to the db.py function that issued it, per request (count_round_trips) and per function
+# since startup (get_query_stats). Statements slower than the configured threshold are
+# written to the slow-query log.
+
+# Totals of the current request (None when nobody is counting)
+_round_trips = contextvars.ContextVar('db_round_trips', default=None)
+
+_function_stats = {}
+_function_stats_lock = threading.Lock()
+
+_slow_query_log = logging.getLogger('swift_serve.slow_queries')
+if query_log_config['slow_query_log'] and not _slow_query_log.handlers:
+    _slow_log_handler = logging.FileHandler(query_log_config['slow_query_log'], delay=True)
+    _slow_log_handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    _slow_query_log.addHandler(_slow_log_handler)
+    _slow_query_log.setLevel(logging.INFO)
+    _slow_query_log.propagate = False
+
+@contextmanager
+def count_round_trips():
+    """Count database round trips (statements and commits) made inside the with-block.
+
+    Yields a dict that is updated live: 'queries' and 'commits' counts, 'rows' returned
+    or affected, 'db_time' in seconds and a per-function breakdown under 'functions'.
+    app.py wraps every request in one for the X-DB-Queries and Server-Timing headers.
+    """
+    counter = {'queries': 0, 'commits': 0, 'rows': 0, 'db_time': 0.0, 'functions': {}}
+    token = _round_trips.set(counter)
+    try:
+        yield counter
+    finally:
+        _round_trips.reset(token)
+
+def get_query_stats():
+    """Per-function query totals since startup: {function: {queries, rows, time, max_time, slow, errors}}"""
+    with _function_stats_lock:
+        return {function: dict(stats) for function, stats in _function_stats.items()}
+
+def reset_query_stats():
+    with _function_stats_lock:
+        _function_stats.clear()
+
+def _calling_function():
+    """Name of the function that issued the current statement.
+
+    Walks out of the cursor proxy, the backend helpers in db_backends.py and private
+    helpers (_attach_order_items, ...), however deeply they are nested, to the public
+    db.py function (or outside caller) that asked for the statement.
+    """
+    frame = sys._getframe(1)
+    while frame.f_back is not None and _is_query_plumbing(frame):
+        frame = frame.f_back
+    return frame.f_code.co_name
+
+def _is_query_plumbing(frame):
+    if frame.f_globals.get('__name__') == _BACKENDS_MODULE:
+        return True
+    if frame.f_globals is not globals():
+        return False
+    return frame.f_code.co_name.startswith('_') or frame.f_code in _PROXY_CODE
+
+def _record_statement(function, operation, elapsed, rows, failed=False):
+    with _function_stats_lock:
+        stats = _function_stats.get(function)
+        if stats is None:
+            stats = _function_stats[function] = {'queries': 0, 'rows': 0, 'time': 0.0,
+                                                 'max_time': 0.0, 'slow': 0, 'errors': 0}
+        stats['queries'] += 1
+        stats['rows'] += rows
+        stats['time'] += elapsed
+        stats['max_time'] = max(stats['max_time'], elapsed)
+        if failed:
+            stats['errors'] += 1
+        slow = elapsed >= query_log_config['slow_query_threshold']
+        if slow:
+            stats['slow'] += 1
+
+    counter = _round_trips.get()
+    if counter is not None:
+        counter['rows'] += rows
+        per_function = counter['functions'].setdefault(function, {'queries': 0, 'time': 0.0})
+        per_function['queries'] += 1
+        per_function['time'] += elapsed
+
+    if slow:
+        statement = ' '.join(operation.split())
+        _slow_query_log.info(f"{elapsed * 1000:.1f}ms {function} rows={rows} {statement[:1000]}")
+
+def _add_db_time(kind, elapsed):
+    counter = _round_trips.get()
+    if counter is not None:
+        if kind:
+            counter[kind] += 1
+        counter['db_time'] += elapsed
+
+class _InstrumentedCursor:
+    """Cursor proxy that times statements (including fetching their rows) and counts them"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._statement = None  # [function, operation, elapsed, rows] of the last statement
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def _finish_statement(self):
+        if self._statement is not None:
+            _record_statement(*self._statement)
+            self._statement = None
+
+    def _run(self, method, operation, *args, **kwargs):
+        self._finish_statement()
+        function = _calling_function()
+        started = time.perf_counter()
+        try:
+            result = method(operation, *args, **kwargs)
+        except Exception:
+            elapsed = time.perf_counter() - started
+            _add_db_time('queries', elapsed)
+            _record_statement(function, operation, elapsed, 0, failed=True)
+            raise
+        elapsed = time.perf_counter() - started
+        _add_db_time('queries', elapsed)
+        # DML reports affected rows now; SELECT rows are counted as they are fetched
+        rowcount = self._cursor.rowcount if self._cursor.description is None else 0
+        self._statement = [function, operation, elapsed, max(rowcount or 0, 0)]
+        return result
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        return self._run(self._cursor.execute, operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        # mysql.connector rewrites batched INSERTs into one multi-row statement
+        return self._run(self._cursor.executemany, operation, seq_params, *args, **kwargs)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        result = method(*args)
+        elapsed = time.perf_counter() - started
+        _add_db_time(None, elapsed)
+        if self._statement is not None:
+            self._statement[2] += elapsed
+            self._statement[3] += len(result) if isinstance(result, list) else int(result is not None)
+        return result
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._fetch(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def close(self):
+        self._finish_statement()
+        return self._cursor.close()
+
+class _InstrumentedConnection:
+    """Connection proxy that times commits and hands out instrumented cursors"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        return _InstrumentedCursor(self._connection.cursor(*args, **kwargs))
+
+    def commit(self):
+        started = time.perf_counter()
+        result = self._connection.commit()
+        _add_db_time('commits', time.perf_counter() - started)
+        _record_write()
+        return result
+
+# Code of the proxy methods, skipped when attributing a statement to its caller
+_PROXY_CODE = {member.__code__ for proxy in (_InstrumentedCursor, _InstrumentedConnection)
+               for member in vars(proxy).values() if hasattr(member, '__code__')}
+_BACKENDS_MODULE = create_backend.__module__
+
+@contextmanager
+def db_cursor(dictionary=False, read_only=False):
+    """Borrow a pooled connection and open a cursor on it.
+
+    Pass read_only=True for plain SELECTs that can tolerate replication lag; they are
+    routed to a read replica when one is configured and healthy.
+    """
+    with db_connection(read_only) as connection:
+        connection = _InstrumentedConnection(connection)
+        cursor = connection.cursor(dictionary=dictionary)
+        try:
+            yield connection, cursor
+        finally:
+            cursor.close()
+
+def get_pool_stats():
+    """Return connection pool utilisation statistics"""
+    stats = _pool.stats()
+    if _replicas.pools:
+        stats['replication'] = _replicas.stats()
+    return stats
+
+# Change listeners - in-process caches and indexes register here to hear about writes
+_change_listeners = []
+
+def add_change_listener(callback):
+    """Register callback(entity, entity_id) to be called after a committed write.
+
+    entity is the table name ('menu_items', 'businesses', ...).
+    """
+    _change_listeners.append(callback)
+
+def _notify_change(entity, entity_id):
+    for callback in _change_listeners:
+        try:
+            callback(entity, entity_id)
+        except Exception as e:
+            print(f"Error in change listener for {entity} {entity_id}: {e}")
+
+# Order listeners - live tracking and the dashboard change feed hear about every committed
+# order insert and status change as {'order_id', 'business_id', 'status', 'version'}
+_order_listeners = []
+
+def add_order_listener(callback):
+    """Register callback(event) to be called after an order was created or changed status"""
+    _order_listeners.append(callback)
+
+def _notify_order(order_id, business_id, status, version):
+    event = {'order_id': int(order_id), 'business_id': business_id, 'status': status, 'version': version}
+    for callback in _order_listeners:
+        try:
+            callback(event)
+        except Exception as e:
+            print(f"Error in order listener for order {order_id}: {e}")
+
+# Read-through caches for single user/business rows, invalidated by every write below.
+# Cached lookups read from the primary so a lagging replica can't refill a cache with
+# the row that was just invalidated.
+_user_cache = TTLCache(ttl=cache_config['entity_ttl'], max_entries=cache_config['entity_max_entries'],
+                       max_bytes=cache_config['entity_max_bytes'], name='users')
+_business_cache = TTLCache(ttl=cache_config['entity_ttl'], max_entries=cache_config['entity_max_entries'],
+                           max_bytes=cache_config['entity_max_bytes'], name='businesses')
+
+def get_cache_stats():
+    """Return hit/miss/eviction counters of the in-process caches"""
+    return {cache.name: cache.stats() for cache in (_user_cache, _business_cache, _subscription_cache)}
+
 # User-related database functions
 def create_user(name, email, password, phone, is_student=False, student_id_card=None):
     """Create a new user in the database"""
@@ -19,47 +368,40 @@ def create_user(name, email, password, phone, is_student=False, student_id_card=
         # Hash the password
         hashed_password = hashlib.sha256(password.encode()).hexdigest()
         
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        # Check if email already exists
-        cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
-        if cursor.fetchone():
-            cursor.close()
-            connection.close()
-            return False, "Email already exists"
+        with db_cursor() as (connection, cursor):
+            # Check if email already exists
+            cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
+            if cursor.fetchone():
+                return False, "Email already exists"
             
-        # Insert new user
-        if is_student and student_id_card:
-            # Student with ID card - needs verification
-            query = """
-            INSERT INTO users (name, email, password, phone, is_student, student_id_card, is_verified, discount_eligible)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (name, email, hashed_password, phone, True, student_id_card, False, False))
-        elif is_student and not student_id_card:
-            # Student without ID card
-            query = """
-            INSERT INTO users (name, email, password, phone, is_student)
-            VALUES (%s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (name, email, hashed_password, phone, True))
-        else:
-            # Regular user
-            query = """
-            INSERT INTO users (name, email, password, phone)
-            VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(query, (name, email, hashed_password, phone))
+            # Insert new user
+            if is_student and student_id_card:
+                # Student with ID card - needs verification
+                query = """
+                INSERT INTO users (name, email, password, phone, is_student, student_id_card, is_verified, discount_eligible)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """
+                cursor.execute(query, (name, email, hashed_password, phone, True, student_id_card, False, False))
+            elif is_student and not student_id_card:
+                # Student without ID card
+                query = """
+                INSERT INTO users (name, email, password, phone, is_student)
+                VALUES (%s, %s, %s, %s, %s)
+                """
+                cursor.execute(query, (name, email, hashed_password, phone, True))
+            else:
+                # Regular user
+                query = """
+                INSERT INTO users (name, email, password, phone)
+                VALUES (%s, %s, %s, %s)
+                """
+                cursor.execute(query, (name, email, hashed_password, phone))
             
-        connection.commit()
-        
-        # Get the user ID
-        user_id = cursor.lastrowid
-        
-        cursor.close()
-        connection.close()
+            connection.commit()
         
+            # Get the user ID
+            user_id = cursor.lastrowid
+
         return True, user_id
     except Error as e:
         print(f"Error creating user: {e}")
@@ -71,21 +413,16 @@ def validate_login(email, password):
         # Hash the password
         hashed_password = hashlib.sha256(password.encode()).hexdigest()
         
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        # Query to find user with matching email and password
-        query = """
-        SELECT id, name, email, phone
-        FROM users
-        WHERE email = %s AND password = %s
-        """
-        cursor.execute(query, (email, hashed_password))
-        user = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor(dictionary=True) as (connection, cursor):
+            # Query to find user with matching email and password
+            query = """
+            SELECT id, name, email, phone
+            FROM users
+            WHERE email = %s AND password = %s
+            """
+            cursor.execute(query, (email, hashed_password))
+            user = cursor.fetchone()
+
         if user:
             return True, user
         else:
@@ -98,21 +435,24 @@ def validate_login(email, password):
 
 def get_user_by_id(user_id):
     """Retrieve user by ID"""
+    cached = _user_cache.get(user_id)
+    if cached is not MISSING:
+        return dict(cached)
+    generation = _user_cache.generation(user_id)
+    
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        query = """
-        SELECT id, name, email, phone, is_student, is_verified, discount_eligible
-        FROM users
-        WHERE id = %s
-        """
-        cursor.execute(query, (user_id,))
-        user = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor(dictionary=True) as (connection, cursor):
+            query = """
+            SELECT id, name, email, phone, is_student, is_verified, discount_eligible
+            FROM users
+            WHERE id = %s
+            """
+            cursor.execute(query, (user_id,))
+            user = cursor.fetchone()
+
+        if user:
+            _user_cache.set(user_id, user, generation)
+            return dict(user)
         return user
     except Error as e:
         print(f"Error retrieving user: {e}")
@@ -121,54 +461,66 @@ def get_user_by_id(user_id):
 def update_user(user_id, name=None, phone=None):
     """Update user profile information"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
+        with db_cursor() as (connection, cursor):
+            # Build update query dynamically based on provided fields
+            update_parts = []
+            params = []
         
-        # Build update query dynamically based on provided fields
-        update_parts = []
-        params = []
+            if name:
+                update_parts.append("name = %s")
+                params.append(name)
         
-        if name:
-            update_parts.append("name = %s")
-            params.append(name)
+            if phone:
+                update_parts.append("phone = %s")
+                params.append(phone)
         
-        if phone:
-            update_parts.append("phone = %s")
-            params.append(phone)
+            if not update_parts:
+                return True, "No changes to make"
         
-        if not update_parts:
-            return True, "No changes to make"
-        
-        query = f"UPDATE users SET {', '.join(update_parts)} WHERE id = %s"
-        params.append(user_id)
-        
-        cursor.execute(query, params)
-        connection.commit()
-        
-        cursor.close()
-        connection.close()
+            query = f"UPDATE users SET {', '.join(update_parts)} WHERE id = %s"
+            params.append(user_id)
         
+            cursor.execute(query, params)
+            connection.commit()
+
+        _user_cache.invalidate(user_id)
+        _notify_change('users', user_id)
+
         return True, "Profile updated successfully"
     except Error as e:
         print(f"Error updating user: {e}")
         return False, str(e)
 
+def submit_student_id_card(user_id, student_id_card):
+    """Record an uploaded student ID card; the user waits for verification again"""
+    try:
+        with db_cursor() as (connection, cursor):
+            query = """
+            UPDATE users 
+            SET is_student = TRUE, student_id_card = %s, is_verified = FALSE
+            WHERE id = %s
+            """
+            cursor.execute(query, (student_id_card, user_id))
+            connection.commit()
+
+        _user_cache.invalidate(user_id)
+        _notify_change('users', user_id)
+        return True, "Student ID submitted"
+    except Error as e:
+        print(f"Error saving student ID card: {e}")
+        return False, str(e)
+
 def save_contact_submission(name, email, phone, subject, message):
     """Save a contact form submission to the database"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        query = """
-        INSERT INTO contact_submissions (name, email, phone, subject, message)
-        VALUES (%s, %s, %s, %s, %s)
-        """
-        cursor.execute(query, (name, email, phone, subject, message))
-        connection.commit()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor() as (connection, cursor):
+            query = """
+            INSERT INTO contact_submissions (name, email, phone, subject, message)
+            VALUES (%s, %s, %s, %s, %s)
+            """
+            cursor.execute(query, (name, email, phone, subject, message))
+            connection.commit()
+
         return True, "Message saved successfully"
     except Error as e:
         print(f"Error saving contact submission: {e}")
@@ -181,30 +533,23 @@ def create_business(business_name, owner_name, email, password, phone, address,
         # Hash the password
         hashed_password = hashlib.sha256(password.encode()).hexdigest()
         
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        # Check if email already exists
-        cursor.execute("SELECT * FROM businesses WHERE email = %s", (email,))
-        if cursor.fetchone():
-            cursor.close()
-            connection.close()
-            return False, "Email already exists"
+        with db_cursor() as (connection, cursor):
+            # Check if email already exists
+            cursor.execute("SELECT * FROM businesses WHERE email = %s", (email,))
+            if cursor.fetchone():
+                return False, "Email already exists"
             
-        # Insert new business
-        query = """
-        INSERT INTO businesses (business_name, owner_name, email, password, phone, address, business_type)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """
-        cursor.execute(query, (business_name, owner_name, email, hashed_password, phone, address, business_type))
-        connection.commit()
-        
-        # Get the business ID
-        business_id = cursor.lastrowid
-        
-        cursor.close()
-        connection.close()
+            # Insert new business
+            query = """
+            INSERT INTO businesses (business_name, owner_name, email, password, phone, address, business_type)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """
+            cursor.execute(query, (business_name, owner_name, email, hashed_password, phone, address, business_type))
+            connection.commit()
         
+            # Get the business ID
+            business_id = cursor.lastrowid
+
         return True, business_id
     except Error as e:
         print(f"Error creating business account: {e}")
@@ -216,21 +561,16 @@ def validate_business_login(email, password):
         # Hash the password
         hashed_password = hashlib.sha256(password.encode()).hexdigest()
         
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        # Query to find business with matching email and password
-        query = """
-        SELECT id, business_name, owner_name, email, phone, address, business_type, status
-        FROM businesses
-        WHERE email = %s AND password = %s
-        """
-        cursor.execute(query, (email, hashed_password))
-        business = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor(dictionary=True) as (connection, cursor):
+            # Query to find business with matching email and password
+            query = """
+            SELECT id, business_name, owner_name, email, phone, address, business_type, status
+            FROM businesses
+            WHERE email = %s AND password = %s
+            """
+            cursor.execute(query, (email, hashed_password))
+            business = cursor.fetchone()
+
         if business:
             # Removed approval check - all businesses can login regardless of status
             return True, business
@@ -244,21 +584,24 @@ def validate_business_login(email, password):
 
 def get_business_by_id(business_id):
     """Retrieve business by ID"""
+    cached = _business_cache.get(business_id)
+    if cached is not MISSING:
+        return dict(cached)
+    generation = _business_cache.generation(business_id)
+    
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        query = """
-        SELECT id, business_name, owner_name, email, phone, address, business_type, status
-        FROM businesses
-        WHERE id = %s
-        """
-        cursor.execute(query, (business_id,))
-        business = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor(dictionary=True) as (connection, cursor):
+            query = """
+            SELECT id, business_name, owner_name, email, phone, address, business_type, status
+            FROM businesses
+            WHERE id = %s
+            """
+            cursor.execute(query, (business_id,))
+            business = cursor.fetchone()
+
+        if business:
+            _business_cache.set(business_id, business, generation)
+            return dict(business)
         return business
     except Error as e:
         print(f"Error retrieving business: {e}")
@@ -267,45 +610,42 @@ def get_business_by_id(business_id):
 def update_business(business_id, business_name=None, owner_name=None, phone=None, address=None, business_type=None):
     """Update business profile information"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        # Build update query dynamically based on provided fields
-        update_parts = []
-        params = []
-        
-        if business_name:
-            update_parts.append("business_name = %s")
-            params.append(business_name)
-        
-        if owner_name:
-            update_parts.append("owner_name = %s")
-            params.append(owner_name)
-        
-        if phone:
-            update_parts.append("phone = %s")
-            params.append(phone)
+        with db_cursor() as (connection, cursor):
+            # Build update query dynamically based on provided fields
+            update_parts = []
+            params = []
+        
+            if business_name:
+                update_parts.append("business_name = %s")
+                params.append(business_name)
+        
+            if owner_name:
+                update_parts.append("owner_name = %s")
+                params.append(owner_name)
+        
+            if phone:
+                update_parts.append("phone = %s")
+                params.append(phone)
             
-        if address:
-            update_parts.append("address = %s")
-            params.append(address)
+            if address:
+                update_parts.append("address = %s")
+                params.append(address)
             
-        if business_type:
-            update_parts.append("business_type = %s")
-            params.append(business_type)
-        
-        if not update_parts:
-            return True, "No changes to make"
-        
-        query = f"UPDATE businesses SET {', '.join(update_parts)} WHERE id = %s"
-        params.append(business_id)
+            if business_type:
+                update_parts.append("business_type = %s")
+                params.append(business_type)
         
-        cursor.execute(query, params)
-        connection.commit()
+            if not update_parts:
+                return True, "No changes to make"
         
-        cursor.close()
-        connection.close()
+            query = f"UPDATE businesses SET {', '.join(update_parts)} WHERE id = %s"
+            params.append(business_id)
         
+            cursor.execute(query, params)
+            connection.commit()
+
+        _business_cache.invalidate(business_id)
+        _notify_change('businesses', business_id)
         return True, "Business profile updated successfully"
     except Error as e:
         print(f"Error updating business: {e}")
@@ -314,16 +654,13 @@ def update_business(business_id, business_name=None, owner_name=None, phone=None
 def update_business_status(business_id, status):
     """Update business approval status (for admin use)"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        query = "UPDATE businesses SET status = %s WHERE id = %s"
-        cursor.execute(query, (status, business_id))
-        connection.commit()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor() as (connection, cursor):
+            query = "UPDATE businesses SET status = %s WHERE id = %s"
+            cursor.execute(query, (status, business_id))
+            connection.commit()
+
+        _business_cache.invalidate(business_id)
+        _notify_change('businesses', business_id)
         return True, f"Business status updated to {status}"
     except Error as e:
         print(f"Error updating business status: {e}")
@@ -332,30 +669,25 @@ def update_business_status(business_id, status):
 def get_all_businesses(status=None):
     """Get all businesses, optionally filtered by status"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        if status:
-            query = """
-            SELECT id, business_name, owner_name, email, phone, address, business_type, status, created_at
-            FROM businesses
-            WHERE status = %s
-            ORDER BY created_at DESC
-            """
-            cursor.execute(query, (status,))
-        else:
-            query = """
-            SELECT id, business_name, owner_name, email, phone, address, business_type, status, created_at
-            FROM businesses
-            ORDER BY created_at DESC
-            """
-            cursor.execute(query)
+        with db_cursor(dictionary=True, read_only=True) as (connection, cursor):
+            if status:
+                query = """
+                SELECT id, business_name, owner_name, email, phone, address, business_type, status, created_at
+                FROM businesses
+                WHERE status = %s
+                ORDER BY created_at DESC
+                """
+                cursor.execute(query, (status,))
+            else:
+                query = """
+                SELECT id, business_name, owner_name, email, phone, address, business_type, status, created_at
+                FROM businesses
+                ORDER BY created_at DESC
+                """
+                cursor.execute(query)
             
-        businesses = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
-        
+            businesses = cursor.fetchall()
+
         return businesses
     except Error as e:
         print(f"Error retrieving businesses: {e}")
@@ -365,22 +697,18 @@ def get_all_businesses(status=None):
 def add_menu_item(business_id, item_name, description, price, image_url=None, category=None):
     """Add a new menu item for a business"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        query = """
-        INSERT INTO menu_items (business_id, item_name, description, price, image_url, category)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        cursor.execute(query, (business_id, item_name, description, price, image_url, category))
-        connection.commit()
-        
-        # Get the item ID
-        item_id = cursor.lastrowid
-        
-        cursor.close()
-        connection.close()
+        with db_cursor() as (connection, cursor):
+            query = """
+            INSERT INTO menu_items (business_id, item_name, description, price, image_url, category)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            """
+            cursor.execute(query, (business_id, item_name, description, price, image_url, category))
+            connection.commit()
         
+            # Get the item ID
+            item_id = cursor.lastrowid
+
+        _notify_change('menu_items', item_id)
         return True, item_id
     except Error as e:
         error_str = str(e).encode('ascii', 'ignore').decode('ascii')
@@ -390,73 +718,146 @@ def add_menu_item(business_id, item_name, description, price, image_url=None, ca
 def get_menu_items_by_business(business_id):
     """Get all menu items for a specific business"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        query = """
-        SELECT id, item_name, description, price, image_url, is_available, category
-        FROM menu_items
-        WHERE business_id = %s
-        ORDER BY category, item_name
-        """
-        cursor.execute(query, (business_id,))
-        items = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor(dictionary=True, read_only=True) as (connection, cursor):
+            query = """
+            SELECT id, item_name, description, price, image_url, is_available, category
+            FROM menu_items
+            WHERE business_id = %s
+            ORDER BY category, item_name
+            """
+            cursor.execute(query, (business_id,))
+            items = cursor.fetchall()
+
         return items
     except Error as e:
         error_str = str(e).encode('ascii', 'ignore').decode('ascii')
         print(f"Error retrieving menu items: {error_str}")
         return []
 
+# Bulk import/export - rows are parsed and validated by menu_io
+MENU_IMPORT_CHUNK_SIZE = 500
+MENU_IMPORT_MAX_ERRORS = 100
+MENU_EXPORT_BATCH_SIZE = 500
+
+def import_menu_items(business_id, rows, partial=False, chunk_size=MENU_IMPORT_CHUNK_SIZE):
+    """Insert validated menu rows for a business in executemany chunks, in one transaction.
+
+    rows yields (row_number, values, error) as produced by menu_io.validated_rows. Rows
+    with an error are reported back; unless partial is True a single bad row rolls back
+    the whole import. Returns (True, {'inserted', 'rejected', 'errors', 'committed'}).
+    """
+    query = """
+    INSERT INTO menu_items (business_id, item_name, description, price, image_url, category, is_available)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """
+    inserted = 0
+    rejected = 0
+    errors = []
+    try:
+        with db_cursor() as (connection, cursor):
+            chunk = []
+            for row_number, values, error in rows:
+                if error:
+                    rejected += 1
+                    if len(errors) < MENU_IMPORT_MAX_ERRORS:
+                        errors.append({'row': row_number, 'error': error})
+                    continue
+                chunk.append((business_id,) + tuple(values))
+                if len(chunk) >= chunk_size:
+                    cursor.executemany(query, chunk)
+                    inserted += len(chunk)
+                    chunk = []
+            if chunk:
+                cursor.executemany(query, chunk)
+                inserted += len(chunk)
+
+            committed = inserted > 0 and (partial or rejected == 0)
+            if committed:
+                connection.commit()
+            else:
+                connection.rollback()
+
+        if committed:
+            # One notification for the whole menu instead of one per item
+            _notify_change('businesses', business_id)
+        return True, {
+            'inserted': inserted if committed else 0,
+            'rejected': rejected,
+            'errors': errors,
+            'committed': committed
+        }
+    except Error as e:
+        error_str = str(e).encode('ascii', 'ignore').decode('ascii')
+        print(f"Error importing menu items: {error_str}")
+        return False, "Database error"
+
+def iter_menu_items_by_business(business_id, batch_size=MENU_EXPORT_BATCH_SIZE):
+    """Yield a business's menu items one by one, fetching them in batches.
+
+    The pooled connection is held until the generator is exhausted or closed, so the
+    export can be streamed without loading the whole menu into memory.
+    """
+    try:
+        with db_cursor(dictionary=True, read_only=True) as (connection, cursor):
+            query = """
+            SELECT id, item_name, description, price, image_url, is_available, category
+            FROM menu_items
+            WHERE business_id = %s
+            ORDER BY category, item_name, id
+            """
+            cursor.execute(query, (business_id,))
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                for item in batch:
+                    yield item
+    except Error as e:
+        error_str = str(e).encode('ascii', 'ignore').decode('ascii')
+        print(f"Error exporting menu items: {error_str}")
+
 def update_menu_item(item_id, item_name=None, description=None, price=None, image_url=None, is_available=None, category=None):
     """Update a menu item"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        # Build update query dynamically based on provided fields
-        update_parts = []
-        params = []
-        
-        if item_name:
-            update_parts.append("item_name = %s")
-            params.append(item_name)
-        
-        if description:
-            update_parts.append("description = %s")
-            params.append(description)
-        
-        if price:
-            update_parts.append("price = %s")
-            params.append(price)
+        with db_cursor() as (connection, cursor):
+            # Build update query dynamically based on provided fields
+            update_parts = []
+            params = []
+        
+            if item_name:
+                update_parts.append("item_name = %s")
+                params.append(item_name)
+        
+            if description:
+                update_parts.append("description = %s")
+                params.append(description)
+        
+            if price:
+                update_parts.append("price = %s")
+                params.append(price)
             
-        if image_url:
-            update_parts.append("image_url = %s")
-            params.append(image_url)
+            if image_url:
+                update_parts.append("image_url = %s")
+                params.append(image_url)
             
-        if is_available is not None:
-            update_parts.append("is_available = %s")
-            params.append(is_available)
+            if is_available is not None:
+                update_parts.append("is_available = %s")
+                params.append(is_available)
             
-        if category:
-            update_parts.append("category = %s")
-            params.append(category)
-        
-        if not update_parts:
-            return True, "No changes to make"
+            if category:
+                update_parts.append("category = %s")
+                params.append(category)
         
-        query = f"UPDATE menu_items SET {', '.join(update_parts)} WHERE id = %s"
-        params.append(item_id)
+            if not update_parts:
+                return True, "No changes to make"
         
-        cursor.execute(query, params)
-        connection.commit()
-        
-        cursor.close()
-        connection.close()
+            query = f"UPDATE menu_items SET {', '.join(update_parts)} WHERE id = %s"
+            params.append(item_id)
         
+            cursor.execute(query, params)
+            connection.commit()
+
+        _notify_change('menu_items', item_id)
         return True, "Menu item updated successfully"
     except Error as e:
         error_str = str(e).encode('ascii', 'ignore').decode('ascii')
@@ -466,16 +867,12 @@ def update_menu_item(item_id, item_name=None, description=None, price=None, imag
 def delete_menu_item(item_id):
     """Delete a menu item"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        query = "DELETE FROM menu_items WHERE id = %s"
-        cursor.execute(query, (item_id,))
-        connection.commit()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor() as (connection, cursor):
+            query = "DELETE FROM menu_items WHERE id = %s"
+            cursor.execute(query, (item_id,))
+            connection.commit()
+
+        _notify_change('menu_items', item_id)
         return True, "Menu item deleted successfully"
     except Error as e:
         error_str = str(e).encode('ascii', 'ignore').decode('ascii')
@@ -485,33 +882,15 @@ def delete_menu_item(item_id):
 def get_menu_item_by_id(item_id):
     """Get a specific menu item by ID"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        # Check if the menu_items table has the business_id column
-        cursor.execute("SHOW COLUMNS FROM menu_items LIKE 'business_id'")
-        has_business_id = cursor.fetchone() is not None
-        
-        if has_business_id:
+        with db_cursor(dictionary=True, read_only=True) as (connection, cursor):
             query = """
             SELECT id, business_id, item_name, description, price, image_url, is_available, category
             FROM menu_items
             WHERE id = %s
             """
-        else:
-            # Fallback query without business_id if the column doesn't exist
-            query = """
-            SELECT id, item_name, description, price, image_url, is_available, category
-            FROM menu_items
-            WHERE id = %s
-            """
-        
-        cursor.execute(query, (item_id,))
-        item = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
-        
+            cursor.execute(query, (item_id,))
+            item = cursor.fetchone()
+
         return item
     except Error as e:
         error_str = str(e).encode('ascii', 'ignore').decode('ascii')
@@ -519,177 +898,604 @@ def get_menu_item_by_id(item_id):
         return None
 
 def get_all_menu_items():
-    """Get all available menu items from all approved businesses for the explore page"""
+    """Get all available menu items from all approved businesses for the explore page.
+
+    Rows come back in id order; the explore feed shuffles them in memory per session
+    instead of paying for ORDER BY RAND() on every request. Returns None on a database
+    error, so the in-memory snapshots never mistake a failed load for an empty menu.
+    """
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        query = """
-        SELECT m.id, m.business_id, b.business_name, m.item_name, m.description, 
-               m.price, m.image_url, m.is_available, m.category
-        FROM menu_items m
-        JOIN businesses b ON m.business_id = b.id
-        WHERE m.is_available = TRUE
-        AND b.status = 'approved'
-        ORDER BY RAND()
-        """
-        cursor.execute(query)
-        items = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor(dictionary=True, read_only=True) as (connection, cursor):
+            query = """
+            SELECT m.id, m.business_id, b.business_name, m.item_name, m.description, 
+                   m.price, m.image_url, m.is_available, m.category
+            FROM menu_items m
+            JOIN businesses b ON m.business_id = b.id
+            WHERE m.is_available = TRUE
+            AND b.status = 'approved'
+            ORDER BY m.id
+            """
+            cursor.execute(query)
+            items = cursor.fetchall()
+
         return items
     except Error as e:
         error_str = str(e).encode('ascii', 'ignore').decode('ascii')
         print(f"Error retrieving all menu items: {error_str}")
-        return []
+        return None
+
+def get_menu_item_details(item_id):
+    """Get a menu item joined with its business name and status (None if the item doesn't exist)"""
+    try:
+        with db_cursor(dictionary=True) as (connection, cursor):
+            query = """
+            SELECT m.id, m.business_id, b.business_name, b.status AS business_status,
+                   m.item_name, m.description, m.price, m.image_url, m.is_available, m.category
+            FROM menu_items m
+            LEFT JOIN businesses b ON m.business_id = b.id
+            WHERE m.id = %s
+            """
+            cursor.execute(query, (item_id,))
+            item = cursor.fetchone()
+
+        return item
+    except Error as e:
+        error_str = str(e).encode('ascii', 'ignore').decode('ascii')
+        print(f"Error retrieving menu item details: {error_str}")
+        return None
+
+def get_menu_item_popularity():
+    """Get total units ordered per menu item as {menu_item_id: quantity}"""
+    try:
+        with db_cursor(read_only=True) as (connection, cursor):
+            query = """
+            SELECT menu_item_id, SUM(quantity)
+            FROM order_items
+            GROUP BY menu_item_id
+            """
+            cursor.execute(query)
+            rows = cursor.fetchall()
+
+        return {menu_item_id: int(quantity or 0) for menu_item_id, quantity in rows}
+    except Error as e:
+        error_str = str(e).encode('ascii', 'ignore').decode('ascii')
+        print(f"Error retrieving menu item popularity: {error_str}")
+        return {}
 
 # Order-related functions
-def create_order(user_id, business_id, menu_item_id, quantity, total_amount, 
-                customer_name, customer_phone, customer_email, delivery_address,
-                payment_method='Cash on Delivery', special_instructions=None):
-    """Create a new order with the specified items"""
+
+# Student discount applied to orders of verified students
+STUDENT_DISCOUNT_PERCENTAGE = student_discount_percentage
+
+# Most distinct dishes accepted in one cart order
+MAX_CART_ITEMS = 50
+
+class OrderError(str):
+    """Failure message of create_cart_order with a `code` callers can branch on.
+
+    Still a str, so it can be shown as-is; the code stays fixed when the wording changes.
+    """
+
+    INVALID = 'invalid'          # bad quantities, empty or oversized cart, mixed restaurants
+    NOT_FOUND = 'not_found'      # a menu item doesn't exist
+    UNAVAILABLE = 'unavailable'  # a menu item is switched off
+    DATABASE = 'database'
+
+    def __new__(cls, code, message):
+        error = super().__new__(cls, message)
+        error.code = code
+        return error
+
+# Round trips needed to place an order: joined read, version, order insert, items insert,
+# journal event, commit
+ORDER_PLACEMENT_QUERY_BUDGET = 6
+
+_ORDER_EVENT_INSERT = """
+INSERT INTO order_events (version, order_id, business_id, user_id, event_type, status, total_amount)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+def _next_order_version(cursor):
+    """Take the next value of the global order version sequence (see orders.version).
+
+    The sequence row stays locked until the caller's transaction ends, so order writes
+    commit in version order and a change-feed reader that has seen version N will never
+    later find a smaller version appearing. Call it as late as possible in the transaction.
+    datagen.py reserves whole batches through the same backend method.
+    """
+    return _backend.reserve_order_versions(cursor)
+
+def create_cart_order(user_id, cart_items, customer_name, customer_phone, customer_email,
+                      delivery_address, payment_method='Cash on Delivery', special_instructions=None):
+    """Create one order for one or more menu items of the same business.
+
+    cart_items is a list of {'menu_item_id': id, 'quantity': n}; repeated items are merged.
+    Everything runs on one pooled connection in one transaction: a single joined query
+    reads the menu items, their business and the user's discount eligibility, then the
+    order, all of its order_items rows and its 'created' journal event are inserted. The student discount is applied
+    once to the cart total. Stays within ORDER_PLACEMENT_QUERY_BUDGET round trips.
+    Returns (True, order_id) or (False, OrderError).
+    """
+    # Merge repeated items and validate quantities before touching the database
+    quantities = {}
     try:
-        # Check if user is eligible for student discount
-        discount_applied = False
-        discount_percentage = 0.00
-        original_amount = total_amount
-        
-        if is_user_eligible_for_discount(user_id):
-            discount_applied = True
-            discount_percentage = 50.00  # 50% discount for verified students
-            total_amount = total_amount * 0.5  # Apply 50% discount
+        for cart_item in cart_items:
+            menu_item_id = int(cart_item['menu_item_id'])
+            quantity = int(cart_item.get('quantity', 1))
+            if quantity < 1:
+                return False, OrderError(OrderError.INVALID, f"Invalid quantity for menu item {menu_item_id}")
+            quantities[menu_item_id] = quantities.get(menu_item_id, 0) + quantity
+    except (KeyError, TypeError, ValueError):
+        return False, OrderError(OrderError.INVALID, "Each cart item needs a menu_item_id and a quantity")
+    
+    if not quantities:
+        return False, OrderError(OrderError.INVALID, "Cart is empty")
+    if len(quantities) > MAX_CART_ITEMS:
+        return False, OrderError(OrderError.INVALID, f"A cart can hold at most {MAX_CART_ITEMS} different items")
+    
+    try:
+        with db_cursor() as (connection, cursor):
+            # Price and validate every item, and check discount eligibility, in one round trip
+            menu_item_ids = list(quantities)
+            placeholders = ', '.join(['%s'] * len(menu_item_ids))
+            cursor.execute(f"""
+            SELECT m.id, m.business_id, m.item_name, m.price, m.is_available,
+                   u.is_student, u.is_verified, u.discount_eligible
+            FROM menu_items m
+            JOIN businesses b ON m.business_id = b.id
+            LEFT JOIN users u ON u.id = %s
+            WHERE m.id IN ({placeholders})
+            """, [user_id] + menu_item_ids)
+            rows = cursor.fetchall()
+            menu_items = {row[0]: row for row in rows}
             
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        # First, get the menu item details
-        menu_item_query = """
-        SELECT item_name, price
-        FROM menu_items
-        WHERE id = %s
-        """
-        cursor.execute(menu_item_query, (menu_item_id,))
-        menu_item = cursor.fetchone()
-        
-        if not menu_item:
-            cursor.close()
-            connection.close()
-            return False, "Menu item not found"
-        
-        # Create the order record
-        order_query = """
-        INSERT INTO orders (user_id, business_id, total_amount, delivery_address, 
-                           customer_name, customer_phone, customer_email, 
-                           payment_method, special_instructions, discount_applied, discount_percentage)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        cursor.execute(order_query, (
-            user_id, business_id, total_amount, delivery_address,
-            customer_name, customer_phone, customer_email, 
-            payment_method, special_instructions, discount_applied, discount_percentage
-        ))
-        
-        # Get the new order ID
-        order_id = cursor.lastrowid
-        
-        # Add the order item
-        order_item_query = """
-        INSERT INTO order_items (order_id, menu_item_id, item_name, quantity, price)
-        VALUES (%s, %s, %s, %s, %s)
-        """
-        cursor.execute(order_item_query, (
-            order_id, menu_item_id, menu_item[0], quantity, menu_item[1]
-        ))
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        
+            missing = [menu_item_id for menu_item_id in menu_item_ids if menu_item_id not in menu_items]
+            if missing:
+                return False, OrderError(OrderError.NOT_FOUND, f"Menu item {missing[0]} not found")
+            
+            unavailable = [row[2] for row in menu_items.values() if not row[4]]
+            if unavailable:
+                return False, OrderError(OrderError.UNAVAILABLE, f"{unavailable[0]} is currently unavailable")
+            
+            business_ids = {row[1] for row in menu_items.values()}
+            if len(business_ids) > 1:
+                return False, OrderError(OrderError.INVALID, "All items in a cart must come from the same restaurant")
+            business_id = business_ids.pop()
+            
+            original_amount = sum(float(menu_items[menu_item_id][3]) * quantity
+                                  for menu_item_id, quantity in quantities.items())
+            
+            # Check if user is eligible for student discount - applied once to the whole cart
+            discount_applied = False
+            discount_percentage = 0.00
+            total_amount = original_amount
+            is_student, is_verified, discount_eligible = rows[0][5:8]
+            if discount_eligible or (is_student and is_verified):
+                discount_applied = True
+                discount_percentage = STUDENT_DISCOUNT_PERCENTAGE
+                total_amount = original_amount * (100 - discount_percentage) / 100
+            
+            # Create the order record
+            version = _next_order_version(cursor)
+            order_query = """
+            INSERT INTO orders (user_id, business_id, total_amount, delivery_address, 
+                               customer_name, customer_phone, customer_email, 
+                               payment_method, special_instructions, discount_applied, discount_percentage,
+                               version)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            cursor.execute(order_query, (
+                user_id, business_id, round(total_amount, 2), delivery_address,
+                customer_name, customer_phone, customer_email, 
+                payment_method, special_instructions, discount_applied, discount_percentage,
+                version
+            ))
+            order_id = cursor.lastrowid
+            
+            # Add all order items in one batch
+            order_item_query = """
+            INSERT INTO order_items (order_id, menu_item_id, item_name, quantity, price)
+            VALUES (%s, %s, %s, %s, %s)
+            """
+            cursor.executemany(order_item_query, [
+                (order_id, menu_item_id, menu_items[menu_item_id][2], quantity, menu_items[menu_item_id][3])
+                for menu_item_id, quantity in quantities.items()
+            ])
+            
+            cursor.execute(_ORDER_EVENT_INSERT, (version, order_id, business_id, user_id, 'created', 'pending',
+                                                 round(total_amount, 2)))
+            
+            connection.commit()
+
+        _notify_order(order_id, business_id, 'pending', version)
         return True, order_id
     except Error as e:
         error_str = str(e).encode('ascii', 'ignore').decode('ascii')
-        print(f"Error creating order: {error_str}")
-        return False, error_str
+        print(f"Error creating cart order: {error_str}")
+        return False, OrderError(OrderError.DATABASE, "Database error")
+
+# Orders per IN (...) batch when loading order items
+ORDER_ITEMS_BATCH_SIZE = 1000
+
+def _attach_order_items(cursor, orders, columns):
+    """Load the items of all given orders with batched IN queries and attach them as order['items']"""
+    items_by_order = {order['id']: [] for order in orders}
+    order_ids = list(items_by_order)
+    
+    for start in range(0, len(order_ids), ORDER_ITEMS_BATCH_SIZE):
+        batch = order_ids[start:start + ORDER_ITEMS_BATCH_SIZE]
+        placeholders = ', '.join(['%s'] * len(batch))
+        items_query = f"""
+        SELECT oi.order_id, {columns}
+        FROM order_items oi
+        WHERE oi.order_id IN ({placeholders})
+        ORDER BY oi.order_id, oi.id
+        """
+        cursor.execute(items_query, batch)
+        for item in cursor.fetchall():
+            items_by_order[item.pop('order_id')].append(item)
+    
+    for order in orders:
+        order['items'] = items_by_order[order['id']]
+
+def _add_original_amounts(orders):
+    """Back-calculate the pre-discount amount of discounted orders as order['original_amount']"""
+    for order in orders:
+        if order.get('discount_applied'):
+            discount_percentage = float(order.get('discount_percentage', 0))
+            current_amount = float(order['total_amount'])
+            if discount_percentage > 0:
+                original_amount = current_amount * 100 / (100 - discount_percentage)
+                order['original_amount'] = round(original_amount, 2)
 
 def get_orders_by_business(business_id):
     """Get all orders for a specific business"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        # Get all orders for this business - update query to include discount info
-        query = """
-        SELECT o.id, o.user_id, o.order_date, o.status, o.total_amount, o.delivery_address,
-               o.customer_name, o.customer_phone, o.customer_email, o.payment_method,
-               o.special_instructions, o.discount_applied, o.discount_percentage
-        FROM orders o
-        WHERE o.business_id = %s
-        ORDER BY o.order_date DESC
-        """
-        cursor.execute(query, (business_id,))
-        orders = cursor.fetchall()
-        
-        # For each order, get its items
-        for order in orders:
-            items_query = """
-            SELECT oi.id, oi.menu_item_id, oi.item_name, oi.quantity, oi.price
-            FROM order_items oi
-            WHERE oi.order_id = %s
+        with db_cursor(dictionary=True, read_only=True) as (connection, cursor):
+            # Get all orders for this business - update query to include discount info
+            query = """
+            SELECT o.id, o.user_id, o.order_date, o.status, o.total_amount, o.delivery_address,
+                   o.customer_name, o.customer_phone, o.customer_email, o.payment_method,
+                   o.special_instructions, o.discount_applied, o.discount_percentage
+            FROM orders o
+            WHERE o.business_id = %s
+            ORDER BY o.order_date DESC
             """
-            cursor.execute(items_query, (order['id'],))
-            order['items'] = cursor.fetchall()
-            
-            # Add original price info if discount applied
-            if order.get('discount_applied'):
-                discount_percentage = float(order.get('discount_percentage', 0))
-                current_amount = float(order['total_amount'])
-                if discount_percentage > 0:
-                    original_amount = current_amount * 100 / (100 - discount_percentage)
-                    order['original_amount'] = round(original_amount, 2)
-        
-        cursor.close()
-        connection.close()
+            cursor.execute(query, (business_id,))
+            orders = cursor.fetchall()
         
+            # Fetch the items of every order with batched IN queries instead of one query per order
+            _attach_order_items(cursor, orders, "oi.id, oi.menu_item_id, oi.item_name, oi.quantity, oi.price")
+
+        # Add original price info if discount applied
+        _add_original_amounts(orders)
+
         return orders
     except Error as e:
         error_str = str(e).encode('ascii', 'ignore').decode('ascii')
         print(f"Error retrieving orders: {error_str}")
         return []
 
-def get_orders_by_user(user_id):
-    """Get all orders for a specific user"""
+# Keyset pagination for the business order list
+ORDERS_PAGE_DEFAULT_LIMIT = 50
+ORDERS_PAGE_MAX_LIMIT = 200
+
+def encode_order_cursor(order):
+    """Build an opaque pagination cursor from the (order_date, id) of the last order on a page"""
+    order_date = order['order_date']
+    if isinstance(order_date, datetime):
+        order_date = order_date.isoformat()
+    raw = json.dumps([order_date, order['id']]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_order_cursor(cursor_token):
+    """Turn a pagination cursor back into (order_date, id); raises ValueError if it is malformed"""
+    try:
+        padded = cursor_token + '=' * (-len(cursor_token) % 4)
+        order_date, order_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(order_date), int(order_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor_token}") from e
+
+def _business_order_filters(business_id, status=None, date_from=None, date_to=None):
+    """Build the WHERE clause shared by the paginated order list and its summary"""
+    conditions = ["o.business_id = %s"]
+    params = [business_id]
+    
+    if status:
+        conditions.append("o.status = %s")
+        params.append(status)
+    
+    if date_from:
+        conditions.append("o.order_date >= %s")
+        params.append(date_from)
+    
+    if date_to:
+        conditions.append("o.order_date < %s")
+        params.append(date_to)
+    
+    return conditions, params
+
+def get_orders_page_by_business(business_id, limit=ORDERS_PAGE_DEFAULT_LIMIT, cursor=None,
+                                status=None, date_from=None, date_to=None):
+    """Get one page of a business's orders, newest first, using keyset pagination on (order_date, id).
+
+    Returns a dict with the orders and the cursor for the next page (None on the last page).
+    Served by the orders(business_id, order_date, id) and
+    orders(business_id, status, order_date, id) indexes.
+    """
+    limit = max(1, min(int(limit), ORDERS_PAGE_MAX_LIMIT))
+    conditions, params = _business_order_filters(business_id, status, date_from, date_to)
+    
+    if cursor:
+        last_date, last_id = decode_order_cursor(cursor)
+        conditions.append("(o.order_date < %s OR (o.order_date = %s AND o.id < %s))")
+        params.extend([last_date, last_date, last_id])
+    
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
+        with db_cursor(dictionary=True, read_only=True) as (connection, db_cur):
+            # Fetch one extra row to know whether another page exists
+            query = f"""
+            SELECT o.id, o.user_id, o.order_date, o.status, o.total_amount, o.delivery_address,
+                   o.customer_name, o.customer_phone, o.customer_email, o.payment_method,
+                   o.special_instructions, o.discount_applied, o.discount_percentage
+            FROM orders o
+            WHERE {' AND '.join(conditions)}
+            ORDER BY o.order_date DESC, o.id DESC
+            LIMIT %s
+            """
+            db_cur.execute(query, params + [limit + 1])
+            orders = db_cur.fetchall()
+            
+            has_more = len(orders) > limit
+            orders = orders[:limit]
+            
+            _attach_order_items(db_cur, orders, "oi.id, oi.menu_item_id, oi.item_name, oi.quantity, oi.price")
         
-        # Get all orders for this user
-        query = """
-        SELECT o.id, o.business_id, b.business_name, o.order_date, o.status, 
-               o.total_amount, o.delivery_address, o.payment_method,
-               o.discount_applied, o.discount_percentage
-        FROM orders o
-        JOIN businesses b ON o.business_id = b.id
-        WHERE o.user_id = %s
-        ORDER BY o.order_date DESC
-        """
-        cursor.execute(query, (user_id,))
-        orders = cursor.fetchall()
+        # Add original price info if discount applied
+        _add_original_amounts(orders)
         
-        # For each order, get its items
-        for order in orders:
-            items_query = """
-            SELECT oi.id, oi.item_name, oi.quantity, oi.price
-            FROM order_items oi
-            WHERE oi.order_id = %s
+        return {
+            'orders': orders,
+            'next_cursor': encode_order_cursor(orders[-1]) if has_more else None
+        }
+    except Error as e:
+        error_str = str(e).encode('ascii', 'ignore').decode('ascii')
+        print(f"Error retrieving orders page: {error_str}")
+        return {'orders': [], 'next_cursor': None}
+
+def get_business_order_summary(business_id, status=None, date_from=None, date_to=None):
+    """Get the order count, non-cancelled revenue and newest order id of a business, computed in the database"""
+    conditions, params = _business_order_filters(business_id, status, date_from, date_to)
+    try:
+        with db_cursor(dictionary=True, read_only=True) as (connection, cursor):
+            query = f"""
+            SELECT COUNT(*) AS order_count,
+                   COALESCE(SUM(CASE WHEN o.status <> 'cancelled' THEN o.total_amount ELSE 0 END), 0) AS total_revenue,
+                   COALESCE(MAX(o.id), 0) AS newest_order_id
+            FROM orders o
+            WHERE {' AND '.join(conditions)}
             """
-            cursor.execute(items_query, (order['id'],))
-            order['items'] = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
+            cursor.execute(query, params)
+            summary = cursor.fetchone()
+        
+        return {
+            'order_count': int(summary['order_count']),
+            'total_revenue': round(float(summary['total_revenue']), 2),
+            'newest_order_id': int(summary['newest_order_id'])
+        }
+    except Error as e:
+        error_str = str(e).encode('ascii', 'ignore').decode('ascii')
+        print(f"Error retrieving order summary: {error_str}")
+        return {'order_count': 0, 'total_revenue': 0.0, 'newest_order_id': 0}
+
+# Change feed for the business dashboard (/api/business/orders?since=<version>)
+ORDER_CHANGES_MAX_LIMIT = 500
+
+def get_business_order_version(business_id):
+    """Get the newest order version of a business (0 if it has no orders)"""
+    try:
+        with db_cursor(read_only=True) as (connection, cursor):
+            cursor.execute("SELECT COALESCE(MAX(version), 0) FROM orders WHERE business_id = %s", (business_id,))
+            return int(cursor.fetchone()[0])
+    except Error as e:
+        error_str = str(e).encode('ascii', 'ignore').decode('ascii')
+        print(f"Error retrieving order version: {error_str}")
+        return None
+
+def get_order_changes(business_id, since, limit=ORDER_CHANGES_MAX_LIMIT):
+    """Get a business's orders created or changed after version `since`, oldest change first.
+
+    Cancelled orders come back as tombstones ({'id', 'status', 'version'}) instead of full
+    rows. Returns {'version', 'orders', 'tombstones', 'has_more'}; the client passes
+    'version' as the next `since`. Orders that share a version (written in one transaction)
+    are never split across responses. Served by the orders(business_id, version) index.
+    Returns None on a database error.
+    """
+    limit = max(1, min(int(limit), ORDER_CHANGES_MAX_LIMIT))
+    columns = """o.id, o.user_id, o.order_date, o.status, o.total_amount, o.delivery_address,
+                 o.customer_name, o.customer_phone, o.customer_email, o.payment_method,
+                 o.special_instructions, o.discount_applied, o.discount_percentage, o.version"""
+    try:
+        with db_cursor(dictionary=True, read_only=True) as (connection, cursor):
+            cursor.execute(f"""
+            SELECT {columns}
+            FROM orders o
+            WHERE o.business_id = %s AND o.version > %s
+            ORDER BY o.version, o.id
+            LIMIT %s
+            """, (business_id, since, limit + 1))
+            rows = cursor.fetchall()
+
+            has_more = len(rows) > limit
+            if has_more:
+                boundary = rows[limit]['version']
+                rows = [row for row in rows if row['version'] < boundary]
+                if not rows:
+                    # One transaction changed more orders than fit a page; send all of them
+                    cursor.execute(f"""
+                    SELECT {columns}
+                    FROM orders o
+                    WHERE o.business_id = %s AND o.version = %s
+                    ORDER BY o.id
+                    """, (business_id, boundary))
+                    rows = cursor.fetchall()
+
+            orders = [row for row in rows if row['status'] != 'cancelled']
+            tombstones = [{'id': row['id'], 'status': row['status'], 'version': row['version']}
+                          for row in rows if row['status'] == 'cancelled']
+            _attach_order_items(cursor, orders, "oi.id, oi.menu_item_id, oi.item_name, oi.quantity, oi.price")
+
+        _add_original_amounts(orders)
+
+        return {
+            'version': rows[-1]['version'] if rows else since,
+            'orders': orders,
+            'tombstones': tombstones,
+            'has_more': has_more
+        }
+    except Error as e:
+        error_str = str(e).encode('ascii', 'ignore').decode('ascii')
+        print(f"Error retrieving order changes: {error_str}")
+        return None
+
+# Order event journal (order_events): one row per order write, in version order
+ORDER_EVENTS_MAX_LIMIT = 5000
+
+def get_order_events(after_version, limit=1000, business_id=None, order_id=None):
+    """Read journal events with a version greater than after_version, oldest first.
+
+    Returns {'events', 'version', 'has_more', 'oldest_version'}; consumers pass 'version'
+    back as after_version. Events written in one transaction are never split across
+    reads. If after_version is older than oldest_version - 1, retention has already
+    dropped events the consumer never saw and it should resync from the orders table.
+    Returns None on a database error.
+    """
+    limit = max(1, min(int(limit), ORDER_EVENTS_MAX_LIMIT))
+    conditions = ["e.version > %s"]
+    params = [after_version]
+    if business_id is not None:
+        conditions.append("e.business_id = %s")
+        params.append(business_id)
+    if order_id is not None:
+        conditions.append("e.order_id = %s")
+        params.append(order_id)
+    
+    columns = "e.version, e.order_id, e.business_id, e.user_id, e.event_type, e.status, e.total_amount, e.created_at"
+    try:
+        with db_cursor(dictionary=True, read_only=True) as (connection, cursor):
+            cursor.execute(f"""
+            SELECT {columns}
+            FROM order_events e
+            WHERE {' AND '.join(conditions)}
+            ORDER BY e.version, e.order_id
+            LIMIT %s
+            """, params + [limit + 1])
+            events = cursor.fetchall()
+            
+            has_more = len(events) > limit
+            if has_more:
+                boundary = events[limit]['version']
+                events = [event for event in events if event['version'] < boundary]
+                if not events:
+                    cursor.execute(f"""
+                    SELECT {columns}
+                    FROM order_events e
+                    WHERE {' AND '.join(conditions[1:] + ["e.version = %s"])}
+                    ORDER BY e.order_id
+                    """, params[1:] + [boundary])
+                    events = cursor.fetchall()
+            
+            cursor.execute("SELECT MIN(version) AS oldest_version FROM order_events")
+            oldest_version = cursor.fetchone()['oldest_version']
+        
+        return {
+            'events': events,
+            'version': events[-1]['version'] if events else after_version,
+            'has_more': has_more,
+            'oldest_version': oldest_version
+        }
+    except Error as e:
+        error_str = str(e).encode('ascii', 'ignore').decode('ascii')
+        print(f"Error reading order events: {error_str}")
+        return None
+
+def compact_order_events(retention_days, compact_after_days=None, batch_size=5000):
+    """Trim the order event journal in short batched transactions.
+
+    Compaction: events older than compact_after_days that a newer event of the same
+    order supersedes are removed, so each settled order keeps its latest event.
+    Retention: every event older than retention_days is removed.
+    Returns (True, {'compacted': n, 'expired': m}) or (False, error).
+    """
+    counts = {'compacted': 0, 'expired': 0}
+    now = datetime.now()
+    try:
+        with db_cursor() as (connection, cursor):
+            if compact_after_days is not None:
+                cutoff = now - timedelta(days=compact_after_days)
+                after_version = 0
+                while True:
+                    # Walk the journal in version order; old events sit at the start of the primary key
+                    cursor.execute("""
+                    SELECT DISTINCT e.version, e.order_id
+                    FROM order_events e
+                    JOIN order_events later ON later.order_id = e.order_id AND later.version > e.version
+                    WHERE e.version > %s AND e.created_at < %s
+                    ORDER BY e.version, e.order_id
+                    LIMIT %s
+                    """, (after_version, cutoff, batch_size))
+                    superseded = cursor.fetchall()
+                    if not superseded:
+                        break
+                    placeholders = ', '.join(['(%s, %s)'] * len(superseded))
+                    cursor.execute(f"DELETE FROM order_events WHERE (version, order_id) IN ({placeholders})",
+                                   [value for row in superseded for value in row])
+                    counts['compacted'] += cursor.rowcount
+                    connection.commit()
+                    # Events sharing the last version may be left over; they are picked up again
+                    after_version = superseded[-1][0] - 1
+            
+            cutoff = now - timedelta(days=retention_days)
+            while True:
+                cursor.execute("""
+                SELECT MAX(version) FROM (
+                    SELECT version FROM order_events WHERE created_at < %s ORDER BY version LIMIT %s
+                ) expired
+                """, (cutoff, batch_size))
+                upper = cursor.fetchone()[0]
+                if upper is None:
+                    break
+                cursor.execute("DELETE FROM order_events WHERE version <= %s AND created_at < %s", (upper, cutoff))
+                counts['expired'] += cursor.rowcount
+                connection.commit()
+        
+        return True, counts
+    except Error as e:
+        error_str = str(e).encode('ascii', 'ignore').decode('ascii')
+        print(f"Error compacting order events: {error_str}")
+        return False, "Database error"
+
+def get_orders_by_user(user_id):
+    """Get all orders for a specific user"""
+    try:
+        with db_cursor(dictionary=True, read_only=True) as (connection, cursor):
+            # Get all orders for this user
+            query = """
+            SELECT o.id, o.business_id, b.business_name, o.order_date, o.status, 
+                   o.total_amount, o.delivery_address, o.payment_method,
+                   o.discount_applied, o.discount_percentage
+            FROM orders o
+            JOIN businesses b ON o.business_id = b.id
+            WHERE o.user_id = %s
+            ORDER BY o.order_date DESC
+            """
+            cursor.execute(query, (user_id,))
+            orders = cursor.fetchall()
         
+            # Fetch the items of every order with batched IN queries instead of one query per order
+            _attach_order_items(cursor, orders, "oi.id, oi.item_name, oi.quantity, oi.price")
+
         return orders
     except Error as e:
         error_str = str(e).encode('ascii', 'ignore').decode('ascii')
@@ -697,193 +1503,210 @@ def get_orders_by_user(user_id):
         return []
 
 def update_order_status(order_id, status):
-    """Update the status of an order"""
+    """Update the status of an order and journal it as a 'status' event"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        query = "UPDATE orders SET status = %s WHERE id = %s"
-        cursor.execute(query, (status, order_id))
-        connection.commit()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor() as (connection, cursor):
+            cursor.execute("SELECT business_id, user_id, total_amount, status FROM orders WHERE id = %s", (order_id,))
+            row = cursor.fetchone()
+            if row is None or row[3] == status:
+                # Unknown order or no actual change
+                connection.rollback()
+                return True, "Order status updated successfully"
+            business_id, user_id, total_amount = row[:3]
+
+            # The sequence lock is held from here to the commit: one row update and one insert
+            version = _next_order_version(cursor)
+            query = "UPDATE orders SET status = %s, version = %s WHERE id = %s AND status <> %s"
+            cursor.execute(query, (status, version, order_id, status))
+            if cursor.rowcount == 0:
+                # A concurrent update got there first - give the version back
+                connection.rollback()
+                return True, "Order status updated successfully"
+            cursor.execute(_ORDER_EVENT_INSERT, (version, order_id, business_id, user_id, 'status', status,
+                                                 total_amount))
+            connection.commit()
+
+        _notify_order(order_id, business_id, status, version)
         return True, "Order status updated successfully"
     except Error as e:
         error_str = str(e).encode('ascii', 'ignore').decode('ascii')
         print(f"Error updating order status: {error_str}")
         return False, "Database error"
 
+def get_order_status(order_id):
+    """Get just the status of an order (None if the order doesn't exist).
+
+    Always read from the primary: tracking streams compare it against the changes they
+    were sent, and a lagging replica would report a status that was already replaced.
+    """
+    try:
+        with db_cursor() as (connection, cursor):
+            cursor.execute("SELECT status FROM orders WHERE id = %s", (order_id,))
+            row = cursor.fetchone()
+
+        return row[0] if row else None
+    except Error as e:
+        error_str = str(e).encode('ascii', 'ignore').decode('ascii')
+        print(f"Error retrieving order status: {error_str}")
+        return None
+
+def get_order_version(order_id):
+    """Get (version, business_name) of an order for conditional GETs (None if the order doesn't exist).
+
+    get_order_by_id joins in the business name, which a rename changes without bumping the
+    order version, so the ETag has to cover it too.
+    """
+    try:
+        with db_cursor(read_only=True) as (connection, cursor):
+            query = """
+            SELECT o.version, b.business_name
+            FROM orders o
+            JOIN businesses b ON o.business_id = b.id
+            WHERE o.id = %s
+            """
+            cursor.execute(query, (order_id,))
+            row = cursor.fetchone()
+
+        return (row[0], row[1]) if row else None
+    except Error as e:
+        error_str = str(e).encode('ascii', 'ignore').decode('ascii')
+        print(f"Error retrieving order version: {error_str}")
+        return None
+
 def get_order_by_id(order_id):
     """Get detailed information about a specific order"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        # Get the order details
-        query = """
-        SELECT o.id, o.user_id, o.business_id, b.business_name, o.order_date, o.status, 
-               o.total_amount, o.delivery_address, o.customer_name, o.customer_phone, 
-               o.customer_email, o.payment_method, o.special_instructions,
-               o.discount_applied, o.discount_percentage
-        FROM orders o
-        JOIN businesses b ON o.business_id = b.id
-        WHERE o.id = %s
-        """
-        cursor.execute(query, (order_id,))
-        order = cursor.fetchone()
+        with db_cursor(dictionary=True, read_only=True) as (connection, cursor):
+            # Get the order details
+            query = """
+            SELECT o.id, o.user_id, o.business_id, b.business_name, o.order_date, o.status, 
+                   o.total_amount, o.delivery_address, o.customer_name, o.customer_phone, 
+                   o.customer_email, o.payment_method, o.special_instructions,
+                   o.discount_applied, o.discount_percentage, o.version
+            FROM orders o
+            JOIN businesses b ON o.business_id = b.id
+            WHERE o.id = %s
+            """
+            cursor.execute(query, (order_id,))
+            order = cursor.fetchone()
         
-        if not order:
-            cursor.close()
-            connection.close()
-            return None
+            if not order:
+                return None
             
-        # Get the order items
-        items_query = """
-        SELECT id, menu_item_id, item_name, quantity, price
-        FROM order_items
-        WHERE order_id = %s
-        """
-        cursor.execute(items_query, (order_id,))
-        order['items'] = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
-        
+            # Get the order items
+            items_query = """
+            SELECT id, menu_item_id, item_name, quantity, price
+            FROM order_items
+            WHERE order_id = %s
+            """
+            cursor.execute(items_query, (order_id,))
+            order['items'] = cursor.fetchall()
+
         return order
     except Error as e:
         error_str = str(e).encode('ascii', 'ignore').decode('ascii')
         print(f"Error retrieving order details: {error_str}")
         return None
 
-def fix_menu_items_table():
-    """Check and fix the menu_items table if business_id column is missing"""
-    try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        # Check if business_id column exists
-        cursor.execute("SHOW COLUMNS FROM menu_items LIKE 'business_id'")
-        has_business_id = cursor.fetchone() is not None
-        
-        if not has_business_id:
-            print("The business_id column is missing from menu_items table. Attempting to add it...")
-            
-            # Add the business_id column with a default value of 1
-            cursor.execute("""
-            ALTER TABLE menu_items 
-            ADD COLUMN business_id INT NOT NULL DEFAULT 1,
-            ADD CONSTRAINT fk_menu_business
-            FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE
-            """)
-            connection.commit()
-            print("Successfully added business_id column to menu_items table.")
-        
-        cursor.close()
-        connection.close()
-        
-        return True
-    except Error as e:
-        error_str = str(e).encode('ascii', 'ignore').decode('ascii')
-        print(f"Error fixing menu_items table: {error_str}")
-        return False
+# Users per IN (...) batch when verifying students in bulk
+VERIFY_STUDENTS_BATCH_SIZE = 1000
 
-def verify_student(user_id, verified=True):
-    """Verify a student's ID card and make them eligible for discount"""
+def verify_students(user_ids, verified=True):
+    """Verify or reject the student IDs of several users, one transaction per batch of users.
+
+    Verified users become discount eligible and every order of theirs that has no
+    discount yet is discounted with one set-based UPDATE per batch. Each batch takes its
+    own order version just before that UPDATE and commits right after, so the order
+    sequence lock is never held across batches.
+    Returns (True, {'users_updated': n, 'orders_discounted': m}) or (False, error).
+    """
+    user_ids = list(dict.fromkeys(int(user_id) for user_id in user_ids))
+    counts = {'users_updated': 0, 'orders_discounted': 0}
+    if not user_ids:
+        return True, counts
+    
+    committed = []
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        print(f"==== STUDENT VERIFICATION ====")
-        print(f"Verifying student ID for user {user_id}, setting verified to {verified}")
-        
-        # First update user verification status
-        # Changed to allow verifying users not already marked as students
-        query = """
-        UPDATE users 
-        SET is_student = TRUE, is_verified = %s, discount_eligible = %s
-        WHERE id = %s
-        """
-        cursor.execute(query, (verified, verified, user_id))
-        print(f"Updated user verification status. Rows affected: {cursor.rowcount}")
-        
-        # If verifying (not rejecting), update any existing orders to apply the discount
-        if verified:
-            print(f"Applying discount to existing orders for user {user_id}")
-            # Get all pending and accepted orders for this user - don't limit by status
-            orders_query = """
-            SELECT id, total_amount, discount_applied 
-            FROM orders 
-            WHERE user_id = %s
-            """
-            cursor.execute(orders_query, (user_id,))
-            orders = cursor.fetchall()
-            
-            print(f"Found {len(orders)} orders to update")
-            
-            total_updated = 0
-            # Apply 50% discount to each order
-            for order in orders:
-                order_id = order[0]
-                original_amount = float(order[1])
-                discount_already_applied = order[2] if len(order) > 2 else False
-                
-                print(f"Processing order {order_id}: Amount: {original_amount}, Discount applied: {discount_already_applied}")
+        with db_cursor() as (connection, cursor):
+            for start in range(0, len(user_ids), VERIFY_STUDENTS_BATCH_SIZE):
+                batch = user_ids[start:start + VERIFY_STUDENTS_BATCH_SIZE]
+                placeholders = ', '.join(['%s'] * len(batch))
                 
-                if discount_already_applied:
-                    print(f"Order {order_id} already has a discount applied - skipping")
-                    continue
-                
-                # Apply 50% discount if not already applied
-                discounted_amount = original_amount * 0.5
-                print(f"Updating order {order_id}: Original amount: {original_amount}, Discounted: {discounted_amount}")
-                
-                update_query = """
-                UPDATE orders 
-                SET discount_applied = TRUE, 
-                    discount_percentage = 50.0,
-                    total_amount = %s
-                WHERE id = %s
+                # Update user verification status
+                # Changed to allow verifying users not already marked as students
+                query = f"""
+                UPDATE users 
+                SET is_student = TRUE, is_verified = %s, discount_eligible = %s
+                WHERE id IN ({placeholders})
                 """
-                cursor.execute(update_query, (discounted_amount, order_id))
-                updated_rows = cursor.rowcount
-                if updated_rows > 0:
-                    total_updated += 1
-                print(f"Order {order_id} update attempted. Rows affected: {updated_rows}")
-            
-            print(f"Total orders updated with discount: {total_updated} out of {len(orders)}")
+                cursor.execute(query, [verified, verified] + batch)
+                users_updated = cursor.rowcount
+                orders_discounted = 0
                 
-        connection.commit()
-        print(f"Changes committed to database")
-        
-        cursor.close()
-        connection.close()
-        
-        return True, "Student verification updated successfully"
-            
+                # If verifying (not rejecting), apply the discount to existing orders - don't limit by status.
+                # Discounted orders show up in the dashboard change feed; a batch's orders share one version.
+                # Long-polling dashboards notice them on their next database recheck.
+                if verified:
+                    version = _next_order_version(cursor)
+                    query = f"""
+                    UPDATE orders 
+                    SET discount_applied = TRUE, 
+                        discount_percentage = %s,
+                        total_amount = total_amount * (100 - %s) / 100,
+                        version = %s
+                    WHERE user_id IN ({placeholders})
+                    AND (discount_applied = FALSE OR discount_applied IS NULL)
+                    """
+                    cursor.execute(query, [STUDENT_DISCOUNT_PERCENTAGE, STUDENT_DISCOUNT_PERCENTAGE, version] + batch)
+                    orders_discounted = cursor.rowcount
+                    
+                    # Journal the new totals; this batch's orders are the ones carrying this version
+                    query = f"""
+                    INSERT INTO order_events (version, order_id, business_id, user_id, event_type, status, total_amount)
+                    SELECT version, id, business_id, user_id, 'discount', status, total_amount
+                    FROM orders
+                    WHERE user_id IN ({placeholders}) AND version = %s
+                    """
+                    cursor.execute(query, batch + [version])
+                
+                connection.commit()
+                counts['users_updated'] += users_updated
+                counts['orders_discounted'] += orders_discounted
+                committed.extend(batch)
+
+        return True, counts
     except Error as e:
-        print(f"Error verifying student: {e}")
+        print(f"Error verifying students: {e}")
         return False, str(e)
+    finally:
+        # Batches that committed before an error still changed these users
+        for user_id in committed:
+            _user_cache.invalidate(user_id)
+            _notify_change('users', user_id)
+
+def verify_student(user_id, verified=True):
+    """Verify a student's ID card and make them eligible for discount"""
+    success, result = verify_students([user_id], verified)
+    if not success:
+        return False, result
+    
+    if verified:
+        return True, f"Student verification updated successfully ({result['orders_discounted']} orders discounted)"
+    return True, "Student verification updated successfully"
 
 def get_student_verification_requests():
     """Get all users who have submitted student ID cards but are not verified yet"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        query = """
-        SELECT id, name, email, phone, student_id_card, created_at
-        FROM users
-        WHERE is_student = TRUE AND student_id_card IS NOT NULL AND is_verified = FALSE
-        ORDER BY created_at DESC
-        """
-        cursor.execute(query)
-        requests = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor(dictionary=True, read_only=True) as (connection, cursor):
+            query = """
+            SELECT id, name, email, phone, student_id_card, created_at
+            FROM users
+            WHERE is_student = TRUE AND student_id_card IS NOT NULL AND is_verified = FALSE
+            ORDER BY created_at DESC
+            """
+            cursor.execute(query)
+            requests = cursor.fetchall()
+
         return requests
     except Error as e:
         print(f"Error getting student verification requests: {e}")
@@ -892,20 +1715,15 @@ def get_student_verification_requests():
 def is_user_eligible_for_discount(user_id):
     """Check if a user is eligible for student discount"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        query = """
-        SELECT is_student, is_verified, discount_eligible
-        FROM users
-        WHERE id = %s
-        """
-        cursor.execute(query, (user_id,))
-        user = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor(dictionary=True) as (connection, cursor):
+            query = """
+            SELECT is_student, is_verified, discount_eligible
+            FROM users
+            WHERE id = %s
+            """
+            cursor.execute(query, (user_id,))
+            user = cursor.fetchone()
+
         if user:
             # Check if the user is a verified student or otherwise eligible for discount
             return user.get('discount_eligible', False) or (user.get('is_student', False) and user.get('is_verified', False))
@@ -916,56 +1734,48 @@ def is_user_eligible_for_discount(user_id):
         return False
 
 # Subscription management functions
+
+# Short-lived per-user cache of the active subscription, invalidated on every subscription write
+_subscription_cache = TTLCache(ttl=cache_config['subscription_ttl'], name='subscription')
+
 def create_subscription(user_id, plan_name, plan_price):
-    """Create or update a user's subscription"""
+    """Create or update a user's subscription.
+
+    A single upsert keyed on the uq_subscriptions_active_user unique key
+    (see migrations/0004_unique_active_subscription.py): a user's active
+    subscription is updated in place, otherwise a new one is inserted.
+    """
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        # Check if subscription table exists, create if not
-        try:
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS subscriptions (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                plan_name VARCHAR(100) NOT NULL,
-                plan_price DECIMAL(10, 2) NOT NULL,
-                start_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                end_date TIMESTAMP NULL,
-                status VARCHAR(20) DEFAULT 'active',
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-            """)
+        with db_cursor() as (connection, cursor):
+            if BACKEND == 'sqlite':
+                # Same upsert against the partial unique index in database_setup_sqlite.sql
+                query = """
+                INSERT INTO subscriptions (user_id, plan_name, plan_price)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (user_id) WHERE status = 'active' DO UPDATE SET
+                    plan_name = excluded.plan_name,
+                    plan_price = excluded.plan_price,
+                    start_date = CURRENT_TIMESTAMP
+                RETURNING id
+                """
+                cursor.execute(query, (user_id, plan_name, plan_price))
+                subscription_id = cursor.fetchone()[0]
+            else:
+                # LAST_INSERT_ID(id) makes lastrowid return the existing row's id on update
+                query = """
+                INSERT INTO subscriptions (user_id, plan_name, plan_price)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    plan_name = VALUES(plan_name),
+                    plan_price = VALUES(plan_price),
+                    start_date = CURRENT_TIMESTAMP,
+                    id = LAST_INSERT_ID(id)
+                """
+                cursor.execute(query, (user_id, plan_name, plan_price))
+                subscription_id = cursor.lastrowid
             connection.commit()
-        except Error as e:
-            print(f"Error creating subscriptions table: {e}")
-        
-        # Check if user already has a subscription
-        cursor.execute("SELECT id FROM subscriptions WHERE user_id = %s AND status = 'active'", (user_id,))
-        existing_subscription = cursor.fetchone()
-        
-        if existing_subscription:
-            # Update existing subscription
-            subscription_id = existing_subscription[0]
-            query = """
-            UPDATE subscriptions
-            SET plan_name = %s, plan_price = %s, start_date = CURRENT_TIMESTAMP, status = 'active'
-            WHERE id = %s
-            """
-            cursor.execute(query, (plan_name, plan_price, subscription_id))
-        else:
-            # Create new subscription
-            query = """
-            INSERT INTO subscriptions (user_id, plan_name, plan_price)
-            VALUES (%s, %s, %s)
-            """
-            cursor.execute(query, (user_id, plan_name, plan_price))
-            subscription_id = cursor.lastrowid
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        
+
+        _subscription_cache.invalidate(user_id)
         return True, subscription_id
     except Error as e:
         print(f"Error creating subscription: {e}")
@@ -973,30 +1783,31 @@ def create_subscription(user_id, plan_name, plan_price):
 
 def get_user_subscription(user_id):
     """Get the active subscription for a user"""
+    cached = _subscription_cache.get(user_id)
+    if cached is not MISSING:
+        return dict(cached) if cached else None
+    generation = _subscription_cache.generation(user_id)
+    
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        query = """
-        SELECT id, plan_name, plan_price, start_date, end_date, status
-        FROM subscriptions
-        WHERE user_id = %s AND status = 'active'
-        ORDER BY start_date DESC
-        LIMIT 1
-        """
-        cursor.execute(query, (user_id,))
-        subscription = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor(dictionary=True) as (connection, cursor):
+            query = """
+            SELECT id, plan_name, plan_price, start_date, end_date, status
+            FROM subscriptions
+            WHERE user_id = %s AND status = 'active'
+            ORDER BY start_date DESC
+            LIMIT 1
+            """
+            cursor.execute(query, (user_id,))
+            subscription = cursor.fetchone()
+
         # Format dates for JSON serialization
         if subscription and 'start_date' in subscription:
             subscription['start_date'] = subscription['start_date'].isoformat() if subscription['start_date'] else None
         if subscription and 'end_date' in subscription:
             subscription['end_date'] = subscription['end_date'].isoformat() if subscription['end_date'] else None
         
-        return subscription
+        _subscription_cache.set(user_id, subscription, generation)
+        return dict(subscription) if subscription else None
     except Error as e:
         print(f"Error fetching subscription: {e}")
         return None
@@ -1004,20 +1815,16 @@ def get_user_subscription(user_id):
 def cancel_subscription(user_id):
     """Cancel a user's active subscription"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        query = """
-        UPDATE subscriptions
-        SET status = 'cancelled', end_date = CURRENT_TIMESTAMP
-        WHERE user_id = %s AND status = 'active'
-        """
-        cursor.execute(query, (user_id,))
-        connection.commit()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor() as (connection, cursor):
+            query = """
+            UPDATE subscriptions
+            SET status = 'cancelled', end_date = CURRENT_TIMESTAMP
+            WHERE user_id = %s AND status = 'active'
+            """
+            cursor.execute(query, (user_id,))
+            connection.commit()
+
+        _subscription_cache.invalidate(user_id)
         return True
     except Error as e:
         print(f"Error cancelling subscription: {e}")
@@ -1026,23 +1833,18 @@ def cancel_subscription(user_id):
 def get_all_active_subscriptions():
     """Get all active subscriptions with user details"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        query = """
-        SELECT s.id, s.plan_name, s.plan_price, s.start_date, s.status,
-               u.id as user_id, u.name as user_name, u.email as user_email
-        FROM subscriptions s
-        JOIN users u ON s.user_id = u.id
-        WHERE s.status = 'active'
-        ORDER BY s.start_date DESC
-        """
-        cursor.execute(query)
-        subscriptions = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
-        
+        with db_cursor(dictionary=True, read_only=True) as (connection, cursor):
+            query = """
+            SELECT s.id, s.plan_name, s.plan_price, s.start_date, s.status,
+                   u.id as user_id, u.name as user_name, u.email as user_email
+            FROM subscriptions s
+            JOIN users u ON s.user_id = u.id
+            WHERE s.status = 'active'
+            ORDER BY s.start_date DESC
+            """
+            cursor.execute(query)
+            subscriptions = cursor.fetchall()
+
         # Format dates for JSON serialization
         for subscription in subscriptions:
             if 'start_date' in subscription:
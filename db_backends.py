@@ -0,0 +1,192 @@
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache
+
+from db_pool import PoolError
+
+# Storage engines behind db.py, selected with db_backend in config.py.
+#
+# db.py is written against the mysql.connector API: %s placeholders, cursor(dictionary=True),
+# lastrowid/rowcount and mysql.connector.Error. MySQLBackend passes that straight through;
+# SQLiteBackend adapts an embedded sqlite3 database to the same API so the app, the load
+# tests and the benchmarks can run on one box without a MySQL server.
+
+SQLITE_SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database_setup_sqlite.sql')
+
+
+class MySQLBackend:
+    """The production backend: mysql.connector against db_config"""
+
+    name = 'mysql'
+
+    def __init__(self, db_config):
+        import mysql.connector
+        self._connector = mysql.connector
+        self.db_config = db_config
+        self.Error = mysql.connector.Error
+
+    def connect(self, overrides=None):
+        config = dict(self.db_config, **overrides) if overrides else self.db_config
+        return self._connector.connect(**config)
+
+    def reserve_order_versions(self, cursor, count=1):
+        """Advance the order version sequence by count and return the first reserved value"""
+        # LAST_INSERT_ID(expr) hands the new value back in the OK packet, no SELECT needed
+        cursor.execute("UPDATE order_sequence SET value = LAST_INSERT_ID(value + %s) WHERE id = 1", (count,))
+        return cursor.lastrowid - count + 1
+
+
+# SQLite stores DECIMAL and TIMESTAMP columns as text/numbers; convert them back so rows look
+# like mysql.connector rows (Decimal prices with two places, datetime order dates)
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_converter('DECIMAL', lambda value: Decimal(value.decode()).quantize(Decimal('0.01')))
+sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode()))
+
+_PLACEHOLDER_RE = re.compile(r'%(s|%)')
+
+
+@lru_cache(maxsize=512)
+def _to_qmark(operation):
+    """Rewrite a %s-style statement for sqlite3's ? placeholders"""
+    return _PLACEHOLDER_RE.sub(lambda match: '?' if match.group(1) == 's' else '%', operation)
+
+
+class SQLiteCursor:
+    """sqlite3 cursor with the parts of the mysql.connector cursor API that db.py uses"""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def execute(self, operation, params=None):
+        self._cursor.execute(_to_qmark(operation), tuple(params or ()))
+
+    def executemany(self, operation, seq_params):
+        self._cursor.executemany(_to_qmark(operation), [tuple(params) for params in seq_params])
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return (self._row(row) for row in self._cursor)
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """sqlite3 connection with the parts of the mysql.connector connection API that db.py uses"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self._connection.cursor(), dictionary)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+    @property
+    def in_transaction(self):
+        return self._connection.in_transaction
+
+    def ping(self, reconnect=False):
+        self._connection.execute("SELECT 1")
+
+    def is_connected(self):
+        return True
+
+
+class SQLiteBackend:
+    """Embedded single-file database; the schema is created on first connect"""
+
+    name = 'sqlite'
+
+    def __init__(self, sqlite_config):
+        self.path = sqlite_config['path']
+        self.busy_timeout = sqlite_config.get('busy_timeout', 30)
+        self.Error = (sqlite3.Error, PoolError)
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        raw = sqlite3.connect(self.path, timeout=self.busy_timeout,
+                              detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        raw.execute("PRAGMA foreign_keys = ON")
+        raw.execute("PRAGMA journal_mode = WAL")
+        raw.execute("PRAGMA synchronous = NORMAL")
+        return raw
+
+    def connect(self, overrides=None):
+        raw = self._open()
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self.initialize(raw)
+                    self._schema_ready = True
+        return SQLiteConnection(raw)
+
+    def reserve_order_versions(self, cursor, count=1):
+        """Advance the order version sequence by count and return the first reserved value"""
+        cursor.execute("UPDATE order_sequence SET value = value + %s WHERE id = 1 RETURNING value", (count,))
+        return cursor.fetchone()[0] - count + 1
+
+    def initialize(self, raw, verbose=False):
+        """Create the tables (and the test user) unless the database already has them"""
+        exists = raw.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'users'"
+        ).fetchone()[0]
+        if exists:
+            return False
+        with open(SQLITE_SCHEMA_FILE, 'r') as sql_file:
+            raw.executescript(sql_file.read())
+        raw.commit()
+        if verbose:
+            print(f"SQLite database created at {self.path}")
+        return True
+
+
+def create_backend(name, db_config, sqlite_config):
+    """Instantiate the backend named in config.db_backend"""
+    if name == 'mysql':
+        return MySQLBackend(db_config)
+    if name == 'sqlite':
+        return SQLiteBackend(sqlite_config)
+    raise ValueError(f"Unknown db_backend '{name}' (expected 'mysql' or 'sqlite')")
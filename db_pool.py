@@ -0,0 +1,301 @@
+import threading
+import time
+from collections import deque
+
+try:
+    from mysql.connector.errors import PoolError
+except ImportError:
+    # SQLite-only installs (see db_backends.py) don't have mysql.connector
+    class PoolError(Exception):
+        """No connection became available within the pool timeout"""
+
+
+class PooledConnection:
+    """Wrapper around a raw connection that returns itself to the pool on close()"""
+
+    def __init__(self, pool, raw_connection):
+        self._pool = pool
+        self._connection = raw_connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.checked_out = False
+
+    def __getattr__(self, name):
+        # Delegate everything else (cursor, commit, rollback, ...) to the real connection
+        return getattr(self._connection, name)
+
+    @property
+    def raw(self):
+        return self._connection
+
+    def close(self):
+        """Give the connection back to the pool instead of closing the socket"""
+        if self.checked_out:
+            self._pool.release(self)
+
+    def discard(self):
+        """Really close the underlying connection"""
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Thread-safe connection pool with overflow, health checks and idle recycling"""
+
+    def __init__(self, connect, pool_size=5, max_overflow=10, timeout=30,
+                 idle_timeout=300, max_lifetime=3600, pre_ping=True, ping=None, name='default'):
+        self._connect = connect
+        self._ping = ping or (lambda raw: raw.ping(reconnect=False))
+        self.name = name
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.pre_ping = pre_ping
+
+        self._idle = deque()
+        self._lock = threading.Condition()
+        self._open = 0
+        self._in_use = 0
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'closed': 0,
+            'recycled': 0,
+            'failed_pings': 0,
+            'timeouts': 0,
+            'wait_time': 0.0,
+        }
+
+    def _is_stale(self, connection, now):
+        if self.idle_timeout and now - connection.last_used > self.idle_timeout:
+            return True
+        if self.max_lifetime and now - connection.created_at > self.max_lifetime:
+            return True
+        return False
+
+    def _is_healthy(self, connection):
+        if not self.pre_ping:
+            return True
+        try:
+            self._ping(connection.raw)
+            return True
+        except Exception:
+            return False
+
+    def _close(self, connection, reason=None):
+        """Close a connection that will not come back to the pool (lock not held)"""
+        connection.discard()
+        with self._lock:
+            self._open -= 1
+            self._stats['closed'] += 1
+            if reason:
+                self._stats[reason] += 1
+            self._lock.notify()
+
+    def _take(self, deadline):
+        """Pop an idle connection, or reserve a slot for a new one (None); waits while the pool is full"""
+        with self._lock:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+
+                if self._open < self.pool_size + self.max_overflow:
+                    # Reserve the slot before connecting so other threads see it
+                    self._open += 1
+                    return None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolError(f"Connection pool '{self.name}' exhausted "
+                                    f"({self.pool_size} + {self.max_overflow} connections in use)")
+                self._lock.wait(remaining)
+
+    def acquire(self):
+        """Borrow a connection, waiting up to `timeout` seconds when the pool is exhausted"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            connection = self._take(deadline)
+            if connection is None:
+                break
+            # Health checks talk to the server, so they run outside the lock; the popped
+            # connection keeps its slot counted in _open meanwhile
+            if self._is_stale(connection, time.monotonic()):
+                self._close(connection, 'recycled')
+                continue
+            if not self._is_healthy(connection):
+                self._close(connection, 'failed_pings')
+                continue
+            with self._lock:
+                return self._checkout(connection, started)
+
+        # Open the new connection outside the lock so slow handshakes don't block other borrowers
+        try:
+            connection = PooledConnection(self, self._connect())
+        except Exception:
+            with self._lock:
+                self._open -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._stats['created'] += 1
+            return self._checkout(connection, started)
+
+    def _checkout(self, connection, started):
+        connection.checked_out = True
+        self._in_use += 1
+        self._stats['checkouts'] += 1
+        self._stats['wait_time'] += time.monotonic() - started
+        return connection
+
+    def release(self, connection):
+        """Return a borrowed connection to the pool"""
+        with self._lock:
+            if not connection.checked_out:
+                return
+            connection.checked_out = False
+            self._in_use -= 1
+            connection.last_used = time.monotonic()
+
+        # Never hand an open transaction to the next borrower; the rollback is a round trip,
+        # so it runs outside the lock like the health check
+        try:
+            if connection.raw.in_transaction:
+                connection.raw.rollback()
+        except Exception:
+            self._close(connection)
+            return
+
+        if self._is_stale(connection, connection.last_used):
+            self._close(connection, 'recycled')
+            return
+
+        with self._lock:
+            # Overflow connections are closed as soon as they come back
+            if self._open <= self.pool_size:
+                self._idle.append(connection)
+                self._lock.notify()
+                return
+        self._close(connection)
+
+    def dispose(self):
+        """Close every idle connection; borrowed ones are closed when they come back"""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for connection in idle:
+            self._close(connection)
+
+    def stats(self):
+        """Snapshot of pool utilisation counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'name': self.name,
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+            })
+            return stats
+
+
+class ReplicaSet:
+    """Round-robin choice among read replica pools, skipping replicas that are down or lagging.
+
+    `lag_check(raw_connection)` returns how many seconds the replica is behind the primary
+    (None when it is not replicating). It runs at most every `check_interval` seconds per
+    replica; with `max_lag=None` lag is not checked at all. A replica that fails to connect
+    or to report its lag is skipped for `retry_after` seconds.
+    """
+
+    def __init__(self, pools, lag_check=None, max_lag=None, check_interval=5, retry_after=30):
+        self.pools = list(pools)
+        self._lag_check = lag_check
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+
+        self._lock = threading.Lock()
+        self._next = 0
+        self._state = {pool.name: {'lag': None, 'checked_at': None, 'down_until': 0.0} for pool in self.pools}
+        self._stats = {'replica_reads': 0, 'primary_fallbacks': 0, 'lagging': 0, 'failures': 0}
+
+    def _mark_down(self, pool):
+        with self._lock:
+            self._state[pool.name]['down_until'] = time.monotonic() + self.retry_after
+            self._stats['failures'] += 1
+
+    def _lag_is_fresh(self, state, now):
+        return state['checked_at'] is not None and now - state['checked_at'] <= self.check_interval
+
+    def _lag_ok(self, pool, connection):
+        if self.max_lag is None or self._lag_check is None:
+            return True
+        state = self._state[pool.name]
+        now = time.monotonic()
+        if not self._lag_is_fresh(state, now):
+            # Benign race: two threads may both refresh the same replica's lag
+            lag = self._lag_check(connection.raw)
+            with self._lock:
+                state['lag'] = lag
+                state['checked_at'] = now
+        return state['lag'] is not None and state['lag'] <= self.max_lag
+
+    def acquire(self):
+        """Borrow a connection from a usable replica, or return None to read from the primary"""
+        for _ in range(len(self.pools)):
+            with self._lock:
+                pool = self.pools[self._next % len(self.pools)]
+                self._next += 1
+                state = self._state[pool.name]
+                now = time.monotonic()
+                if state['down_until'] > now:
+                    continue
+                if self.max_lag is not None and self._lag_is_fresh(state, now) and \
+                        (state['lag'] is None or state['lag'] > self.max_lag):
+                    # Known to be behind; don't bother borrowing a connection
+                    self._stats['lagging'] += 1
+                    continue
+
+            try:
+                connection = pool.acquire()
+            except Exception:
+                self._mark_down(pool)
+                continue
+
+            try:
+                usable = self._lag_ok(pool, connection)
+            except Exception:
+                connection.close()
+                self._mark_down(pool)
+                continue
+
+            if not usable:
+                connection.close()
+                with self._lock:
+                    self._stats['lagging'] += 1
+                continue
+
+            with self._lock:
+                self._stats['replica_reads'] += 1
+            return connection
+
+        with self._lock:
+            self._stats['primary_fallbacks'] += 1
+        return None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            now = time.monotonic()
+            stats['replicas'] = [dict(pool.stats(), lag=self._state[pool.name]['lag'],
+                                      down=self._state[pool.name]['down_until'] > now)
+                                 for pool in self.pools]
+            return stats
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+
+class ExploreFeed:
+    """In-memory snapshot of the explore page items, served in a per-seed random order.
+
+    The snapshot is reloaded from the database every `refresh_interval` seconds in a
+    background thread, so requests never wait on MySQL except for the very first load.
+    Each seed (one per browser session) gets its own shuffled order. The order is derived
+    from a hash of the seed and the item id, so it stays stable while a user scrolls,
+    even across snapshot refreshes: new items slot in and removed items simply drop out.
+    """
+
+    def __init__(self, loader, refresh_interval=60, page_size=24, max_page_size=100, order_cache_size=256):
+        self._loader = loader
+        self.refresh_interval = refresh_interval
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.order_cache_size = order_cache_size
+
+        self._items = []
+        self._version = 0
+        self._digest = None
+        self._loaded_at = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # (seed, version) -> items in that seed's order, least recently used first
+        self._orders = OrderedDict()
+
+    def refresh(self):
+        """Reload the snapshot from the database"""
+        with self._load_lock:
+            self._load()
+
+    def _load(self):
+        # Caller holds _load_lock so only one reload queries MySQL at a time
+        items = self._loader()
+        if items is None:
+            # The loader hit a database error; keep serving the previous snapshot
+            raise RuntimeError("menu items could not be loaded")
+        # Content fingerprint for ETags: the same items give the same digest in every worker
+        digest = hashlib.sha1(json.dumps(items, sort_keys=True, default=str).encode()).hexdigest()
+        with self._lock:
+            self._items = items
+            self._digest = digest
+            self._version += 1
+            self._loaded_at = time.monotonic()
+            self._refreshing = False
+            self._orders.clear()
+
+    def mark_stale(self):
+        """Force a reload on the next request (e.g. after menu changes)"""
+        with self._lock:
+            if self._loaded_at is not None:
+                self._loaded_at = 0
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Error refreshing explore feed: {e}")
+            with self._lock:
+                self._refreshing = False
+
+    def _ensure_loaded(self):
+        with self._lock:
+            loaded_at = self._loaded_at
+            stale = loaded_at is not None and time.monotonic() - loaded_at > self.refresh_interval
+            if stale and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+        if loaded_at is None:
+            # First request ever: nothing to serve yet, so load synchronously
+            with self._load_lock:
+                if self._loaded_at is None:
+                    self._load()
+
+    def etag(self, seed):
+        """Tag for the current snapshot in `seed`'s order, without building that order"""
+        self._ensure_loaded()
+        with self._lock:
+            digest = self._digest
+        return f"{digest[:24]}-{zlib.crc32(str(seed).encode()):08x}"
+
+    def ordered_items(self, seed):
+        """All snapshot items in the shuffled order belonging to `seed`"""
+        self._ensure_loaded()
+        with self._lock:
+            key = (seed, self._version)
+            ordered = self._orders.get(key)
+            if ordered is not None:
+                self._orders.move_to_end(key)
+                return ordered
+            items = self._items
+
+        ordered = sorted(items, key=lambda item: zlib.crc32(f"{seed}:{item['id']}".encode()))
+
+        with self._lock:
+            self._orders[key] = ordered
+            while len(self._orders) > self.order_cache_size:
+                self._orders.popitem(last=False)
+        return ordered
+
+    def page(self, seed, page=1, page_size=None):
+        """One page of the feed for `seed` (pages are numbered from 1)"""
+        page = max(1, int(page))
+        page_size = max(1, min(int(page_size or self.page_size), self.max_page_size))
+
+        ordered = self.ordered_items(seed)
+        start = (page - 1) * page_size
+        items = ordered[start:start + page_size]
+
+        return {
+            'items': items,
+            'page': page,
+            'page_size': page_size,
+            'total': len(ordered),
+            'has_more': start + page_size < len(ordered)
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'items': len(self._items),
+                'version': self._version,
+                'age': time.monotonic() - self._loaded_at if self._loaded_at else None,
+                'cached_orders': len(self._orders)
+            }
@@ -0,0 +1,352 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar
+
+# Load-test and benchmark harness for the Swift Serve API.
+#
+# Seeds a skewed synthetic dataset with datagen.py, then drives a weighted mix of customer and business
+# traffic against the app from several threads and reports throughput, latency
+# percentiles and database queries per request (from the X-DB-Queries header) as JSON.
+#
+#     python loadtest.py                          in-process against a fresh SQLite database
+#     python loadtest.py --backend mysql          in-process against the configured MySQL
+#     python loadtest.py --url http://host:5000   over HTTP against a running server
+#     python loadtest.py --output new.json --baseline old.json
+#                                                 fail (exit 1) on latency or query regressions
+#
+# In-process runs go through Flask's test client, so they measure the app and db.py
+# without network noise. Seeding always writes to the configured database, so with --url the server
+# must use the same database as this script (or pass --no-seed and --order-ids).
+
+SCENARIO_WEIGHTS = {
+    'explore': 35,          # browsing the explore feed page by page
+    'item_view': 25,        # opening a dish
+    'place_order': 10,      # checking out a single item
+    'track_order': 20,      # order tracking page polls
+    'dashboard': 10         # business dashboard refreshes
+}
+
+
+# Clients: both return (status, headers, body bytes)
+
+class InProcessClient:
+    """Flask test client; keeps its own session cookie"""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self._client.open(path, method=method, data=data)
+        return response.status_code, response.headers, response.get_data()
+
+
+class HttpClient:
+    """urllib client with a cookie jar, for a running server"""
+
+    def __init__(self, base_url):
+        self._base_url = base_url.rstrip('/')
+        self._opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(CookieJar()),
+            _NoRedirect()
+        )
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        http_request = urllib.request.Request(self._base_url + path, data=body, method=method)
+        try:
+            with self._opener.open(http_request, timeout=30) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Login answers with a redirect to an HTML page; the session cookie is all we need
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+# Dataset
+
+def seed_dataset(db, seed, businesses, items_per_business, users, orders):
+    """Bulk-generate a skewed dataset with datagen.py and collect the ids the traffic needs"""
+    import datagen
+    created = datagen.generate(users=users, businesses=businesses, items_per_business=items_per_business,
+                               orders=orders, seed=seed, verbose=False)
+    business_ids = set(created['businesses'])
+    return {
+        'businesses': [{'id': business_id, 'email': datagen.business_email(business_id)}
+                       for business_id in created['businesses']],
+        # Only items that can be ordered, so place-order traffic doesn't turn into 400s
+        'items': [item['id'] for item in db.get_all_menu_items() if item['business_id'] in business_ids],
+        'orders': created['orders'],
+        'password': created['password']
+    }
+
+
+# Traffic
+
+class Worker(threading.Thread):
+    """One simulated user session issuing requests until the shared deadline"""
+
+    def __init__(self, make_client, dataset, rng, deadline, request_budget, results, lock):
+        super().__init__(daemon=True)
+        self._customer = make_client()
+        self._business = make_client()
+        self._dataset = dataset
+        self._rng = rng
+        self._deadline = deadline
+        self._request_budget = request_budget
+        self._results = results
+        self._lock = lock
+        self._explore_page = 1
+        self._scenarios = list(SCENARIO_WEIGHTS)
+        self._weights = [SCENARIO_WEIGHTS[name] for name in self._scenarios]
+
+    def _login_business(self):
+        business = self._rng.choice(self._dataset['businesses'])
+        self._business.request('POST', '/api/login', {
+            'email': business['email'], 'password': self._dataset['password'], 'account_type': 'business'
+        })
+
+    def _next_request(self, scenario):
+        if scenario == 'explore':
+            path = f"/api/explore?page={self._explore_page}"
+            self._explore_page = self._explore_page % 5 + 1
+            return self._customer, 'GET', path, None
+        if scenario == 'item_view':
+            return self._customer, 'GET', f"/api/menu-item/{self._rng.choice(self._dataset['items'])}", None
+        if scenario == 'place_order':
+            return self._customer, 'POST', '/api/place-order', {
+                'menu_item_id': self._rng.choice(self._dataset['items']),
+                'quantity': self._rng.randint(1, 3),
+                'customer_name': 'Load Test',
+                'customer_phone': '0000000000',
+                'customer_email': 'loadtest@example.com',
+                'delivery_address': 'Load test street'
+            }
+        if scenario == 'track_order':
+            return self._customer, 'GET', f"/api/order/{self._rng.choice(self._dataset['orders'])}", None
+        return self._business, 'GET', '/api/business/orders?limit=50&summary=1', None
+
+    def run(self):
+        if self._dataset['businesses']:
+            self._login_business()
+        while time.monotonic() < self._deadline:
+            with self._lock:
+                if self._request_budget is not None:
+                    if self._request_budget[0] <= 0:
+                        return
+                    self._request_budget[0] -= 1
+
+            scenario = self._rng.choices(self._scenarios, self._weights)[0]
+            if scenario == 'track_order' and not self._dataset['orders']:
+                scenario = 'explore'
+            if scenario == 'dashboard' and not self._dataset['businesses']:
+                scenario = 'explore'
+            client, method, path, data = self._next_request(scenario)
+
+            started = time.perf_counter()
+            try:
+                status, headers, body = client.request(method, path, data)
+            except Exception as e:
+                status, headers, body = 0, {}, str(e).encode()
+            elapsed = time.perf_counter() - started
+
+            queries = headers.get('X-DB-Queries') if headers else None
+
+            with self._lock:
+                self._results.append((scenario, status, elapsed, int(queries) if queries is not None else None))
+
+
+# Reporting
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples, wall_time):
+    latencies = sorted(elapsed for _, _, elapsed, _ in samples)
+    queries = [count for _, _, _, count in samples if count is not None]
+    errors = sum(1 for _, status, _, _ in samples if status == 0 or status >= 500)
+    status_codes = {}
+    for _, status, _, _ in samples:
+        status_codes[str(status)] = status_codes.get(str(status), 0) + 1
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / wall_time, 2) if wall_time else None,
+        'latency_ms': {
+            'mean': ms(sum(latencies) / len(latencies)) if latencies else None,
+            'p50': ms(percentile(latencies, 0.50)),
+            'p95': ms(percentile(latencies, 0.95)),
+            'p99': ms(percentile(latencies, 0.99)),
+            'max': ms(latencies[-1]) if latencies else None
+        },
+        'db_queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        'status_codes': status_codes
+    }
+
+
+def build_report(results, wall_time, settings):
+    by_scenario = {}
+    for sample in results:
+        by_scenario.setdefault(sample[0], []).append(sample)
+    return {
+        'settings': settings,
+        'wall_time_s': round(wall_time, 3),
+        'total': summarize(results, wall_time),
+        'scenarios': {name: summarize(samples, wall_time) for name, samples in sorted(by_scenario.items())}
+    }
+
+
+def compare_to_baseline(report, baseline, max_regression):
+    """List regressions of p95 latency or queries per request beyond max_regression (a fraction)"""
+    problems = []
+    for name, current in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        checks = (
+            ('p95 latency', current['latency_ms']['p95'], previous['latency_ms']['p95']),
+            ('db queries per request', current['db_queries_per_request'], previous['db_queries_per_request'])
+        )
+        for label, now, before in checks:
+            if now is None or before is None:
+                continue
+            if now > before * (1 + max_regression) and now - before > 0.5:
+                problems.append(f"{name}: {label} {before} -> {now}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Swift Serve API and report latency as JSON")
+    parser.add_argument('--url', help="base URL of a running server (default: in-process test client)")
+    parser.add_argument('--backend', choices=['sqlite', 'mysql'], default='sqlite',
+                        help="database for in-process runs (default: a fresh SQLite file)")
+    parser.add_argument('--duration', type=float, default=30, help="seconds to run (default 30)")
+    parser.add_argument('--requests', type=int, help="stop after this many requests instead")
+    parser.add_argument('--concurrency', type=int, default=8, help="simulated concurrent sessions")
+    parser.add_argument('--seed', type=int, default=42, help="random seed for data and traffic")
+    parser.add_argument('--businesses', type=int, default=20)
+    parser.add_argument('--items-per-business', type=int, default=30)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--orders', type=int, default=2000, help="orders placed before the run")
+    parser.add_argument('--no-seed', action='store_true', help="use existing data (see --item-ids)")
+    parser.add_argument('--item-ids', help="comma-separated menu item ids to use with --no-seed")
+    parser.add_argument('--order-ids', help="comma-separated order ids to use with --no-seed")
+    parser.add_argument('--output', help="write the JSON report here (default: stdout)")
+    parser.add_argument('--baseline', help="previous JSON report to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="allowed p95/queries increase over the baseline (default 0.2 = 20%%)")
+    parser.add_argument('--keep', action='store_true',
+                        help="keep the temporary SQLite database after the run (its path is printed)")
+    args = parser.parse_args()
+
+    temp_dir = None
+    if not args.url and args.backend == 'sqlite':
+        if args.keep:
+            directory = tempfile.mkdtemp(prefix='swift-loadtest-')
+        else:
+            # Removed with the database when the run ends
+            temp_dir = tempfile.TemporaryDirectory(prefix='swift-loadtest-', ignore_cleanup_errors=True)
+            directory = temp_dir.name
+        # Must be set before db.py is imported
+        os.environ['SWIFT_SERVE_DB_BACKEND'] = 'sqlite'
+        os.environ['SWIFT_SERVE_SQLITE_PATH'] = os.path.join(directory, 'loadtest.sqlite3')
+        if args.keep:
+            print(f"Database: {os.environ['SWIFT_SERVE_SQLITE_PATH']}", file=sys.stderr)
+    elif args.backend == 'mysql':
+        os.environ['SWIFT_SERVE_DB_BACKEND'] = 'mysql'
+
+    try:
+        run(parser, args)
+    finally:
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+
+def run(parser, args):
+    """Seed (unless --no-seed), replay the traffic mix and report"""
+    if args.no_seed:
+        dataset = {
+            'businesses': [],
+            'items': [int(item_id) for item_id in (args.item_ids or '').split(',') if item_id],
+            'orders': [int(order_id) for order_id in (args.order_ids or '').split(',') if order_id],
+            'password': None
+        }
+        if not dataset['items']:
+            parser.error("--no-seed needs --item-ids")
+    else:
+        import db
+        started = time.perf_counter()
+        dataset = seed_dataset(db, args.seed, args.businesses, args.items_per_business, args.users, args.orders)
+        print(f"Seeded {len(dataset['businesses'])} businesses, {len(dataset['items'])} orderable items, "
+              f"{args.users} users, {len(dataset['orders'])} orders "
+              f"in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+    else:
+        from app import app
+        make_client = lambda: InProcessClient(app)
+
+    results = []
+    lock = threading.Lock()
+    request_budget = [args.requests] if args.requests else None
+    deadline = time.monotonic() + (args.duration if not args.requests else 24 * 3600)
+    workers = [Worker(make_client, dataset, random.Random(args.seed + number + 1), deadline,
+                      request_budget, results, lock)
+               for number in range(args.concurrency)]
+
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    wall_time = time.perf_counter() - started
+
+    settings = {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')}
+    report = build_report(results, wall_time, settings)
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(rendered + '\n')
+    else:
+        print(rendered)
+
+    total = report['total']
+    print(f"{total['requests']} requests, {total['throughput_rps']} req/s, "
+          f"p50 {total['latency_ms']['p50']}ms, p95 {total['latency_ms']['p95']}ms, "
+          f"p99 {total['latency_ms']['p99']}ms, {total['db_queries_per_request']} queries/request",
+          file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as baseline_file:
+            problems = compare_to_baseline(report, json.load(baseline_file), args.max_regression)
+        if problems:
+            print("Regressions against the baseline:", file=sys.stderr)
+            for problem in problems:
+                print(f"  {problem}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
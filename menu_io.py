@@ -0,0 +1,261 @@
+import csv
+import io
+import itertools
+import json
+from decimal import Decimal, InvalidOperation
+
+# Bulk menu import/export for businesses.
+#
+# Import accepts CSV (header row required) or JSON - either an array of objects or one
+# object per line (JSON lines). Both are streamed: JSON arrays are decoded element by
+# element, never loaded whole. Rows are parsed and validated one at a time, so a bad
+# row is reported with its row number instead of failing the whole upload; the valid
+# rows are inserted by db.import_menu_items in executemany chunks.
+#
+# Export streams the same columns back out, so an exported file can be re-imported.
+
+MENU_COLUMNS = ['item_name', 'description', 'price', 'category', 'image_url', 'is_available']
+
+MAX_IMPORT_ROWS = 10000
+
+# JSON arrays are decoded incrementally: read in chunks, one element at a time
+JSON_CHUNK_SIZE = 64 * 1024
+MAX_JSON_ROW_SIZE = 1024 * 1024  # characters; a single element larger than this is rejected
+
+_json_decoder = json.JSONDecoder()
+
+# Column limits from database_setup.sql
+MAX_LENGTHS = {
+    'item_name': 100,
+    'category': 50,
+    'image_url': 255
+}
+
+MAX_PRICE = Decimal('99999999.99')
+
+_TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+_FALSE_VALUES = {'0', 'false', 'no', 'n'}
+
+
+def detect_format(filename=None, content_type=None, requested=None):
+    """Pick 'csv' or 'json' from an explicit ?format=, the file name or the content type"""
+    if requested:
+        requested = requested.lower()
+        return 'json' if requested in ('json', 'jsonl', 'ndjson') else requested
+    if filename:
+        extension = filename.rsplit('.', 1)[-1].lower()
+        if extension in ('json', 'jsonl', 'ndjson'):
+            return 'json'
+        if extension == 'csv':
+            return 'csv'
+    if content_type and 'json' in content_type:
+        return 'json'
+    return 'csv'
+
+
+def _iter_csv(stream):
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames:
+        return
+    # Header names are matched case-insensitively and ignoring surrounding spaces
+    reader.fieldnames = [(name or '').strip().lower() for name in reader.fieldnames]
+    for row in reader:
+        # Row 1 is the header
+        yield reader.line_num, row
+
+
+def _iter_json(stream):
+    first = ''
+    while True:
+        char = stream.read(1)
+        if not char or not char.isspace():
+            first = char
+            break
+    if not first:
+        return
+
+    if first == '[':
+        yield from _iter_json_array(stream)
+        return
+
+    # JSON lines: one object per line, parsed as we go
+    lines = itertools.chain([first + stream.readline()], stream)
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e}")
+
+
+def _iter_json_array(stream):
+    """Elements of a JSON array (the '[' already read), decoded one at a time from chunks"""
+    buffer = ''
+    index = 0
+    eof = False
+    position = 0
+
+    def skip_whitespace():
+        nonlocal buffer, index, eof
+        while True:
+            while index < len(buffer) and buffer[index].isspace():
+                index += 1
+            if index < len(buffer) or eof:
+                return
+            # Only the unparsed tail is kept, so memory stays at about one row plus a chunk
+            buffer, index = stream.read(JSON_CHUNK_SIZE), 0
+            eof = not buffer
+
+    while True:
+        skip_whitespace()
+        if position == 0 and buffer[index:index + 1] == ']':
+            return
+        # Decode the next element, reading more until it is complete
+        while True:
+            try:
+                row, end = _json_decoder.raw_decode(buffer, index)
+            except ValueError as e:
+                error = e
+                end = None
+            # A value that ends at the end of the buffer (e.g. a number) may continue in the next chunk
+            if (end is None or end == len(buffer)) and not eof:
+                if len(buffer) - index > MAX_JSON_ROW_SIZE:
+                    yield position + 1, ValueError(f"Row is larger than {MAX_JSON_ROW_SIZE} bytes")
+                    return
+                chunk = stream.read(JSON_CHUNK_SIZE)
+                eof = not chunk
+                buffer, index = buffer[index:] + chunk, 0
+                continue
+            break
+        if end is None:
+            yield position + 1, ValueError(f"Invalid JSON: {error}")
+            return
+        position += 1
+        index = end
+        yield position, row
+
+        skip_whitespace()
+        separator = buffer[index:index + 1]
+        index += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            yield position + 1, ValueError("Invalid JSON: expected ',' or ']' after an array element")
+            return
+
+
+def _clean_text(row, column):
+    value = row.get(column)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def validate_menu_row(row):
+    """Check one imported row. Returns (True, insert values) or (False, error message)."""
+    if isinstance(row, Exception):
+        return False, str(row)
+    if not isinstance(row, dict):
+        return False, "Row must be an object"
+
+    item_name = _clean_text(row, 'item_name')
+    if not item_name:
+        return False, "item_name is required"
+
+    for column, max_length in MAX_LENGTHS.items():
+        value = _clean_text(row, column)
+        if value and len(value) > max_length:
+            return False, f"{column} is longer than {max_length} characters"
+
+    price = row.get('price')
+    if price is None or str(price).strip() == '':
+        return False, "price is required"
+    try:
+        price = Decimal(str(price).strip().lstrip('₹$')).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return False, f"price '{row.get('price')}' is not a number"
+    if not price.is_finite():
+        # NaN survives quantize() but can't be compared
+        return False, f"price '{row.get('price')}' is not a number"
+    if price < 0 or price > MAX_PRICE:
+        return False, "price is out of range"
+
+    is_available = row.get('is_available')
+    if is_available is None or str(is_available).strip() == '':
+        is_available = True
+    elif isinstance(is_available, bool):
+        pass
+    elif str(is_available).strip().lower() in _TRUE_VALUES:
+        is_available = True
+    elif str(is_available).strip().lower() in _FALSE_VALUES:
+        is_available = False
+    else:
+        return False, f"is_available '{is_available}' is not a yes/no value"
+
+    return True, (
+        item_name,
+        _clean_text(row, 'description'),
+        price,
+        _clean_text(row, 'image_url'),
+        _clean_text(row, 'category'),
+        is_available
+    )
+
+
+def validated_rows(stream, fmt):
+    """Parse and validate an upload one row at a time.
+
+    Yields (row_number, values, error) - values is None when the row was rejected.
+    """
+    rows = _iter_json(stream) if fmt == 'json' else _iter_csv(stream)
+    for count, (row_number, row) in enumerate(rows, start=1):
+        if count > MAX_IMPORT_ROWS:
+            yield row_number, None, f"Import is limited to {MAX_IMPORT_ROWS} rows"
+            return
+        valid, result = validate_menu_row(row)
+        if valid:
+            yield row_number, result, None
+        else:
+            yield row_number, None, result
+
+
+# Export
+
+def _export_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if value is None:
+        return ''
+    return value
+
+
+def export_csv(items):
+    """Stream menu items as CSV text chunks"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(MENU_COLUMNS)
+    for item in items:
+        writer.writerow([_export_value(item.get(column)) if column != 'is_available'
+                         else ('yes' if item.get('is_available') else 'no')
+                         for column in MENU_COLUMNS])
+        if buffer.tell() > 8192:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_json(items):
+    """Stream menu items as a JSON array, one item per line"""
+    yield '[\n'
+    separator = ''
+    for item in items:
+        row = {column: item.get(column) for column in MENU_COLUMNS}
+        row['price'] = float(row['price']) if row['price'] is not None else None
+        row['is_available'] = bool(row['is_available'])
+        yield separator + json.dumps(row)
+        separator = ',\n'
+    yield '\n]\n'
@@ -0,0 +1,293 @@
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no fork-based multi-process servers, so the directory lock isn't needed
+    fcntl = None
+
+# Prometheus text-format metrics for the Flask app, served at /metrics.
+#
+# Everything is kept in-process. Under a multi-process server (gunicorn, uwsgi) each
+# worker only sees its own requests, so when `multiprocess_dir` is set every worker
+# periodically writes its samples to <dir>/metrics-<pid>.json and /metrics adds up the
+# files of all workers. Counters and histograms of workers that have exited are kept;
+# their gauges (in-flight requests, open connections) are dropped. Before a process
+# writes its first file it folds the files of exited workers into metrics-exited.json,
+# so a new worker that gets a recycled pid never overwrites a dead worker's totals.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+EXITED_WORKERS_FILE = 'metrics-exited.json'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _series(name, labels):
+    """Render a series name with its labels, e.g. http_requests_total{route="/",status="200"}"""
+    if not labels:
+        return name
+    # 'le' goes last so the buckets of one histogram series sort together
+    keys = sorted(labels, key=lambda key: (key == 'le', key))
+    rendered = ','.join(f'{key}="{_escape(labels[key])}"' for key in keys)
+    return f'{name}{{{rendered}}}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metrics:
+    """Counters, gauges and histograms with Prometheus text exposition"""
+
+    def __init__(self, namespace='swift_serve', buckets=DEFAULT_BUCKETS, multiprocess_dir=None, flush_interval=5):
+        self.namespace = namespace
+        self.buckets = tuple(sorted(buckets))
+        self.multiprocess_dir = multiprocess_dir
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._counters = {}  # series -> value; histogram buckets, sums and counts live here too
+        self._gauges = {}    # series -> value
+        self._meta = {}      # metric name -> (type, help)
+        self._collectors = []
+        self._ratios = []    # (name, numerator metric, other metric) computed after aggregation
+        self._last_flush = 0.0
+        self._flush_pid = None  # process whose leftovers were folded in (changes after a fork)
+
+        if multiprocess_dir:
+            os.makedirs(multiprocess_dir, exist_ok=True)
+
+    def _name(self, name):
+        return f'{self.namespace}_{name}'
+
+    def describe(self, name, kind, help_text):
+        self._meta[self._name(name)] = (kind, help_text)
+
+    def inc(self, name, labels=None, amount=1):
+        series = _series(self._name(name), labels)
+        with self._lock:
+            self._counters[series] = self._counters.get(series, 0) + amount
+
+    def set_gauge(self, name, labels=None, value=0):
+        series = _series(self._name(name), labels)
+        with self._lock:
+            self._gauges[series] = value
+
+    def add_gauge(self, name, labels=None, amount=1):
+        series = _series(self._name(name), labels)
+        with self._lock:
+            self._gauges[series] = self._gauges.get(series, 0) + amount
+
+    def observe(self, name, value, labels=None):
+        """Record one histogram observation"""
+        labels = labels or {}
+        base = self._name(name)
+        with self._lock:
+            for bound in self.buckets + (float('inf'),):
+                # Buckets are cumulative and every bucket must be present, even at zero
+                series = _series(f'{base}_bucket', dict(labels, le=_format_value(bound)))
+                self._counters[series] = self._counters.get(series, 0) + (1 if value <= bound else 0)
+            for suffix, amount in (('_sum', value), ('_count', 1)):
+                series = _series(base + suffix, labels)
+                self._counters[series] = self._counters.get(series, 0) + amount
+
+    def add_collector(self, collector):
+        """Register collector() -> [(kind, name, labels, value)], sampled on every snapshot.
+
+        kind is 'counter' for values that only grow within a worker, 'gauge' otherwise.
+        """
+        self._collectors.append(collector)
+
+    def add_ratio(self, name, numerator, other, help_text):
+        """Expose numerator / (numerator + other) per label set, e.g. a cache hit ratio.
+
+        Computed from the aggregated counters, so it stays correct across workers.
+        """
+        self._ratios.append((self._name(name), self._name(numerator), self._name(other)))
+        self.describe(name, 'gauge', help_text)
+
+    # Snapshots and multi-process aggregation
+
+    def snapshot(self):
+        """This worker's samples: {'counters': {...}, 'gauges': {...}}"""
+        counters = {}
+        gauges = {}
+        for collector in self._collectors:
+            try:
+                samples = collector()
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+                continue
+            for kind, name, labels, value in samples:
+                target = counters if kind == 'counter' else gauges
+                series = _series(self._name(name), labels)
+                target[series] = target.get(series, 0) + value
+        with self._lock:
+            counters.update(self._counters)
+            gauges.update(self._gauges)
+        return {'counters': counters, 'gauges': gauges}
+
+    def flush(self, force=False):
+        """Write this worker's snapshot for the other workers (multi-process mode only)"""
+        if not self.multiprocess_dir:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        if self._flush_pid != os.getpid():
+            self._merge_exited_workers()
+            self._flush_pid = os.getpid()
+        data = dict(self.snapshot(), pid=os.getpid())
+        path = os.path.join(self.multiprocess_dir, f'metrics-{os.getpid()}.json')
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w') as metrics_file:
+            json.dump(data, metrics_file)
+        os.replace(temp_path, path)
+
+    def _merge_exited_workers(self):
+        """Add the counters of exited workers to metrics-exited.json and delete their files.
+
+        Runs before this process writes its own file, so a file that already carries this
+        pid was left by an earlier process with the same pid and is merged too.
+        """
+        exited_path = os.path.join(self.multiprocess_dir, EXITED_WORKERS_FILE)
+        with _directory_lock(self.multiprocess_dir, exclusive=True):
+            exited = _read_snapshot(exited_path) or {'counters': {}, 'gauges': {}}
+            merged = []
+            for path in glob.glob(os.path.join(self.multiprocess_dir, 'metrics-*.json')):
+                if path == exited_path:
+                    continue
+                data = _read_snapshot(path)
+                if data is None:
+                    continue
+                pid = data.get('pid')
+                if pid != os.getpid() and _pid_alive(pid):
+                    continue
+                for series, value in data['counters'].items():
+                    exited['counters'][series] = exited['counters'].get(series, 0) + value
+                merged.append(path)
+            if not merged:
+                return
+            temp_path = f'{exited_path}.tmp'
+            with open(temp_path, 'w') as metrics_file:
+                json.dump(exited, metrics_file)
+            os.replace(temp_path, exited_path)
+            for path in merged:
+                os.remove(path)
+
+    def _worker_snapshots(self):
+        if not self.multiprocess_dir:
+            return [self.snapshot()]
+        self.flush(force=True)
+        snapshots = []
+        # Shared lock: never read while exited workers are being moved into the merged file
+        with _directory_lock(self.multiprocess_dir, exclusive=False):
+            for path in glob.glob(os.path.join(self.multiprocess_dir, 'metrics-*.json')):
+                data = _read_snapshot(path)
+                if data is None:
+                    continue
+                if not _pid_alive(data.get('pid')):
+                    data['gauges'] = {}
+                snapshots.append(data)
+        return snapshots
+
+    def aggregate(self):
+        """Samples of all workers added together"""
+        counters = {}
+        gauges = {}
+        for data in self._worker_snapshots():
+            for series, value in data['counters'].items():
+                counters[series] = counters.get(series, 0) + value
+            for series, value in data['gauges'].items():
+                gauges[series] = gauges.get(series, 0) + value
+        return counters, gauges
+
+    def render(self):
+        """All metrics in Prometheus text exposition format"""
+        counters, gauges = self.aggregate()
+        samples = dict(counters)
+        samples.update(gauges)
+        for name, numerator, other in self._ratios:
+            for series, value in counters.items():
+                if series.split('{', 1)[0] != numerator:
+                    continue
+                labels = series[len(numerator):]
+                total = value + counters.get(other + labels, 0)
+                if total:
+                    samples[name + labels] = value / total
+
+        families = {}
+        for series, value in samples.items():
+            name = series.split('{', 1)[0]
+            family = name
+            for suffix in ('_bucket', '_sum', '_count'):
+                if name.endswith(suffix) and name[:-len(suffix)] in self._meta:
+                    family = name[:-len(suffix)]
+            families.setdefault(family, []).append((series, value))
+
+        lines = []
+        for family in sorted(families):
+            kind, help_text = self._meta.get(family, ('untyped', ''))
+            if help_text:
+                lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} {kind}')
+            for series, value in sorted(families[family], key=_sample_sort_key):
+                lines.append(f'{series} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _sample_sort_key(sample):
+    # Keep histogram buckets in ascending le order
+    series = sample[0]
+    if 'le="' in series:
+        bound = series.split('le="', 1)[1].split('"', 1)[0]
+        return series.split('le="', 1)[0], float('inf') if bound == '+Inf' else float(bound)
+    return series, 0.0
+
+
+def _read_snapshot(path):
+    try:
+        with open(path, 'r') as metrics_file:
+            return json.load(metrics_file)
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def _directory_lock(directory, exclusive):
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, '.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,199 @@
+import importlib.util
+import os
+import re
+import sys
+import mysql.connector
+from mysql.connector import Error
+from config import db_config
+
+# Versioned schema migrations for Swift Serve.
+#
+# Migrations live in migrations/ as NNNN_description.sql or NNNN_description.py and are
+# applied in version order. Applied versions are recorded in the schema_version table,
+# so each migration runs exactly once per database. Run this at deploy time:
+#
+#     python migrate.py            apply pending migrations
+#     python migrate.py --status   list applied and pending migrations
+#
+# SQL migrations are split on ';' like database_setup.sql. Python migrations define
+# upgrade(cursor) and can use the helpers below to stay idempotent on databases that
+# were patched by hand with the old fix_* scripts.
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE_RE = re.compile(r'^(\d+)_([\w-]+)\.(sql|py)$')
+
+# Named lock so two deploys can't migrate the same database at once
+LOCK_NAME = f"{db_config['database']}_schema_migrations"
+LOCK_TIMEOUT = 60
+
+
+# Helpers for Python migrations
+
+def column_exists(cursor, table, column):
+    """Check whether a column exists in a table of the current database"""
+    cursor.execute("""
+    SELECT COUNT(*)
+    FROM information_schema.columns
+    WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+def table_exists(cursor, table):
+    """Check whether a table exists in the current database"""
+    cursor.execute("""
+    SELECT COUNT(*)
+    FROM information_schema.tables
+    WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    return cursor.fetchone()[0] > 0
+
+def has_index_on(cursor, table, columns):
+    """Check whether any index on the table starts with the given columns (in order)"""
+    cursor.execute("""
+    SELECT index_name, column_name
+    FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = %s
+    ORDER BY index_name, seq_in_index
+    """, (table,))
+    indexes = {}
+    for index_name, column_name in cursor.fetchall():
+        indexes.setdefault(index_name, []).append(column_name.lower())
+    wanted = [column.lower() for column in columns]
+    return any(index_columns[:len(wanted)] == wanted for index_columns in indexes.values())
+
+def add_column_if_missing(cursor, table, column, definition):
+    """ALTER TABLE ... ADD COLUMN unless the column is already there"""
+    if column_exists(cursor, table, column):
+        return False
+    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    print(f"  Added column {table}.{column}")
+    return True
+
+def add_index_if_missing(cursor, table, index_name, columns):
+    """Create an index unless an index with the same leading columns already exists"""
+    if has_index_on(cursor, table, columns):
+        print(f"  Index on {table}({', '.join(columns)}) already exists, skipping")
+        return False
+    cursor.execute(f"CREATE INDEX {index_name} ON {table} ({', '.join(columns)})")
+    print(f"  Created index {index_name} on {table}({', '.join(columns)})")
+    return True
+
+
+# Runner
+
+def discover_migrations():
+    """Return [(version, name, path)] for every migration file, in version order"""
+    migrations = []
+    seen = {}
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE_RE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in seen:
+            raise ValueError(f"Duplicate migration version {version}: {seen[version]} and {filename}")
+        seen[version] = filename
+        migrations.append((version, filename, os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(migrations)
+
+def ensure_version_table(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+def get_applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_version")
+    return {row[0] for row in cursor.fetchall()}
+
+def apply_sql_migration(cursor, path):
+    with open(path, 'r') as sql_file:
+        sql_script = sql_file.read()
+    # Strip comment lines before splitting so ';' inside comments can't break statements
+    lines = [line for line in sql_script.splitlines() if not line.strip().startswith('--')]
+    for statement in '\n'.join(lines).split(';'):
+        statement = statement.strip()
+        if statement:
+            cursor.execute(statement)
+
+def apply_python_migration(cursor, path):
+    spec = importlib.util.spec_from_file_location(f"migration_{os.path.basename(path)[:-3]}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.upgrade(cursor)
+
+def migrate(verbose=True):
+    """Apply all pending migrations. Returns the list of versions applied."""
+    connection = mysql.connector.connect(**db_config)
+    cursor = connection.cursor()
+    applied_now = []
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("Another migration run holds the schema lock")
+
+        try:
+            ensure_version_table(cursor)
+            applied = get_applied_versions(cursor)
+
+            for version, name, path in discover_migrations():
+                if version in applied:
+                    continue
+                if verbose:
+                    print(f"Applying migration {name}...")
+                if path.endswith('.sql'):
+                    apply_sql_migration(cursor, path)
+                else:
+                    apply_python_migration(cursor, path)
+                # MySQL commits DDL implicitly; record the version once the migration succeeded
+                cursor.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)", (version, name))
+                connection.commit()
+                applied_now.append(version)
+
+            if verbose:
+                if applied_now:
+                    print(f"Applied {len(applied_now)} migration(s)")
+                else:
+                    print("Database schema is up to date")
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cursor.fetchone()
+    finally:
+        cursor.close()
+        connection.close()
+    return applied_now
+
+def _migration_states():
+    """[(name, applied)] for every migration file, in version order"""
+    connection = mysql.connector.connect(**db_config)
+    cursor = connection.cursor()
+    try:
+        ensure_version_table(cursor)
+        applied = get_applied_versions(cursor)
+        return [(name, version in applied) for version, name, path in discover_migrations()]
+    finally:
+        cursor.close()
+        connection.close()
+
+def pending_migrations():
+    """Names of the migrations not yet applied to the database"""
+    return [name for name, applied in _migration_states() if not applied]
+
+def status():
+    """Print applied and pending migrations"""
+    for name, applied in _migration_states():
+        state = 'applied' if applied else 'pending'
+        print(f"{state:8} {name}")
+
+if __name__ == "__main__":
+    try:
+        if len(sys.argv) > 1 and sys.argv[1] == '--status':
+            status()
+        else:
+            migrate()
+    except (Error, RuntimeError, ValueError) as e:
+        print(f"Migration failed: {e}")
+        sys.exit(1)
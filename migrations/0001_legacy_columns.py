@@ -0,0 +1,40 @@
+from migrate import add_column_if_missing
+
+# Columns that older databases were missing and that used to be patched by
+# fix_database.py, fix_orders_table.py, fix_orders_table_complete.py,
+# alter_tables.py and db.fix_menu_items_table(). A no-op on databases created
+# from the current database_setup.sql.
+
+def upgrade(cursor):
+    # Student verification (alter_tables.py / alter_users_table.sql)
+    add_column_if_missing(cursor, 'users', 'is_student', "BOOLEAN DEFAULT FALSE")
+    add_column_if_missing(cursor, 'users', 'student_id_card', "VARCHAR(255) DEFAULT NULL")
+    add_column_if_missing(cursor, 'users', 'is_verified', "BOOLEAN DEFAULT FALSE")
+    add_column_if_missing(cursor, 'users', 'discount_eligible', "BOOLEAN DEFAULT FALSE")
+
+    # Student discount on orders (alter_tables.py)
+    add_column_if_missing(cursor, 'orders', 'discount_applied', "BOOLEAN DEFAULT FALSE")
+    add_column_if_missing(cursor, 'orders', 'discount_percentage', "DECIMAL(5, 2) DEFAULT 0.00")
+
+    # Customer details on orders (fix_orders_table_complete.py)
+    add_column_if_missing(cursor, 'orders', 'customer_name', "VARCHAR(100) NOT NULL DEFAULT 'Customer'")
+    add_column_if_missing(cursor, 'orders', 'customer_phone', "VARCHAR(20) NOT NULL DEFAULT '0000000000'")
+    add_column_if_missing(cursor, 'orders', 'customer_email', "VARCHAR(100) NOT NULL DEFAULT 'customer@example.com'")
+    add_column_if_missing(cursor, 'orders', 'payment_method', "VARCHAR(50) DEFAULT 'Cash on Delivery'")
+    add_column_if_missing(cursor, 'orders', 'special_instructions', "TEXT")
+    add_column_if_missing(cursor, 'orders', 'delivery_address', "TEXT")
+
+    # Business ownership (fix_orders_table.py, fix_database.py, db.fix_menu_items_table)
+    if add_column_if_missing(cursor, 'orders', 'business_id', "INT NOT NULL DEFAULT 1"):
+        cursor.execute("""
+        ALTER TABLE orders
+        ADD CONSTRAINT fk_order_business
+        FOREIGN KEY (business_id) REFERENCES businesses(id)
+        """)
+
+    if add_column_if_missing(cursor, 'menu_items', 'business_id', "INT NOT NULL DEFAULT 1"):
+        cursor.execute("""
+        ALTER TABLE menu_items
+        ADD CONSTRAINT fk_menu_business
+        FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE
+        """)
@@ -0,0 +1,21 @@
+from migrate import add_index_if_missing
+
+# Indexes behind the hot queries in db.py. Indexes whose leading columns are
+# already covered (e.g. by database_setup.sql or a foreign key) are skipped.
+
+def upgrade(cursor):
+    # Business dashboard order list and keyset pagination (get_orders_by_business, get_orders_page_by_business)
+    add_index_if_missing(cursor, 'orders', 'idx_orders_business_date', ['business_id', 'order_date', 'id'])
+    add_index_if_missing(cursor, 'orders', 'idx_orders_business_status_date', ['business_id', 'status', 'order_date', 'id'])
+
+    # User order history (get_orders_by_user) and discount backfill (verify_student)
+    add_index_if_missing(cursor, 'orders', 'idx_orders_user_date', ['user_id', 'order_date'])
+
+    # Batched order item loading (_attach_order_items, get_order_by_id)
+    add_index_if_missing(cursor, 'order_items', 'idx_order_items_order', ['order_id'])
+
+    # Active subscription lookup (get_user_subscription, create_subscription, cancel_subscription)
+    add_index_if_missing(cursor, 'subscriptions', 'idx_subscriptions_user_status', ['user_id', 'status'])
+
+    # Explore page / search snapshot (get_all_menu_items)
+    add_index_if_missing(cursor, 'menu_items', 'idx_menu_items_available_business', ['is_available', 'business_id'])
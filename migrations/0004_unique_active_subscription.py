@@ -0,0 +1,29 @@
+from migrate import column_exists
+
+# At most one active subscription per user, enforced by a unique key on a generated
+# column that holds user_id only while the subscription is active (NULLs don't clash).
+# db.create_subscription relies on it for its single-statement upsert.
+
+def upgrade(cursor):
+    if column_exists(cursor, 'subscriptions', 'active_user_id'):
+        return
+
+    # Keep only the newest active subscription of each user
+    cursor.execute("""
+    UPDATE subscriptions s
+    JOIN (
+        SELECT user_id, MAX(id) AS keep_id
+        FROM subscriptions
+        WHERE status = 'active'
+        GROUP BY user_id
+        HAVING COUNT(*) > 1
+    ) dup ON s.user_id = dup.user_id
+    SET s.status = 'cancelled', s.end_date = CURRENT_TIMESTAMP
+    WHERE s.status = 'active' AND s.id <> dup.keep_id
+    """)
+
+    cursor.execute("""
+    ALTER TABLE subscriptions
+    ADD COLUMN active_user_id INT AS (CASE WHEN status = 'active' THEN user_id END) STORED,
+    ADD UNIQUE KEY uq_subscriptions_active_user (active_user_id)
+    """)
@@ -0,0 +1,24 @@
+from migrate import add_column_if_missing, add_index_if_missing
+
+# Change-feed versions for orders (db.get_order_changes, /api/business/orders?since=).
+# Every order insert and status change takes the next value of the single-row
+# order_sequence table and stores it in orders.version. Existing orders get their id
+# as version, and the sequence continues after the highest one.
+
+def upgrade(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS order_sequence (
+        id TINYINT PRIMARY KEY,
+        value BIGINT NOT NULL
+    )
+    """)
+
+    if add_column_if_missing(cursor, 'orders', 'version', "BIGINT NOT NULL DEFAULT 0"):
+        cursor.execute("UPDATE orders SET version = id")
+
+    add_index_if_missing(cursor, 'orders', 'idx_orders_business_version', ['business_id', 'version'])
+
+    cursor.execute("""
+    INSERT IGNORE INTO order_sequence (id, value)
+    SELECT 1, COALESCE(MAX(version), 0) FROM orders
+    """)
@@ -0,0 +1,17 @@
+-- Append-only order event journal (db.get_order_events, order_journal.py).
+-- One row per order write, keyed by the order version of that write: created,
+-- status and discount events. Written in the same transaction as the change.
+
+CREATE TABLE IF NOT EXISTS order_events (
+    version BIGINT NOT NULL,
+    order_id INT NOT NULL,
+    business_id INT NOT NULL,
+    user_id INT NOT NULL,
+    event_type VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    total_amount DECIMAL(10, 2),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (version, order_id),
+    INDEX idx_order_events_order (order_id, version),
+    INDEX idx_order_events_business (business_id, version)
+);
@@ -0,0 +1,71 @@
+import argparse
+import json
+import sys
+import time
+
+import db
+from config import order_journal_config
+
+# Order event journal tools.
+#
+#     python order_journal.py tail --after 0              print events as JSON lines
+#     python order_journal.py tail --after 0 --follow     keep printing new events
+#     python order_journal.py compact                      apply compaction and retention
+#
+# tail is a reference consumer: it reads the journal in version order with
+# db.get_order_events and prints the version to resume from on stderr. Run compact
+# daily; settings are in order_journal_config in config.py.
+
+
+def tail(after_version, business_id=None, follow=False, poll_interval=1.0, limit=1000):
+    """Print events after after_version as JSON lines; returns the last version seen"""
+    while True:
+        batch = db.get_order_events(after_version, limit, business_id=business_id)
+        if batch is None:
+            return after_version
+        if batch['oldest_version'] is not None and after_version < batch['oldest_version'] - 1:
+            print(f"Warning: events up to version {batch['oldest_version'] - 1} were already removed "
+                  f"by retention; resync from the orders table", file=sys.stderr)
+        for event in batch['events']:
+            print(json.dumps(event, default=str))
+        after_version = batch['version']
+        if batch['has_more']:
+            continue
+        if not follow:
+            return after_version
+        sys.stdout.flush()
+        time.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read and maintain the order event journal")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    tail_parser = commands.add_parser('tail', help="print journal events as JSON lines")
+    tail_parser.add_argument('--after', type=int, default=0, help="version to start after")
+    tail_parser.add_argument('--business-id', type=int, help="only this business's orders")
+    tail_parser.add_argument('--follow', action='store_true', help="keep polling for new events")
+    tail_parser.add_argument('--poll-interval', type=float, default=1.0)
+
+    compact_parser = commands.add_parser('compact', help="apply compaction and retention")
+    compact_parser.add_argument('--retention-days', type=int, default=order_journal_config['retention_days'])
+    compact_parser.add_argument('--compact-after-days', type=int, default=order_journal_config['compact_after_days'])
+    args = parser.parse_args()
+
+    if args.command == 'tail':
+        try:
+            last_version = tail(args.after, args.business_id, args.follow, args.poll_interval)
+        except KeyboardInterrupt:
+            return
+        print(f"Resume with --after {last_version}", file=sys.stderr)
+    else:
+        success, result = db.compact_order_events(args.retention_days, args.compact_after_days,
+                                                  order_journal_config['batch_size'])
+        if not success:
+            print(f"Error: {result}")
+            sys.exit(1)
+        print(f"Removed {result['compacted']} superseded and {result['expired']} expired events")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import deque
+
+FINAL_STATUSES = ('delivered', 'cancelled')
+
+
+class Subscription:
+    """One open tracker: a small queue of status events for a single order"""
+
+    def __init__(self, hub, order_id, max_queued):
+        self.order_id = order_id
+        self._hub = hub
+        self._events = deque(maxlen=max_queued)
+        self._ready = threading.Condition()
+
+    def _push(self, event):
+        with self._ready:
+            # A slow client only needs the latest statuses, so old ones fall off the deque
+            self._events.append(event)
+            self._ready.notify()
+
+    def get(self, timeout):
+        """Next event, or None if nothing arrived within timeout seconds"""
+        with self._ready:
+            if not self._events:
+                self._ready.wait(timeout)
+            return self._events.popleft() if self._events else None
+
+    def close(self):
+        self._hub.unsubscribe(self)
+
+
+class OrderStatusHub:
+    """In-process fan-out of order status changes to Server-Sent Event streams.
+
+    db.update_order_status reports every committed status change here once, and the hub
+    copies it to the queues of the trackers watching that order. An open tracker costs a
+    queue and a waiting thread, not a database query per poll. Each process has its own
+    hub, so with several workers a change is pushed only to trackers connected to the
+    worker that made it; the others pick it up when their stream rechecks the database
+    after heartbeat_interval seconds without events.
+    """
+
+    def __init__(self, max_subscribers=10000, max_queued=16):
+        self.max_subscribers = max_subscribers
+        self.max_queued = max_queued
+
+        self._lock = threading.Lock()
+        self._subscribers = {}  # order id -> set of subscriptions
+        self._count = 0
+        self._sequence = 0
+        self._published = 0
+        self._delivered = 0
+        self._rejected = 0
+
+    def subscribe(self, order_id):
+        """Start watching an order; None when the hub is full"""
+        order_id = int(order_id)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                self._rejected += 1
+                return None
+            subscription = Subscription(self, order_id, self.max_queued)
+            self._subscribers.setdefault(order_id, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            watchers = self._subscribers.get(subscription.order_id)
+            if watchers is None or subscription not in watchers:
+                return
+            watchers.discard(subscription)
+            if not watchers:
+                del self._subscribers[subscription.order_id]
+            self._count -= 1
+
+    def publish(self, order_id, status):
+        """Send a status change to everyone watching the order"""
+        order_id = int(order_id)
+        with self._lock:
+            self._sequence += 1
+            self._published += 1
+            event = {'id': self._sequence, 'order_id': order_id, 'status': status}
+            watchers = list(self._subscribers.get(order_id, ()))
+            self._delivered += len(watchers)
+        for subscription in watchers:
+            subscription._push(event)
+
+    def next_event_id(self):
+        with self._lock:
+            self._sequence += 1
+            return self._sequence
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': self._count,
+                'orders_watched': len(self._subscribers),
+                'published': self._published,
+                'delivered': self._delivered,
+                'rejected': self._rejected
+            }
+
+
+class OrderFeedWaiter:
+    """Lets long-polling dashboard requests sleep until their business's orders change.
+
+    Fed with the version of every order write made by this process. Writes made by
+    other worker processes aren't seen here, so callers wait in short slices and
+    recheck the database in between.
+    """
+
+    def __init__(self):
+        self._changed = threading.Condition()
+        self._versions = {}  # business id -> newest order version written by this process
+
+    def notify(self, business_id, version):
+        with self._changed:
+            if version > self._versions.get(business_id, 0):
+                self._versions[business_id] = version
+            self._changed.notify_all()
+
+    def wait(self, business_id, since, timeout):
+        """Wait up to timeout seconds for a version newer than since; True if one was seen"""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while self._versions.get(business_id, 0) <= since:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+            return True
+
+
+def format_event(event_id, event, data, retry=None):
+    """Serialize one Server-Sent Event; data is already JSON text"""
+    lines = []
+    if retry is not None:
+        lines.append(f'retry: {retry}')
+    lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {data}')
+    return '\n'.join(lines) + '\n\n'
@@ -52,6 +52,11 @@ def setup():
     
     # Initialize the database
     print("Initializing database...")
+    from config import db_backend, sqlite_config
+    if db_backend == 'sqlite':
+        # The embedded database creates its schema on first connect (see db_backends.py)
+        print(f"Using embedded SQLite database at {sqlite_config['path']}")
+        return True
     try:
         if os.path.exists('init_db.py'):
             spec = importlib.util.spec_from_file_location("init_db", "init_db.py")
@@ -63,6 +68,18 @@ def setup():
             print("Connecting to database...")
             init_db.initialize_database(verbose=True)
             
+            # Migrations are a deploy step (python migrate.py); only report what is pending
+            import migrate
+            from config import migration_config
+            if migration_config['run_on_start']:
+                print("Applying schema migrations...")
+                migrate.migrate(verbose=True)
+            else:
+                pending = migrate.pending_migrations()
+                if pending:
+                    print(f"Warning: {len(pending)} pending schema migration(s): {', '.join(pending)}")
+                    print("Run 'python migrate.py' to apply them.")
+            
             # Create marker file if it doesn't exist (just for tracking first run)
             if not os.path.exists('.db_initialized'):
                 with open('.db_initialized', 'w') as f:
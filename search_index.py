@@ -0,0 +1,434 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import defaultdict
+
+# How much a match in each field counts towards an item's score
+FIELD_WEIGHTS = {
+    'item_name': 3.0,
+    'business_name': 2.0,
+    'category': 2.0,
+    'description': 1.0
+}
+
+# Prefix matches on the last query word (search-as-you-type) score lower than whole words
+PREFIX_MATCH_FACTOR = 0.5
+
+STOP_WORDS = {'a', 'an', 'and', 'the', 'of', 'with', 'in', 'on', 'for', 'to'}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lowercase a string and split it into searchable words"""
+    if not text:
+        return []
+    return [token for token in _TOKEN_RE.findall(str(text).lower()) if token not in STOP_WORDS]
+
+
+def _token_weights(item):
+    """Indexed tokens of an item with their summed field weights"""
+    weights = defaultdict(float)
+    for field, field_weight in FIELD_WEIGHTS.items():
+        for token in tokenize(item.get(field)):
+            weights[token] += field_weight
+    return weights
+
+
+class MenuSearchIndex:
+    """In-process inverted index over available menu items of approved businesses.
+
+    Built lazily from db.get_all_menu_items on the first search and kept up to date
+    incrementally through db change notifications (see on_change). Full rebuilds run one
+    at a time and are swapped in when complete; until then searches use the previous index.
+    """
+
+    def __init__(self, loader, fetch_item):
+        self._loader = loader          # returns all searchable items
+        self._fetch_item = fetch_item  # returns one item joined with its business, or None
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()  # held for the whole of a rebuild
+        self._generation = 0                 # bumped by invalidate()
+        self._built_generation = None        # generation the current index was loaded at
+        self._loading = False
+        self._pending_upserts = set()        # items changed while a rebuild was loading
+        self._rebuild_scheduled = False
+        self._docs = {}                      # item id -> item dict
+        self._doc_tokens = {}                # item id -> set of indexed tokens
+        self._postings = defaultdict(dict)   # token -> {item id: weight}
+        self._vocabulary = []                # sorted tokens, for prefix lookups
+
+    # Index maintenance
+
+    def rebuild(self):
+        """Rebuild the whole index from the database"""
+        with self._build_lock:
+            self._rebuild_locked()
+
+    def _rebuild_locked(self):
+        with self._lock:
+            # An invalidate() from here on bumps the generation past this build
+            generation = self._generation
+            self._loading = True
+            self._pending_upserts.clear()
+        try:
+            items = self._loader()
+            if items is None:
+                raise RuntimeError("menu items could not be loaded")
+            docs, doc_tokens, postings = {}, {}, defaultdict(dict)
+            for item in items:
+                weights = _token_weights(item)
+                docs[item['id']] = item
+                doc_tokens[item['id']] = set(weights)
+                for token, weight in weights.items():
+                    postings[token][item['id']] = weight
+            vocabulary = sorted(postings)
+        except Exception:
+            with self._lock:
+                self._loading = False
+                self._pending_upserts.clear()
+            raise
+        with self._lock:
+            self._docs, self._doc_tokens = docs, doc_tokens
+            self._postings, self._vocabulary = postings, vocabulary
+            self._built_generation = generation
+            self._loading = False
+            pending = list(self._pending_upserts)
+            self._pending_upserts.clear()
+        # These were applied to the old index; the new one may have loaded them before the change
+        for item_id in pending:
+            self.upsert_item(item_id)
+
+    def invalidate(self):
+        """Mark the index stale; the next search starts a rebuild"""
+        with self._lock:
+            self._generation += 1
+
+    def _ensure_built(self):
+        with self._lock:
+            if self._built_generation == self._generation:
+                return
+            has_index = self._built_generation is not None
+        if has_index:
+            # Keep answering from the current index while a new one is built
+            self._schedule_rebuild()
+            return
+        # First search: wait for the single initial build
+        with self._build_lock:
+            if self._built_generation is None:
+                self._rebuild_locked()
+
+    def _schedule_rebuild(self):
+        with self._lock:
+            if self._rebuild_scheduled:
+                return
+            self._rebuild_scheduled = True
+        threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    def _rebuild_in_background(self):
+        try:
+            while True:
+                with self._lock:
+                    # Invalidations during a build leave the generation ahead, so build again
+                    if self._built_generation == self._generation:
+                        self._rebuild_scheduled = False
+                        return
+                self.rebuild()
+        except Exception as e:
+            print(f"Error rebuilding search index: {e}")
+            with self._lock:
+                self._rebuild_scheduled = False
+
+    def _add(self, item):
+        weights = _token_weights(item)
+        item_id = item['id']
+        self._docs[item_id] = item
+        self._doc_tokens[item_id] = set(weights)
+        for token, weight in weights.items():
+            postings = self._postings[token]
+            if not postings:
+                bisect.insort(self._vocabulary, token)
+            postings[item_id] = weight
+
+    def _remove(self, item_id):
+        self._docs.pop(item_id, None)
+        for token in self._doc_tokens.pop(item_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(item_id, None)
+            if not postings:
+                del self._postings[token]
+                position = bisect.bisect_left(self._vocabulary, token)
+                if position < len(self._vocabulary) and self._vocabulary[position] == token:
+                    del self._vocabulary[position]
+
+    def upsert_item(self, item_id):
+        """Re-read one menu item from the database and (re)index or drop it"""
+        with self._lock:
+            if self._loading:
+                self._pending_upserts.add(item_id)
+            if self._built_generation is None:
+                return
+        item = self._fetch_item(item_id)
+        with self._lock:
+            self._remove(item_id)
+            if item and item.get('is_available') and item.get('business_status') == 'approved':
+                item = dict(item)
+                item.pop('business_status', None)
+                self._add(item)
+
+    def on_change(self, entity, entity_id):
+        """db change listener"""
+        if entity == 'menu_items':
+            self.upsert_item(entity_id)
+        elif entity == 'businesses':
+            # A rename or status change touches every item of the business - rebuild lazily
+            self.invalidate()
+
+    # Queries
+
+    def _matching_tokens(self, token, is_last):
+        """Tokens matched by a query word, with their score factor"""
+        matches = []
+        if token in self._postings:
+            matches.append((token, 1.0))
+        if is_last:
+            # Search-as-you-type: the last word may be incomplete
+            position = bisect.bisect_left(self._vocabulary, token)
+            while position < len(self._vocabulary) and self._vocabulary[position].startswith(token):
+                candidate = self._vocabulary[position]
+                if candidate != token:
+                    matches.append((candidate, PREFIX_MATCH_FACTOR))
+                position += 1
+        return matches
+
+    def search(self, query, category=None, min_price=None, max_price=None, business_id=None,
+               limit=20, offset=0):
+        """Find items matching every word of `query`, best matches first.
+
+        Returns {'results': [...], 'total': <number of matches>}.
+        """
+        self._ensure_built()
+        tokens = tokenize(query)
+
+        with self._lock:
+            if tokens:
+                scores = None
+                for position, token in enumerate(tokens):
+                    token_scores = defaultdict(float)
+                    for matched, factor in self._matching_tokens(token, position == len(tokens) - 1):
+                        for item_id, weight in self._postings[matched].items():
+                            token_scores[item_id] = max(token_scores[item_id], weight * factor)
+                    if scores is None:
+                        scores = dict(token_scores)
+                    else:
+                        # Every query word must match
+                        scores = {item_id: score + token_scores[item_id]
+                                  for item_id, score in scores.items() if item_id in token_scores}
+                    if not scores:
+                        break
+                scores = scores or {}
+            else:
+                scores = {item_id: 0.0 for item_id in self._docs}
+
+            results = []
+            for item_id, score in scores.items():
+                item = self._docs[item_id]
+                if category and (item.get('category') or '').lower() != category.lower():
+                    continue
+                if business_id is not None and item.get('business_id') != business_id:
+                    continue
+                price = float(item['price'])
+                if min_price is not None and price < min_price:
+                    continue
+                if max_price is not None and price > max_price:
+                    continue
+                results.append((score, item))
+
+        results.sort(key=lambda result: (-result[0], result[1]['item_name'].lower(), result[1]['id']))
+        return {
+            'results': [dict(item, score=round(score, 2)) for score, item in results[offset:offset + limit]],
+            'total': len(results)
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'built': self._built_generation == self._generation,
+                'items': len(self._docs),
+                'tokens': len(self._postings)
+            }
+
+
+class _SuggestionSnapshot:
+    """Immutable suggestion data; replaced wholesale on rebuild so readers never see a partial build"""
+
+    def __init__(self, keys, key_entries, entries, top_by_short_prefix):
+        self.keys = keys                                # sorted searchable strings
+        self.key_entries = key_entries                  # parallel to keys: index into entries
+        self.entries = entries                          # suggestion dicts, best first
+        self.top_by_short_prefix = top_by_short_prefix  # precomputed answers for 1-2 letter prefixes
+
+
+class SuggestionIndex:
+    """Typeahead suggestions for item and restaurant names, weighted by order popularity.
+
+    Names are stored as a sorted array of word-start suffixes ("margherita pizza" and
+    "pizza" both point at "Margherita Pizza") searched with bisect. The array is rebuilt
+    in a background thread and swapped in with a single assignment, so lookups never
+    take a lock and never wait for a rebuild. Menu changes are debounced: a burst of edits
+    within rebuild_delay seconds becomes one rebuild, and edits that arrive while a rebuild
+    runs mark the index dirty so it is built once more afterwards. Order popularity (a
+    GROUP BY over all order items) is only reloaded every refresh_interval seconds.
+    """
+
+    SHORT_PREFIX_LENGTH = 2
+    MAX_LIMIT = 20
+
+    def __init__(self, loader, popularity_loader, refresh_interval=300, rebuild_delay=2):
+        self._loader = loader                        # returns all searchable items
+        self._popularity_loader = popularity_loader  # returns {menu_item_id: units ordered}
+        self.refresh_interval = refresh_interval
+        self.rebuild_delay = rebuild_delay
+        self._snapshot = None
+        self._built_at = None
+        self._popularity = None
+        self._popularity_at = None
+        self._rebuilding = False
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load_popularity(self):
+        now = time.monotonic()
+        if self._popularity is None or now - self._popularity_at > self.refresh_interval:
+            self._popularity = self._popularity_loader()
+            self._popularity_at = now
+        return self._popularity
+
+    def _build(self):
+        items = self._loader()
+        if items is None:
+            # Database error: keep the current snapshot rather than build an empty one
+            raise RuntimeError("menu items could not be loaded")
+        popularity = self._load_popularity()
+
+        # Merge items and restaurants that share a display name
+        merged = {}
+        for item in items:
+            weight = popularity.get(item['id'], 0)
+            for kind, text, ref_id in (('item', item['item_name'], item['id']),
+                                       ('restaurant', item.get('business_name'), item['business_id'])):
+                if not text:
+                    continue
+                key = (kind, text.strip().lower())
+                entry = merged.get(key)
+                if entry is None:
+                    merged[key] = {'text': text.strip(), 'type': kind, 'id': ref_id, 'weight': weight, '_best': weight}
+                else:
+                    entry['weight'] += weight
+                    if kind == 'item' and weight > entry['_best']:
+                        # Point at the most ordered item with this name
+                        entry['id'] = ref_id
+                        entry['_best'] = weight
+
+        entries = sorted(merged.values(), key=lambda entry: (-entry['weight'], entry['text'].lower()))
+        for entry in entries:
+            entry.pop('_best')
+
+        pairs = []
+        for position, entry in enumerate(entries):
+            words = _TOKEN_RE.findall(entry['text'].lower())
+            for start in range(len(words)):
+                pairs.append((' '.join(words[start:]), position))
+        pairs.sort()
+
+        # Entries are sorted best-first, so the first N distinct positions are the top N
+        top_by_short_prefix = {}
+        for key, position in pairs:
+            for length in range(1, self.SHORT_PREFIX_LENGTH + 1):
+                if len(key) >= length:
+                    top_by_short_prefix.setdefault(key[:length], set()).add(position)
+        top_by_short_prefix = {prefix: sorted(positions)[:self.MAX_LIMIT]
+                               for prefix, positions in top_by_short_prefix.items()}
+
+        return _SuggestionSnapshot(
+            [key for key, _ in pairs],
+            [position for _, position in pairs],
+            entries,
+            top_by_short_prefix
+        )
+
+    def rebuild(self):
+        """Build a fresh snapshot and swap it in"""
+        snapshot = self._build()
+        self._snapshot = snapshot
+        with self._lock:
+            self._built_at = time.monotonic()
+
+    def _rebuild_in_background(self, delay):
+        while True:
+            # Let a burst of changes settle so it costs one rebuild
+            time.sleep(delay)
+            with self._lock:
+                if not self._dirty:
+                    self._rebuilding = False
+                    return
+                # Changes from here on set it again and get another pass
+                self._dirty = False
+            try:
+                self.rebuild()
+            except Exception as e:
+                print(f"Error rebuilding suggestion index: {e}")
+
+    def schedule_rebuild(self, delay=0):
+        """Mark the index dirty and start a background rebuild unless one is already running"""
+        with self._lock:
+            self._dirty = True
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild_in_background, args=(delay,), daemon=True).start()
+
+    def on_change(self, entity, entity_id):
+        """db change listener"""
+        if entity in ('menu_items', 'businesses'):
+            self.schedule_rebuild(self.rebuild_delay)
+
+    def suggest(self, prefix, limit=8):
+        """Top `limit` suggestions whose name (or a word in it) starts with `prefix`"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            # First lookup ever: build synchronously once
+            self.rebuild()
+            snapshot = self._snapshot
+        elif self._built_at is not None and time.monotonic() - self._built_at > self.refresh_interval:
+            self.schedule_rebuild()
+
+        prefix = ' '.join(_TOKEN_RE.findall(prefix.lower()))
+        limit = max(1, min(limit, self.MAX_LIMIT))
+        if not prefix:
+            return []
+
+        if len(prefix) <= self.SHORT_PREFIX_LENGTH:
+            positions = snapshot.top_by_short_prefix.get(prefix, [])[:limit]
+        else:
+            keys = snapshot.keys
+            matches = set()
+            index = bisect.bisect_left(keys, prefix)
+            while index < len(keys) and keys[index].startswith(prefix):
+                matches.add(snapshot.key_entries[index])
+                index += 1
+            positions = heapq.nsmallest(limit, matches)
+
+        return [dict(snapshot.entries[position]) for position in positions]
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'entries': len(snapshot.entries) if snapshot else 0,
+            'keys': len(snapshot.keys) if snapshot else 0,
+            'age': time.monotonic() - self._built_at if self._built_at else None
+        }
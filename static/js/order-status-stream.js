@@ -0,0 +1,37 @@
+// Live order status for the tracking pages.
+// Listens to /api/order/<id>/events (Server-Sent Events) and calls onStatus(status) whenever
+// the order's status changes. If the browser can't stream or the server refuses the stream,
+// fallback() is called once so the page can go back to polling /api/order/<id>.
+function watchOrderStatus(orderId, onStatus, fallback) {
+  if (!window.EventSource) {
+    fallback();
+    return null;
+  }
+
+  const finalStatuses = ['delivered', 'cancelled'];
+  const source = new EventSource(`/api/order/${orderId}/events`);
+  let connected = false;
+  let pollingInstead = false;
+
+  source.addEventListener('status', event => {
+    connected = true;
+    const update = JSON.parse(event.data);
+    onStatus(update.status);
+    // The server ends the stream after a final status; stop the browser from reconnecting
+    if (finalStatuses.includes(update.status)) {
+      source.close();
+    }
+  });
+
+  source.onerror = () => {
+    // A dropped stream is retried by EventSource itself (and sends the current status again);
+    // it only gives up (CLOSED) when the server answers with an error such as 503
+    if ((!connected || source.readyState === EventSource.CLOSED) && !pollingInstead) {
+      pollingInstead = true;
+      source.close();
+      fallback();
+    }
+  };
+
+  return source;
+}
@@ -0,0 +1,73 @@
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+# The tests run against the embedded SQLite backend in a throwaway directory.
+# config.py reads these variables when it is first imported, so set them before any app import.
+_DB_DIR = tempfile.mkdtemp(prefix='swift-serve-tests-')
+os.environ['SWIFT_SERVE_DB_BACKEND'] = 'sqlite'
+os.environ['SWIFT_SERVE_SQLITE_PATH'] = os.path.join(_DB_DIR, 'test.sqlite3')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def app():
+    import app as application
+    application.app.config['TESTING'] = True
+    yield application.app
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def dataset(app):
+    """A small generated dataset: users, approved businesses with menus, a few orders"""
+    import datagen
+    return datagen.generate(users=20, businesses=3, items_per_business=5, orders=30, backend_name='sqlite',
+                            sqlite_path=os.environ['SWIFT_SERVE_SQLITE_PATH'], verbose=False)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def new_business(dataset):
+    """An approved business of its own with one menu item, so a test controls all of its orders"""
+    import db
+    suffix = uuid.uuid4().hex[:12]
+    success, business_id = db.create_business(f'Test Kitchen {suffix}', 'Owner', f'kitchen-{suffix}@example.com',
+                                              'password', '9876543210', '1 Test Road', 'restaurant')
+    assert success, business_id
+    db.update_business_status(business_id, 'approved')
+    success, item_id = db.add_menu_item(business_id, f'Thali {suffix}', 'Test dish', 120)
+    assert success, item_id
+    return {'business_id': business_id, 'item_id': item_id, 'email': f'kitchen-{suffix}@example.com',
+            'password': 'password'}
+
+
+@pytest.fixture
+def place_order(new_business):
+    """place_order(quantity=1) -> id of a new order for new_business"""
+    import db
+
+    def place(quantity=1):
+        success, order_id = db.create_cart_order(1, [{'menu_item_id': new_business['item_id'], 'quantity': quantity}],
+                                                 'Test Customer', '9876543210', 'customer@example.com', '12 Test Street')
+        assert success, order_id
+        return order_id
+    return place
+
+
+@pytest.fixture
+def business_client(app, new_business):
+    """A test client logged in as new_business"""
+    client = app.test_client()
+    response = client.post('/api/login', data={'email': new_business['email'], 'password': new_business['password'],
+                                               'account_type': 'business'})
+    assert response.status_code in (200, 302)
+    return client
@@ -0,0 +1,81 @@
+from cache import MISSING, TTLCache
+
+
+def test_load_that_raced_an_invalidation_is_not_cached():
+    cache = TTLCache(ttl=60)
+    generation = cache.generation('user-1')
+    cache.invalidate('user-1')  # a write lands while the row is being read
+    cache.set('user-1', {'is_verified': False}, generation)
+    assert cache.get('user-1') is MISSING
+
+
+def test_load_without_a_write_is_cached():
+    cache = TTLCache(ttl=60)
+    cache.invalidate('user-1')
+    generation = cache.generation('user-1')
+    cache.set('user-1', {'is_verified': True}, generation)
+    assert cache.get('user-1') == {'is_verified': True}
+
+
+def test_other_keys_do_not_block_a_load():
+    cache = TTLCache(ttl=60)
+    generation = cache.generation('user-1')
+    cache.invalidate('user-2')
+    cache.set('user-1', 'row', generation)
+    assert cache.get('user-1') == 'row'
+
+
+def test_clear_turns_away_loads_in_flight():
+    cache = TTLCache(ttl=60, max_entries=2)
+    generation = cache.generation('user-1')
+    cache.clear()
+    cache.set('user-1', 'row', generation)
+    assert cache.get('user-1') is MISSING
+
+
+def test_generation_map_stays_bounded():
+    cache = TTLCache(ttl=60, max_entries=2)
+    generation = cache.generation('user-1')
+    for key in range(10):
+        cache.invalidate(key)
+    assert len(cache._generations) <= 2
+    cache.set('user-1', 'row', generation)
+    assert cache.get('user-1') is MISSING
+
+
+def test_user_row_read_before_an_update_is_not_cached(dataset, monkeypatch):
+    import db
+    user_id = 1
+    db._user_cache.invalidate(user_id)
+    original_set = db._user_cache.set
+
+    def update_then_set(key, value, generation=None):
+        # The update commits after the SELECT but before the row is cached
+        db.update_user(user_id, name='Renamed User')
+        original_set(key, value, generation)
+
+    monkeypatch.setattr(db._user_cache, 'set', update_then_set)
+    stale = db.get_user_by_id(user_id)
+    monkeypatch.setattr(db._user_cache, 'set', original_set)
+
+    assert stale['name'] != 'Renamed User'
+    assert db.get_user_by_id(user_id)['name'] == 'Renamed User'
+
+
+def test_subscription_read_before_a_renewal_is_not_cached(dataset, monkeypatch):
+    import db
+    user_id = 2
+    db.create_subscription(user_id, 'Basic', 99)
+    db._subscription_cache.invalidate(user_id)
+    original_set = db._subscription_cache.set
+
+    def renew_then_set(key, value, generation=None):
+        db.create_subscription(user_id, 'Premium', 299)
+        original_set(key, value, generation)
+
+    monkeypatch.setattr(db._subscription_cache, 'set', renew_then_set)
+    stale = db.get_user_subscription(user_id)
+    monkeypatch.setattr(db._subscription_cache, 'set', original_set)
+
+    assert stale['plan_name'] == 'Basic'
+    assert db.get_user_subscription(user_id)['plan_name'] == 'Premium'
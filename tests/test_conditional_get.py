@@ -0,0 +1,36 @@
+import db
+
+
+def test_menu_item_etag_returns_not_modified(client, dataset):
+    item = db.get_all_menu_items()[0]
+    response = client.get(f"/api/menu-item/{item['id']}")
+    assert response.status_code == 200
+    tag = response.headers['ETag']
+
+    response = client.get(f"/api/menu-item/{item['id']}", headers={'If-None-Match': tag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == tag
+
+
+def test_menu_item_etag_changes_after_edit(client, dataset):
+    item = db.get_all_menu_items()[0]
+    tag = client.get(f"/api/menu-item/{item['id']}").headers['ETag']
+
+    db.update_menu_item(item['id'], description='Freshly edited')
+    response = client.get(f"/api/menu-item/{item['id']}", headers={'If-None-Match': tag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != tag
+
+
+def test_order_etag_changes_after_business_rename(client, dataset):
+    order = db.get_order_by_id(1)
+    response = client.get('/api/order/1')
+    assert response.status_code == 200
+    tag = response.headers['ETag']
+    assert client.get('/api/order/1', headers={'If-None-Match': tag}).status_code == 304
+
+    db.update_business(order['business_id'], business_name='Renamed Kitchen')
+    response = client.get('/api/order/1', headers={'If-None-Match': tag})
+    assert response.status_code == 200
+    assert response.get_json()['business_name'] == 'Renamed Kitchen'
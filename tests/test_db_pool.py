@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+
+from db_pool import ConnectionPool, PoolError
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.in_transaction = False
+        self.rollbacks = 0
+        self.closed = False
+        self.ping_fails = False
+        self.rollback_fails = False
+
+    def ping(self, reconnect=False):
+        if self.ping_fails:
+            raise OSError("server has gone away")
+
+    def rollback(self):
+        if self.rollback_fails:
+            raise OSError("server has gone away")
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeServer:
+    def __init__(self):
+        self.connections = []
+
+    def connect(self):
+        connection = FakeConnection(len(self.connections) + 1)
+        self.connections.append(connection)
+        return connection
+
+
+def make_pool(server, **settings):
+    options = dict(pool_size=1, max_overflow=1, timeout=0.2)
+    options.update(settings)
+    return ConnectionPool(server.connect, **options)
+
+
+def test_released_connection_is_reused():
+    server = FakeServer()
+    pool = make_pool(server)
+    first = pool.acquire()
+    first.close()
+    second = pool.acquire()
+    assert second.raw is first.raw
+    assert pool.stats()['created'] == 1
+
+
+def test_overflow_connections_are_closed_when_released():
+    server = FakeServer()
+    pool = make_pool(server)
+    regular, overflow = pool.acquire(), pool.acquire()
+    assert len(server.connections) == 2
+
+    overflow.close()
+    regular.close()
+
+    assert sum(connection.closed for connection in server.connections) == 1
+    assert pool.stats()['closed'] == 1
+    assert pool.stats()['open'] == 1
+
+
+def test_acquire_times_out_when_the_pool_is_exhausted():
+    pool = make_pool(FakeServer())
+    pool.acquire()
+    pool.acquire()
+
+    started = time.monotonic()
+    with pytest.raises(PoolError):
+        pool.acquire()
+
+    assert 0.15 <= time.monotonic() - started < 2
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_waiting_borrower_gets_a_released_connection():
+    pool = make_pool(FakeServer(), max_overflow=0, timeout=5)
+    borrowed = pool.acquire()
+    threading.Timer(0.1, borrowed.close).start()
+
+    connection = pool.acquire()
+
+    assert connection.raw is borrowed.raw
+
+
+def test_open_transaction_is_rolled_back_on_release():
+    server = FakeServer()
+    pool = make_pool(server)
+    connection = pool.acquire()
+    connection.raw.in_transaction = True
+
+    connection.close()
+
+    assert server.connections[0].rollbacks == 1
+    assert pool.acquire().raw is server.connections[0]
+
+
+def test_failed_rollback_discards_the_connection_and_frees_its_slot():
+    server = FakeServer()
+    pool = make_pool(server, max_overflow=0)
+    connection = pool.acquire()
+    connection.raw.in_transaction = True
+    connection.raw.rollback_fails = True
+
+    connection.close()
+
+    assert server.connections[0].closed
+    assert pool.acquire().raw is server.connections[1]
+
+
+def test_connection_failing_its_ping_is_replaced():
+    server = FakeServer()
+    pool = make_pool(server)
+    pool.acquire().close()
+    server.connections[0].ping_fails = True
+
+    connection = pool.acquire()
+
+    assert connection.raw is server.connections[1]
+    assert server.connections[0].closed
+    assert pool.stats()['failed_pings'] == 1
+
+
+def test_connections_past_their_lifetime_are_recycled():
+    server = FakeServer()
+    pool = make_pool(server, max_lifetime=0.05)
+    pool.acquire().close()
+    time.sleep(0.1)
+
+    assert pool.acquire().raw is server.connections[1]
+    assert pool.stats()['recycled'] == 1
+
+
+def test_failed_connect_frees_the_reserved_slot():
+    server = FakeServer()
+    failing = {'count': 1}
+
+    def connect():
+        if failing['count']:
+            failing['count'] -= 1
+            raise OSError("connection refused")
+        return server.connect()
+
+    pool = ConnectionPool(connect, pool_size=1, max_overflow=0, timeout=0.2)
+    with pytest.raises(OSError):
+        pool.acquire()
+    assert pool.acquire().raw is server.connections[0]
@@ -0,0 +1,46 @@
+import pytest
+
+from explore_feed import ExploreFeed
+
+
+def menu(count):
+    return [{'id': item_id, 'business_id': 1, 'item_name': f'Item {item_id}'} for item_id in range(1, count + 1)]
+
+
+class FlakyLoader:
+    def __init__(self, results):
+        self.results = list(results)
+
+    def __call__(self):
+        return self.results.pop(0)
+
+
+def test_failed_first_load_is_not_cached_as_an_empty_menu():
+    feed = ExploreFeed(FlakyLoader([None, menu(3)]))
+    with pytest.raises(RuntimeError):
+        feed.page('seed')
+    assert feed.page('seed')['total'] == 3
+
+
+def test_failed_refresh_keeps_the_previous_snapshot():
+    feed = ExploreFeed(FlakyLoader([menu(3), None]))
+    feed.refresh()
+    with pytest.raises(RuntimeError):
+        feed.refresh()
+    assert feed.page('seed')['total'] == 3
+
+
+def test_order_is_stable_per_seed_across_refreshes():
+    feed = ExploreFeed(FlakyLoader([menu(20), menu(21)]))
+    feed.refresh()
+    first = [item['id'] for item in feed.ordered_items('abc')]
+    feed.refresh()
+    second = [item['id'] for item in feed.ordered_items('abc') if item['id'] != 21]
+    assert first == second
+
+
+def test_explore_ignores_client_chosen_seeds(client, dataset):
+    first = client.get('/api/explore?seed=1').get_json()
+    second = client.get('/api/explore?seed=2').get_json()
+    assert first['seed'] == second['seed'] not in ('1', '2')
+    assert first['items'] == second['items']
@@ -0,0 +1,61 @@
+import io
+import json
+
+import pytest
+
+import menu_io
+
+
+def menu_row(price):
+    return {'item_name': 'Paneer Roll', 'price': price}
+
+
+def test_valid_price_is_quantized():
+    valid, values = menu_io.validate_menu_row(menu_row('₹120.5'))
+    assert valid
+    assert str(values[2]) == '120.50'
+
+
+@pytest.mark.parametrize('price', ['NaN', 'nan', 'sNaN', 'Infinity', '-inf', 'twelve'])
+def test_non_numeric_price_is_rejected(price):
+    valid, error = menu_io.validate_menu_row(menu_row(price))
+    assert not valid
+    assert 'is not a number' in error
+
+
+def parse_json(text, monkeypatch=None, chunk_size=None):
+    if chunk_size:
+        monkeypatch.setattr(menu_io, 'JSON_CHUNK_SIZE', chunk_size)
+    return list(menu_io._iter_json(io.StringIO(text)))
+
+
+@pytest.mark.parametrize('chunk_size', [3, 64 * 1024])
+def test_json_array_is_decoded_element_by_element(monkeypatch, chunk_size):
+    rows = [{'item_name': f'Item {number}', 'price': number * 10} for number in range(1, 201)]
+    parsed = parse_json(json.dumps(rows, indent=2), monkeypatch, chunk_size)
+    assert parsed == list(enumerate(rows, start=1))
+
+
+def test_number_split_across_chunks_is_not_truncated(monkeypatch):
+    assert parse_json('[1, 22222, 3]', monkeypatch, 5) == [(1, 1), (2, 22222), (3, 3)]
+
+
+def test_json_array_is_not_read_whole(monkeypatch):
+    stream = io.StringIO(json.dumps([menu_row('10')] * 10000))
+    rows = menu_io._iter_json(stream)
+    next(rows)
+    assert stream.tell() < len(stream.getvalue()) // 4
+
+
+def test_malformed_json_array_reports_the_failing_row():
+    parsed = parse_json('[{"item_name": "Dosa", "price": 50} {"item_name": "Idli"}]')
+    assert parsed[0] == (1, {'item_name': 'Dosa', 'price': 50})
+    assert parsed[1][0] == 2
+    assert isinstance(parsed[1][1], ValueError)
+
+
+def test_oversized_json_row_is_rejected(monkeypatch):
+    monkeypatch.setattr(menu_io, 'MAX_JSON_ROW_SIZE', 100)
+    parsed = parse_json(json.dumps([{'description': 'x' * 1000}]), monkeypatch, 16)
+    assert len(parsed) == 1
+    assert 'larger than' in str(parsed[0][1])
@@ -0,0 +1,37 @@
+import json
+import os
+
+import metrics
+
+
+def write_worker_file(directory, pid, requests):
+    path = os.path.join(directory, f'metrics-{pid}.json')
+    with open(path, 'w') as metrics_file:
+        json.dump({'counters': {'swift_serve_requests_total': requests}, 'gauges': {'swift_serve_in_flight': 3},
+                   'pid': pid}, metrics_file)
+
+
+def requests_total(registry):
+    return registry.aggregate()[0].get('swift_serve_requests_total', 0)
+
+
+def test_recycled_pid_does_not_overwrite_dead_worker_totals(tmp_path):
+    # Left by an earlier process that had this process's pid
+    write_worker_file(str(tmp_path), os.getpid(), 40)
+    registry = metrics.Metrics(multiprocess_dir=str(tmp_path))
+    registry.inc('requests_total', amount=2)
+
+    assert requests_total(registry) == 42
+    assert requests_total(registry) == 42
+    assert registry.aggregate()[1] == {}
+
+
+def test_exited_workers_are_merged_into_one_file(tmp_path):
+    write_worker_file(str(tmp_path), 2 ** 22 + 1, 5)  # above pid_max, never alive
+    write_worker_file(str(tmp_path), 2 ** 22 + 2, 7)
+    registry = metrics.Metrics(multiprocess_dir=str(tmp_path))
+    registry.flush(force=True)
+
+    files = set(name for name in os.listdir(str(tmp_path)) if name.endswith('.json'))
+    assert files == {metrics.EXITED_WORKERS_FILE, f'metrics-{os.getpid()}.json'}
+    assert requests_total(registry) == 12
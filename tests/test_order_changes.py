@@ -0,0 +1,91 @@
+import threading
+import time
+
+import db
+
+
+def feed(business_id, since, limit=db.ORDER_CHANGES_MAX_LIMIT):
+    changes = db.get_order_changes(business_id, since, limit)
+    assert changes is not None
+    return changes
+
+
+def test_changes_since_a_version_include_only_newer_writes(new_business, place_order):
+    business_id = new_business['business_id']
+    first = place_order()
+    since = db.get_business_order_version(business_id)
+    second = place_order()
+    db.update_order_status(first, 'confirmed')
+
+    changes = feed(business_id, since)
+
+    assert [order['id'] for order in changes['orders']] == [second, first]
+    assert changes['version'] == db.get_business_order_version(business_id)
+    assert feed(business_id, changes['version']) == {'version': changes['version'], 'orders': [],
+                                                     'tombstones': [], 'has_more': False}
+
+
+def test_cancelled_orders_come_back_as_tombstones(new_business, place_order):
+    business_id = new_business['business_id']
+    order_id = place_order()
+    since = db.get_business_order_version(business_id)
+    db.update_order_status(order_id, 'cancelled')
+
+    changes = feed(business_id, since)
+
+    assert changes['orders'] == []
+    assert changes['tombstones'] == [{'id': order_id, 'status': 'cancelled',
+                                      'version': db.get_business_order_version(business_id)}]
+
+
+def test_has_more_pages_through_every_change(new_business, place_order):
+    business_id = new_business['business_id']
+    order_ids = [place_order() for _ in range(5)]
+
+    seen, since, responses = [], 0, 0
+    while True:
+        changes = feed(business_id, since, limit=2)
+        responses += 1
+        seen.extend(order['id'] for order in changes['orders'])
+        since = changes['version']
+        if not changes['has_more']:
+            break
+
+    assert seen == order_ids
+    assert responses == 3
+
+
+def test_orders_sharing_a_version_are_never_split(new_business, place_order):
+    business_id = new_business['business_id']
+    order_ids = [place_order() for _ in range(3)]
+    shared = db.get_business_order_version(business_id)
+    with db.db_cursor() as (connection, cursor):
+        # As if one transaction had written all three
+        cursor.execute("UPDATE orders SET version = %s WHERE business_id = %s", (shared, business_id))
+        connection.commit()
+
+    changes = feed(business_id, 0, limit=2)
+
+    assert sorted(order['id'] for order in changes['orders']) == order_ids
+    assert changes['version'] == shared
+
+
+def test_long_poll_returns_as_soon_as_an_order_arrives(business_client, new_business, place_order):
+    place_order()
+    since = business_client.get('/api/business/orders?limit=10').get_json()['version']
+    threading.Timer(0.2, place_order).start()
+
+    started = time.monotonic()
+    changes = business_client.get(f'/api/business/orders?since={since}&wait=10').get_json()
+
+    assert time.monotonic() - started < 5
+    assert len(changes['orders']) == 1
+    assert changes['version'] > since
+
+
+def test_long_poll_times_out_without_changes(business_client, new_business, place_order):
+    place_order()
+    since = db.get_business_order_version(new_business['business_id'])
+    changes = business_client.get(f'/api/business/orders?since={since}&wait=0.2').get_json()
+    assert changes['version'] == since
+    assert changes['orders'] == []
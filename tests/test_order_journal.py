@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import db
+import order_journal
+
+
+def events_of(order_id):
+    batch = db.get_order_events(0, db.ORDER_EVENTS_MAX_LIMIT, order_id=order_id)
+    return [(event['event_type'], event['status']) for event in batch['events']]
+
+
+def backdate_events(order_id, days):
+    with db.db_cursor() as (connection, cursor):
+        cursor.execute("UPDATE order_events SET created_at = %s WHERE order_id = %s",
+                       (datetime.now() - timedelta(days=days), order_id))
+        connection.commit()
+
+
+def settled_order(place_order):
+    order_id = place_order()
+    db.update_order_status(order_id, 'confirmed')
+    db.update_order_status(order_id, 'delivered')
+    return order_id
+
+
+def test_every_order_write_is_journaled_in_version_order(place_order):
+    order_id = settled_order(place_order)
+    assert events_of(order_id) == [('created', 'pending'), ('status', 'confirmed'), ('status', 'delivered')]
+    versions = [event['version'] for event in db.get_order_events(0, 100, order_id=order_id)['events']]
+    assert versions == sorted(versions)
+    assert versions[-1] == db.get_order_version(order_id)[0]
+
+
+def test_compaction_keeps_only_the_latest_event_of_settled_orders(place_order):
+    old_order, recent_order = settled_order(place_order), settled_order(place_order)
+    backdate_events(old_order, 10)
+
+    success, counts = db.compact_order_events(retention_days=90, compact_after_days=7, batch_size=1)
+
+    assert success
+    assert counts['compacted'] >= 2
+    assert events_of(old_order) == [('status', 'delivered')]
+    assert len(events_of(recent_order)) == 3
+
+
+def test_retention_drops_every_expired_event(place_order):
+    expired_order, kept_order = settled_order(place_order), settled_order(place_order)
+    backdate_events(expired_order, 100)
+
+    success, counts = db.compact_order_events(retention_days=90, compact_after_days=None, batch_size=2)
+
+    assert success
+    assert counts['expired'] >= 3
+    assert events_of(expired_order) == []
+    assert len(events_of(kept_order)) == 3
+
+
+def test_tail_resumes_after_the_last_version(place_order, capsys):
+    order_id = place_order()
+    before = db.get_order_version(order_id)[0] - 1
+
+    last = order_journal.tail(before)
+
+    assert last == db.get_order_version(order_id)[0]
+    assert f'"order_id": {order_id}' in capsys.readouterr().out
+    assert order_journal.tail(last) == last
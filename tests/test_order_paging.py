@@ -0,0 +1,85 @@
+import pytest
+
+import db
+
+
+def set_order_dates(business_id, order_date):
+    with db.db_cursor() as (connection, cursor):
+        cursor.execute("UPDATE orders SET order_date = %s WHERE business_id = %s", (order_date, business_id))
+        connection.commit()
+
+
+def all_pages(business_id, limit, status=None):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = db.get_orders_page_by_business(business_id, limit=limit, cursor=cursor, status=status)
+        ids.extend(order['id'] for order in page['orders'])
+        pages += 1
+        cursor = page['next_cursor']
+        if cursor is None:
+            return ids, pages
+
+
+def test_pages_split_orders_with_equal_dates_without_gaps_or_repeats(new_business, place_order):
+    order_ids = [place_order() for _ in range(7)]
+    set_order_dates(new_business['business_id'], '2026-01-15 12:00:00')
+
+    ids, pages = all_pages(new_business['business_id'], limit=3)
+
+    # Equal dates fall back to id order, newest first
+    assert ids == sorted(order_ids, reverse=True)
+    assert pages == 3
+
+
+def test_status_filter_pages_across_equal_dates(new_business, place_order):
+    order_ids = [place_order() for _ in range(8)]
+    confirmed = order_ids[::2]
+    for order_id in confirmed:
+        db.update_order_status(order_id, 'confirmed')
+    set_order_dates(new_business['business_id'], '2026-01-15 12:00:00')
+
+    ids, _ = all_pages(new_business['business_id'], limit=2, status='confirmed')
+    assert ids == sorted(confirmed, reverse=True)
+
+    ids, _ = all_pages(new_business['business_id'], limit=2, status='pending')
+    assert ids == sorted(set(order_ids) - set(confirmed), reverse=True)
+
+
+def test_newer_dates_come_first(new_business, place_order):
+    older, newer = place_order(), place_order()
+    with db.db_cursor() as (connection, cursor):
+        cursor.execute("UPDATE orders SET order_date = %s WHERE id = %s", ('2026-01-16 09:00:00', older))
+        cursor.execute("UPDATE orders SET order_date = %s WHERE id = %s", ('2026-01-15 09:00:00', newer))
+        connection.commit()
+
+    ids, _ = all_pages(new_business['business_id'], limit=1)
+    assert ids == [older, newer]
+
+
+def test_last_page_has_no_cursor(new_business, place_order):
+    place_order()
+    page = db.get_orders_page_by_business(new_business['business_id'], limit=1)
+    assert len(page['orders']) == 1
+    assert page['next_cursor'] is None
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        db.decode_order_cursor('not-a-cursor')
+
+
+def test_order_list_api_pages_with_a_status_filter(business_client, new_business, place_order):
+    order_ids = [place_order() for _ in range(5)]
+    for order_id in order_ids[:3]:
+        db.update_order_status(order_id, 'confirmed')
+    set_order_dates(new_business['business_id'], '2026-01-15 12:00:00')
+
+    first = business_client.get('/api/business/orders?status=confirmed&limit=2').get_json()
+    second = business_client.get(f"/api/business/orders?status=confirmed&limit=2&cursor={first['next_cursor']}").get_json()
+
+    assert [order['id'] for order in first['orders'] + second['orders']] == sorted(order_ids[:3], reverse=True)
+    assert second['next_cursor'] is None
+
+
+def test_order_list_api_rejects_a_bad_cursor(business_client):
+    assert business_client.get('/api/business/orders?cursor=garbage').status_code == 400
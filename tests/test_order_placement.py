@@ -0,0 +1,87 @@
+import db
+import datagen
+
+
+def orderable_items(business_id=None):
+    items = db.get_all_menu_items()
+    if business_id is not None:
+        items = [item for item in items if item['business_id'] == business_id]
+    return items
+
+
+CUSTOMER = {
+    'customer_name': 'Test Customer',
+    'customer_phone': '9876543210',
+    'customer_email': 'customer@example.com',
+    'delivery_address': '12 Test Street'
+}
+
+
+def order_form(menu_item_id, quantity=1):
+    return dict(CUSTOMER, menu_item_id=menu_item_id, quantity=quantity)
+
+
+def query_count(response):
+    return int(response.headers['X-DB-Queries'])
+
+
+def test_place_order_stays_within_query_budget(client, dataset):
+    item = orderable_items()[0]
+
+    response = client.post('/api/place-order', data=order_form(item['id'], quantity=2))
+
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['success']
+    assert query_count(response) <= db.ORDER_PLACEMENT_QUERY_BUDGET
+
+
+def test_cart_order_query_budget_does_not_grow_with_items(client, dataset):
+    business_id = orderable_items()[0]['business_id']
+    items = orderable_items(business_id)[:4]
+    body = dict(CUSTOMER, items=[{'menu_item_id': item['id'], 'quantity': 1} for item in items])
+
+    response = client.post('/api/cart-order', json=body)
+
+    assert response.status_code == 200, response.get_json()
+    assert query_count(response) <= db.ORDER_PLACEMENT_QUERY_BUDGET
+
+
+def test_student_order_stays_within_query_budget(client, dataset):
+    # Generated users are students with a verified discount at random; pick one
+    student_id = next(user_id for user_id in dataset['users'] if db.get_user_by_id(user_id)['discount_eligible'])
+    login = client.post('/api/login', data={'email': datagen.user_email(student_id),
+                                            'password': dataset['password']})
+    assert login.status_code in (200, 302)
+    item = orderable_items()[0]
+
+    response = client.post('/api/place-order', data=order_form(item['id']))
+
+    assert response.status_code == 200, response.get_json()
+    assert query_count(response) <= db.ORDER_PLACEMENT_QUERY_BUDGET
+    order = db.get_order_by_id(response.get_json()['order_id'])
+    assert order['discount_applied']
+    assert float(order['discount_percentage']) == db.STUDENT_DISCOUNT_PERCENTAGE
+
+
+def test_order_errors_carry_codes(dataset):
+    item = orderable_items()[0]
+    cases = [
+        ([], db.OrderError.INVALID),
+        ([{'menu_item_id': item['id'], 'quantity': 0}], db.OrderError.INVALID),
+        ([{'menu_item_id': 10 ** 9, 'quantity': 1}], db.OrderError.NOT_FOUND),
+    ]
+    for cart_items, code in cases:
+        success, error = db.create_cart_order(1, cart_items, **{key: CUSTOMER[key] for key in CUSTOMER})
+        assert not success
+        assert error.code == code
+
+
+def test_unknown_menu_item_is_404(client, dataset):
+    response = client.post('/api/place-order', data=order_form(10 ** 9))
+    assert response.status_code == 404
+
+
+def test_invalid_quantity_is_400(client, dataset):
+    item = orderable_items()[0]
+    response = client.post('/api/place-order', data=order_form(item['id'], quantity=0))
+    assert response.status_code == 400
@@ -0,0 +1,94 @@
+import threading
+
+import app as application
+import db
+from order_stream import OrderFeedWaiter, OrderStatusHub, format_event
+
+
+def test_publish_fans_out_to_every_watcher_of_the_order():
+    hub = OrderStatusHub()
+    first, second = hub.subscribe(7), hub.subscribe(7)
+    other = hub.subscribe(8)
+
+    hub.publish(7, 'preparing')
+
+    assert first.get(0)['status'] == 'preparing'
+    assert second.get(0)['status'] == 'preparing'
+    assert other.get(0) is None
+    assert hub.stats()['delivered'] == 2
+
+
+def test_subscriber_cap_rejects_and_frees_slots():
+    hub = OrderStatusHub(max_subscribers=2)
+    first = hub.subscribe(1)
+    hub.subscribe(2)
+    assert hub.subscribe(3) is None
+    assert hub.stats()['rejected'] == 1
+
+    first.close()
+    first.close()  # closing twice releases one slot only
+    assert hub.stats()['subscribers'] == 1
+    assert hub.subscribe(3) is not None
+    assert hub.subscribe(4) is None
+
+
+def test_slow_subscriber_keeps_only_the_latest_events():
+    hub = OrderStatusHub(max_queued=2)
+    subscription = hub.subscribe(1)
+    for status in ('confirmed', 'preparing', 'out_for_delivery'):
+        hub.publish(1, status)
+    assert [subscription.get(0)['status'], subscription.get(0)['status']] == ['preparing', 'out_for_delivery']
+
+
+def test_subscription_wakes_up_on_publish():
+    hub = OrderStatusHub()
+    subscription = hub.subscribe(1)
+    threading.Timer(0.05, hub.publish, (1, 'confirmed')).start()
+    assert subscription.get(5)['status'] == 'confirmed'
+
+
+def test_feed_waiter_returns_on_newer_version():
+    waiter = OrderFeedWaiter()
+    threading.Timer(0.05, waiter.notify, (3, 11)).start()
+    assert waiter.wait(3, 10, 5)
+    assert not waiter.wait(3, 11, 0.05)
+
+
+def test_format_event():
+    assert format_event(5, 'status', '{}', retry=3000) == 'retry: 3000\nid: 5\nevent: status\ndata: {}\n\n'
+
+
+def open_order_id():
+    item = db.get_all_menu_items()[0]
+    success, order_id = db.create_cart_order(1, [{'menu_item_id': item['id'], 'quantity': 1}], 'Tracker Test',
+                                             '9876543210', 'tracker@example.com', '1 Test Road')
+    assert success, order_id
+    return order_id
+
+
+def test_stream_closed_before_first_chunk_releases_its_slot(dataset):
+    hub = application.order_status_hub
+    before = hub.stats()['subscribers']
+
+    # Dispatch without a WSGI server: nothing pulls the first chunk, as with a client that
+    # disconnects before the body starts
+    with application.app.test_request_context(f'/api/order/{open_order_id()}/events'):
+        response = application.app.full_dispatch_request()
+    assert response.status_code == 200
+    assert hub.stats()['subscribers'] == before + 1
+    response.close()
+
+    assert hub.stats()['subscribers'] == before
+
+
+def test_stream_sends_current_status_and_pushed_changes(client, dataset):
+    order_id = open_order_id()
+    response = client.get(f'/api/order/{order_id}/events', buffered=False)
+    chunks = iter(response.response)
+    first = next(chunks)
+    assert b'event: status' in (first if isinstance(first, bytes) else first.encode())
+
+    db.update_order_status(order_id, 'cancelled')
+    rest = b''.join(chunk if isinstance(chunk, bytes) else chunk.encode() for chunk in chunks)
+    assert b'"status":"cancelled"' in rest.replace(b' ', b'')
+    response.close()
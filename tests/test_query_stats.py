@@ -0,0 +1,30 @@
+import db
+
+
+def test_statements_are_attributed_to_the_public_function(dataset):
+    item = db.get_all_menu_items()[0]
+    with db.count_round_trips() as counter:
+        success, order_id = db.create_cart_order(1, [{'menu_item_id': item['id'], 'quantity': 2}], 'Stats Test',
+                                                 '9876543210', 'stats@example.com', '1 Test Road')
+    assert success, order_id
+    # Including the version reservation in db_backends.py and the batched item insert
+    assert set(counter['functions']) == {'create_cart_order'}
+    assert counter['functions']['create_cart_order']['queries'] == counter['queries']
+
+
+def test_private_helpers_are_attributed_to_their_caller(dataset):
+    business_id = db.get_all_menu_items()[0]['business_id']
+    with db.count_round_trips() as counter:
+        db.get_orders_by_business(business_id)
+    assert set(counter['functions']) == {'get_orders_by_business'}
+
+
+def test_statements_outside_db_are_attributed_to_the_caller(dataset):
+    def outside_caller():
+        with db.db_cursor() as (connection, cursor):
+            cursor.execute("SELECT COUNT(*) FROM orders")
+            cursor.fetchone()
+
+    with db.count_round_trips() as counter:
+        outside_caller()
+    assert set(counter['functions']) == {'outside_caller'}
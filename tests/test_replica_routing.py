@@ -0,0 +1,79 @@
+import time
+
+import db
+from db_pool import ConnectionPool, ReplicaSet
+from test_db_pool import FakeConnection, FakeServer
+
+
+def replica_pool(name):
+    return ConnectionPool(FakeServer().connect, pool_size=1, max_overflow=0, timeout=0.2, name=name)
+
+
+def borrowed_pool_name(replicas):
+    connection = replicas.acquire()
+    if connection is None:
+        return None
+    name = connection._pool.name
+    connection.close()
+    return name
+
+
+def test_reads_rotate_across_healthy_replicas():
+    replicas = ReplicaSet([replica_pool('replica-1'), replica_pool('replica-2')])
+    assert [borrowed_pool_name(replicas) for _ in range(4)] == ['replica-1', 'replica-2', 'replica-1', 'replica-2']
+
+
+def test_lagging_replica_is_skipped():
+    lag = {'replica-1': 30, 'replica-2': 1}
+
+    def tagged_pool(name):
+        server = FakeServer()
+
+        def connect():
+            raw = server.connect()
+            raw.replica = name
+            return raw
+        return ConnectionPool(connect, pool_size=1, max_overflow=0, timeout=0.2, name=name)
+
+    replicas = ReplicaSet([tagged_pool('replica-1'), tagged_pool('replica-2')],
+                          lag_check=lambda raw: lag[raw.replica], max_lag=5, check_interval=60)
+
+    assert {borrowed_pool_name(replicas) for _ in range(4)} == {'replica-2'}
+    assert replicas.stats()['lagging'] >= 1
+
+
+def test_all_replicas_lagging_falls_back_to_the_primary():
+    replicas = ReplicaSet([replica_pool('replica-1')], lag_check=lambda raw: None, max_lag=5)
+    assert replicas.acquire() is None
+    assert replicas.stats()['primary_fallbacks'] == 1
+
+
+def test_unreachable_replica_is_skipped_until_retry_after():
+    def refuse():
+        raise OSError("connection refused")
+
+    down = ConnectionPool(refuse, pool_size=1, max_overflow=0, timeout=0.2, name='replica-1')
+    replicas = ReplicaSet([down, replica_pool('replica-2')], retry_after=60)
+
+    assert [borrowed_pool_name(replicas) for _ in range(3)] == ['replica-2'] * 3
+    assert replicas.stats()['failures'] == 1
+
+
+def test_reads_go_to_the_primary_within_the_read_your_writes_window(dataset, monkeypatch):
+    replicas = ReplicaSet([replica_pool('replica-1')])
+    monkeypatch.setattr(db, '_replicas', replicas)
+    window = db.db_replica_routing['read_your_writes_window']
+
+    def read_goes_to_replica():
+        with db.db_connection(read_only=True) as connection:
+            return isinstance(connection.raw, FakeConnection)
+
+    assert read_goes_to_replica()
+    with db.read_your_writes(last_write=time.time() - window - 1):
+        assert read_goes_to_replica()
+    with db.read_your_writes(last_write=time.time()):
+        assert not read_goes_to_replica()
+    with db.read_your_writes() as session_writes:
+        db.update_user(1, name='Replica Test')
+        assert session_writes['last_write'] is not None
+        assert not read_goes_to_replica()
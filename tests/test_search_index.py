@@ -0,0 +1,147 @@
+import threading
+import time
+
+import app as application
+import db
+from search_index import MenuSearchIndex, tokenize
+
+
+class MenuStore:
+    """In-memory stand-in for the menu tables behind the index's loader and fetch_item"""
+
+    def __init__(self, items):
+        self.items = {item['id']: dict(item, business_status='approved') for item in items}
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return [self._public(item) for item in self.items.values()
+                if item['is_available'] and item['business_status'] == 'approved']
+
+    def fetch(self, item_id):
+        item = self.items.get(item_id)
+        return dict(item) if item else None
+
+    @staticmethod
+    def _public(item):
+        item = dict(item)
+        item.pop('business_status')
+        return item
+
+
+def menu_item(item_id, name, business_name='Spice Route', category='Mains', price=150, description=''):
+    return {'id': item_id, 'business_id': 1, 'business_name': business_name, 'item_name': name,
+            'description': description, 'price': price, 'category': category, 'is_available': True}
+
+
+def result_ids(index, query, **filters):
+    return [item['id'] for item in index.search(query, **filters)['results']]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def make_index(*items):
+    store = MenuStore(items)
+    return store, MenuSearchIndex(store.load, store.fetch)
+
+
+def test_tokenize_drops_stop_words():
+    assert tokenize('The Paneer and Rice') == ['paneer', 'rice']
+
+
+def test_every_query_word_must_match_and_names_rank_first():
+    _, index = make_index(menu_item(1, 'Paneer Tikka'), menu_item(2, 'Chicken Tikka'),
+                          menu_item(3, 'Jeera Rice', description='Goes well with paneer tikka'))
+    assert result_ids(index, 'paneer tikka') == [1, 3]
+    assert result_ids(index, 'tikka') == [2, 1, 3]
+
+
+def test_last_word_matches_as_a_prefix():
+    _, index = make_index(menu_item(1, 'Paneer Tikka'), menu_item(2, 'Pav Bhaji'))
+    assert result_ids(index, 'pan') == [1]
+    assert result_ids(index, 'paneer tik') == [1]
+    # Only the word being typed is a prefix
+    assert result_ids(index, 'pan tikka') == []
+
+
+def test_filters_apply_to_matches():
+    _, index = make_index(menu_item(1, 'Veg Biryani', price=180, category='Rice'),
+                          menu_item(2, 'Veg Thali', price=250, category='Thali'))
+    assert result_ids(index, 'veg', max_price=200) == [1]
+    assert result_ids(index, 'veg', category='thali') == [2]
+
+
+def test_menu_changes_are_applied_incrementally():
+    store, index = make_index(menu_item(1, 'Masala Dosa'))
+    assert result_ids(index, 'dosa') == [1]
+
+    store.items[2] = dict(menu_item(2, 'Onion Dosa'), business_status='approved')
+    index.on_change('menu_items', 2)
+    store.items[1]['item_name'] = 'Rava Idli'
+    index.on_change('menu_items', 1)
+
+    assert result_ids(index, 'dosa') == [2]
+    assert result_ids(index, 'masala') == []
+    assert result_ids(index, 'idli') == [1]
+    assert store.loads == 1
+
+    store.items[2]['is_available'] = False
+    index.on_change('menu_items', 2)
+    del store.items[1]
+    index.on_change('menu_items', 1)
+    assert result_ids(index, '') == []
+    assert index.stats()['tokens'] == 0
+
+
+def test_business_change_rebuilds_in_the_background_and_serves_the_old_index():
+    store, index = make_index(menu_item(1, 'Masala Dosa'))
+    index.search('dosa')
+    release = threading.Event()
+    load = store.load
+
+    def slow_load():
+        release.wait(5)
+        return load()
+
+    store.load = slow_load
+    index._loader = slow_load
+    store.items[1]['business_name'] = 'Dosa Corner'
+    index.on_change('businesses', 1)
+
+    # Answered from the previous index while the rebuild waits
+    assert result_ids(index, 'spice') == [1]
+    release.set()
+    wait_for(lambda: index.stats()['built'])
+    assert result_ids(index, 'corner') == [1]
+    assert result_ids(index, 'spice') == []
+
+
+def test_edit_during_a_rebuild_is_not_lost():
+    store, index = make_index(menu_item(1, 'Masala Dosa'))
+    index.search('dosa')
+    load = store.load
+
+    def load_then_edit():
+        items = load()
+        # The edit commits after the rebuild read its rows
+        store.items[1]['item_name'] = 'Rava Idli'
+        index.on_change('menu_items', 1)
+        return items
+
+    index._loader = load_then_edit
+    index.rebuild()
+
+    assert result_ids(index, 'idli') == [1]
+    assert result_ids(index, 'dosa') == []
+
+
+def test_menu_item_added_through_db_is_searchable(new_business):
+    application.search_index.search('')
+    success, item_id = db.add_menu_item(new_business['business_id'], 'Zucchini Fritters', 'Crisp', 90)
+    assert success
+    assert item_id in result_ids(application.search_index, 'zucchini')
@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.mark.parametrize('path', ['/app.py', '/config.py', '/database_setup.sql', '/requests.jsonl',
+                                  '/instance/swift_serves.sqlite3', '/.git/config'])
+def test_private_files_are_not_served(client, path):
+    assert client.get(path).status_code == 404
+
+
+def test_static_files_are_served(client):
+    response = client.get('/swift.css')
+    assert response.status_code == 200
+    response.close()
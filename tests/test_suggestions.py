@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from search_index import SuggestionIndex
+
+
+class Menu:
+    def __init__(self, items, popularity=None):
+        self.items = list(items)
+        self.popularity = popularity or {}
+        self.builds = 0
+        self.popularity_loads = 0
+
+    def load(self):
+        self.builds += 1
+        return list(self.items)
+
+    def load_popularity(self):
+        self.popularity_loads += 1
+        return dict(self.popularity)
+
+
+def menu_item(item_id, name, business_id=1, business_name='Spice Route'):
+    return {'id': item_id, 'item_name': name, 'business_id': business_id, 'business_name': business_name}
+
+
+def texts(suggestions):
+    return [suggestion['text'] for suggestion in suggestions]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_prefix_matches_any_word_and_popular_items_come_first():
+    menu = Menu([menu_item(1, 'Margherita Pizza'), menu_item(2, 'Paneer Pizza'), menu_item(3, 'Masala Dosa')],
+                popularity={2: 40, 1: 10})
+    index = SuggestionIndex(menu.load, menu.load_popularity)
+
+    assert texts(index.suggest('pizza')) == ['Paneer Pizza', 'Margherita Pizza']
+    assert texts(index.suggest('ma')) == ['Margherita Pizza', 'Masala Dosa']
+    assert texts(index.suggest('spice r')) == ['Spice Route']
+    assert index.suggest('') == []
+
+
+def test_burst_of_menu_edits_costs_one_rebuild():
+    menu = Menu([menu_item(1, 'Masala Dosa')])
+    index = SuggestionIndex(menu.load, menu.load_popularity, rebuild_delay=0.2)
+    index.suggest('dosa')
+
+    for item_id in range(2, 7):
+        menu.items.append(menu_item(item_id, f'Dosa Special {item_id}'))
+        index.on_change('menu_items', item_id)
+
+    wait_for(lambda: not index._rebuilding)
+    assert menu.builds == 2
+    assert len(index.suggest('dosa special', limit=10)) == 5
+
+
+def test_edit_during_a_rebuild_triggers_another_pass():
+    menu = Menu([menu_item(1, 'Masala Dosa')])
+    index = SuggestionIndex(menu.load, menu.load_popularity, rebuild_delay=0)
+    index.suggest('dosa')
+    building, release = threading.Event(), threading.Event()
+    load = menu.load
+
+    def slow_load():
+        items = load()
+        building.set()
+        release.wait(5)
+        return items
+
+    menu.load = slow_load
+    index._loader = slow_load
+    index.on_change('menu_items', 1)
+    assert building.wait(5)
+    # Arrives after the running rebuild read the menu
+    menu.items.append(menu_item(2, 'Rava Dosa'))
+    index.on_change('menu_items', 2)
+    release.set()
+
+    wait_for(lambda: not index._rebuilding)
+    assert 'Rava Dosa' in texts(index.suggest('rava'))
+
+
+def test_popularity_is_reloaded_only_after_refresh_interval():
+    menu = Menu([menu_item(1, 'Masala Dosa')])
+    index = SuggestionIndex(menu.load, menu.load_popularity, refresh_interval=300)
+    index.rebuild()
+    index.rebuild()
+    assert menu.builds == 2
+    assert menu.popularity_loads == 1
+
+
+def test_failed_load_keeps_the_previous_suggestions():
+    menu = Menu([menu_item(1, 'Masala Dosa')])
+    index = SuggestionIndex(menu.load, menu.load_popularity)
+    index.suggest('dosa')
+    index._loader = lambda: None
+    with pytest.raises(RuntimeError):
+        index.rebuild()
+    assert texts(index.suggest('dosa')) == ['Masala Dosa']